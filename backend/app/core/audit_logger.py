@@ -1,12 +1,20 @@
 import logging
 import os
+import queue
+import re
+import threading
+from collections import OrderedDict
 from logging.handlers import RotatingFileHandler
+from app.core.config import settings
 
 LOG_DIR = "logs"
 if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
 LOG_FILE = os.path.join(LOG_DIR, "tenant_audit.log")
+# One append-only file per tenant (plus its rotated .1/.2/...), read by app.core.audit_store
+TENANT_LOG_DIR = os.path.join(LOG_DIR, "tenants")
+os.makedirs(TENANT_LOG_DIR, exist_ok=True)
 
 audit_logger = logging.getLogger("tenant_audit")
 audit_logger.setLevel(logging.INFO)
@@ -15,15 +23,168 @@ audit_logger.setLevel(logging.INFO)
 formatter = logging.Formatter('%(asctime)s | %(message)s')
 
 # Rotate logs: Max 5MB per file, keep last 3 backup files
+# Only the writer thread touches this handler, request handlers just enqueue records
 handler = RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=3)
 handler.setFormatter(formatter)
-audit_logger.addHandler(handler)
+
+# Open per-tenant handlers, least recently written first. Capped so we don't hold an fd per tenant.
+_MAX_OPEN_TENANT_HANDLERS = 64
+_tenant_handlers = OrderedDict()
+
+_STOP = object()
+_queue = queue.Queue(maxsize=settings.AUDIT_QUEUE_MAX_SIZE)
+_writer_thread = None
+_writer_lock = threading.Lock()
+
+# Read through get_metrics(), also printed on shutdown
+metrics = {
+    "enqueued": 0,
+    "written": 0,
+    "dropped": 0,
+    "batches": 0,
+    "write_errors": 0,
+    "queue_high_watermark": 0,
+}
+
+
+def tenant_log_path(tenant_id) -> str:
+    # Tenant ids are UUIDs, but never let one escape the directory
+    safe_id = re.sub(r"[^A-Za-z0-9_-]", "_", str(tenant_id))
+    return os.path.join(TENANT_LOG_DIR, f"{safe_id}.log")
+
+
+def _tenant_handler(tenant_id):
+    key = str(tenant_id)
+    tenant_handler = _tenant_handlers.get(key)
+    if tenant_handler is None:
+        tenant_handler = RotatingFileHandler(
+            tenant_log_path(key),
+            maxBytes=settings.AUDIT_TENANT_LOG_MAX_BYTES,
+            backupCount=settings.AUDIT_TENANT_LOG_BACKUPS,
+            delay=True
+        )
+        tenant_handler.setFormatter(formatter)
+        _tenant_handlers[key] = tenant_handler
+        while len(_tenant_handlers) > _MAX_OPEN_TENANT_HANDLERS:
+            _, evicted = _tenant_handlers.popitem(last=False)
+            evicted.close()
+    _tenant_handlers.move_to_end(key)
+    return tenant_handler
+
+
+def _append(target, record):
+    if target.shouldRollover(record):
+        target.doRollover()
+        # Handlers opened with delay=True don't reopen the file after a rollover
+        if target.stream is None:
+            target.stream = target._open()
+    target.stream.write(target.format(record) + target.terminator)
+
+
+def _write_batch(batch):
+    try:
+        touched = {handler}
+        for record in batch:
+            _append(handler, record)
+            tenant_handler = _tenant_handler(record.tenant_id)
+            _append(tenant_handler, record)
+            touched.add(tenant_handler)
+        # One flush per file per batch instead of one per record
+        for target in touched:
+            target.flush()
+        metrics["written"] += len(batch)
+        metrics["batches"] += 1
+    except Exception as e:
+        metrics["write_errors"] += 1
+        print(f"Audit log write failed ({len(batch)} records): {e}")
+
+
+def _writer_loop():
+    while True:
+        item = _queue.get()
+        batch = []
+        stopping = item is _STOP
+        if not stopping:
+            batch.append(item)
+
+        # Drain whatever else is already waiting, up to one batch
+        while not stopping and len(batch) < settings.AUDIT_BATCH_SIZE:
+            try:
+                item = _queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+
+        if batch:
+            _write_batch(batch)
+        if stopping:
+            return
+
+
+def start_writer():
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_writer_loop, name="audit-writer", daemon=True)
+            _writer_thread.start()
+
+
+def stop_writer(timeout: float = 5.0):
+    """Flushes everything queued so far and stops the writer. Called from main.py shutdown."""
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None:
+            return
+        try:
+            # Blocking put: at shutdown we prefer waiting over losing the queue
+            _queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        _writer_thread.join(timeout)
+        _writer_thread = None
+    handler.close()
+    for tenant_handler in _tenant_handlers.values():
+        tenant_handler.close()
+    _tenant_handlers.clear()
+    print(
+        f"Audit writer stopped: {metrics['written']} written, "
+        f"{metrics['dropped']} dropped, {_queue.qsize()} left in queue"
+    )
+
+
+def get_metrics() -> dict:
+    return {**metrics, "queue_depth": _queue.qsize(), "queue_capacity": _queue.maxsize}
+
 
 def log_activity(tenant_id: str, user_email: str, action: str, details: str):
     """
-    Helper to write structured logs.
+    Helper to write structured logs. Never blocks: the record is queued for the writer thread.
     Usage: log_activity(user['tenant_id'], user['email'], "UPDATE_PLAYER", "Banned player X")
     """
+    if _writer_thread is None:
+        start_writer()
+
     # We use a separator '|' to make parsing easy later
     log_message = f"{tenant_id} | {user_email} | {action} | {details}"
-    audit_logger.info(log_message)
\ No newline at end of file
+    # Built now so the timestamp is when it happened, not when it hit the disk
+    record = audit_logger.makeRecord(
+        audit_logger.name, logging.INFO, __file__, 0, log_message, None, None,
+        extra={"tenant_id": str(tenant_id)}
+    )
+
+    try:
+        _queue.put_nowait(record)
+    except queue.Full:
+        metrics["dropped"] += 1
+        # Don't spam stdout while the disk is stuck, one line per 1000 drops
+        if metrics["dropped"] % 1000 == 1:
+            print(f"Audit queue full ({_queue.maxsize}), dropping records ({metrics['dropped']} so far)")
+        return
+
+    metrics["enqueued"] += 1
+    depth = _queue.qsize()
+    if depth > metrics["queue_high_watermark"]:
+        metrics["queue_high_watermark"] = depth
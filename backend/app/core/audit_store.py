@@ -0,0 +1,186 @@
+import argparse
+import base64
+import os
+from datetime import datetime
+from app.core.audit_logger import LOG_FILE, handler as combined_handler, tenant_log_path
+from app.core.config import settings
+
+# Matches audit_logger's '%(asctime)s' format, e.g. "2024-05-01 12:30:45,123"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S,%f"
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def _segments(path: str, backups: int):
+    """Live file first, then .1, .2, ... (newest to oldest)."""
+    candidates = [path] + [f"{path}.{i}" for i in range(1, backups + 1)]
+    return [p for p in candidates if os.path.exists(p)]
+
+
+def _read_lines_reversed(path: str):
+    """Yields the lines of one file from the last to the first, reading blocks from the tail."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0:
+            read_size = min(READ_BLOCK_SIZE, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size) + remainder
+            lines = chunk.split(b"\n")
+            # The first piece may be the tail of a line that started in the previous block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.decode("utf-8", errors="replace")
+        if remainder:
+            yield remainder.decode("utf-8", errors="replace")
+
+
+def _parse_line(line: str):
+    # Parse format: TIMESTAMP | TENANT_ID | EMAIL | ACTION | DETAILS
+    parts = line.strip().split(" | ", 4)
+    if len(parts) < 5:
+        return None
+    return {
+        "timestamp": parts[0],
+        "tenant_id": parts[1],
+        "staff_email": parts[2],
+        "action": parts[3],
+        "details": parts[4]
+    }
+
+
+def encode_cursor(timestamp: str, older: int) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp}|{older}".encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Returns (timestamp, how many entries sharing it are still to come), or raises ValueError."""
+    try:
+        timestamp, older = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+        return timestamp, int(older)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _tenant_entries(tenant_id: str, after_ts: str = None, older: int = 0):
+    """
+    The tenant's entries newest first, across its segments, starting after the cursor position:
+    entries stamped after_ts are held back until the reader is past them, then only the `older`
+    oldest of them are yielded. Counted from the oldest, the position doesn't move when entries
+    are appended in the same millisecond between two page requests.
+    """
+    run = []
+    for segment in _segments(tenant_log_path(tenant_id), settings.AUDIT_TENANT_LOG_BACKUPS):
+        for line in _read_lines_reversed(segment):
+            entry = _parse_line(line)
+            if not entry or entry["tenant_id"] != tenant_id:
+                continue
+            # Fixed-width timestamps compare correctly as strings
+            if after_ts and entry["timestamp"] >= after_ts:
+                if entry["timestamp"] == after_ts:
+                    run.append(entry)
+                continue
+            if after_ts:
+                yield from run[max(len(run) - older, 0):] if older else []
+                after_ts, run = None, []
+            yield entry
+    if after_ts and older:
+        yield from run[max(len(run) - older, 0):]
+
+
+def read_tenant_logs(
+    tenant_id,
+    limit: int = 100,
+    cursor: str = None,
+    action: str = None,
+    since: datetime = None,
+    until: datetime = None
+):
+    """
+    Newest-first audit entries for one tenant, read from the tail of its own file and
+    then its rotated segments. Returns (entries, next_cursor); next_cursor is None on the last page.
+
+    The cursor is the timestamp of the last entry returned and how many entries sharing that
+    timestamp are older than it, so it stays valid when the files rotate or grow between
+    two page requests.
+    """
+    tenant_id = str(tenant_id)
+    after_ts, after_older = decode_cursor(cursor) if cursor else (None, 0)
+    since_ts = since.strftime(TIMESTAMP_FORMAT)[:-3] if since else None
+    until_ts = until.strftime(TIMESTAMP_FORMAT)[:-3] if until else None
+    action = action.upper() if action else None
+
+    entries = []
+    # Timestamp of the last entry taken, and how many entries sharing it were read after it
+    page_end_ts, older = None, 0
+    more = False
+
+    for entry in _tenant_entries(tenant_id, after_ts, after_older):
+        ts = entry["timestamp"]
+        if ts == page_end_ts:
+            older += 1
+        if more:
+            # Page full: only counting the rest of the last entry's millisecond
+            if ts != page_end_ts:
+                break
+            continue
+
+        if since_ts and ts < since_ts:
+            # Files are chronological, everything further back is older still
+            break
+        if until_ts and ts > until_ts:
+            continue
+        if action and entry["action"].upper() != action:
+            continue
+
+        if len(entries) >= limit:
+            # There is at least one more match, so hand out a cursor to the end of this page
+            more = True
+            continue
+
+        del entry["tenant_id"]
+        entries.append(entry)
+        page_end_ts, older = ts, 0
+
+    return entries, encode_cursor(page_end_ts, older) if more else None
+
+
+def rebuild_tenant_logs() -> int:
+    """
+    Splits the combined tenant_audit.log (and its rotated files) into per-tenant files.
+    For history written before per-tenant files existed. Existing tenant files are replaced.
+    Returns the number of lines written.
+    """
+    by_tenant = {}
+    # Oldest segment first so each tenant file stays chronological
+    for segment in reversed(_segments(LOG_FILE, combined_handler.backupCount)):
+        with open(segment, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                entry = _parse_line(line)
+                if entry:
+                    by_tenant.setdefault(entry["tenant_id"], []).append(line.rstrip("\n"))
+
+    written = 0
+    for tenant_id, lines in by_tenant.items():
+        path = tenant_log_path(tenant_id)
+        for old in _segments(path, settings.AUDIT_TENANT_LOG_BACKUPS):
+            os.remove(old)
+        with open(path, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(line + "\n")
+        written += len(lines)
+    return written
+
+
+if __name__ == "__main__":
+    # Usage (from backend/, with the API stopped): python -m app.core.audit_store --rebuild
+    parser = argparse.ArgumentParser(description="Per-tenant audit log maintenance")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild logs/tenants/ from logs/tenant_audit.log")
+    args = parser.parse_args()
+    if args.rebuild:
+        print(f"Wrote {rebuild_tenant_logs()} audit lines into per-tenant files")
+    else:
+        parser.print_help()
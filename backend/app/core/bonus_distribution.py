@@ -0,0 +1,226 @@
+import asyncio
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.database import get_db_connection
+from app.core.audit_logger import log_activity
+
+# FESTIVAL bonuses go to every active player of a tenant, which can be hundreds of thousands
+# of wallets. A BonusDistributionJob walks the players in player_id order and credits one chunk
+# per transaction; the job row is advanced by the same statement as the credits, so a crash
+# loses at most the chunk in flight and the job resumes from there on the next startup.
+
+# Running jobs in this worker, by job_id
+_tasks = {}
+
+
+async def create_job(cur, campaign_id, tenant_id, amount, created_by: str) -> dict:
+    """
+    Registers the distribution of `amount` to the tenant's active players (in the caller's
+    transaction; call launch() after commit). A FAILED job for the campaign is restarted from
+    where it stopped, only with the same amount: players already credited got that amount.
+    Returns {job_id, amount, total_players, processed_players}; 409 if the campaign already has
+    a job running or finished, or a failed one with a different amount.
+    """
+    await cur.execute(
+        """
+        INSERT INTO BonusDistributionJob (campaign_id, tenant_id, amount, total_players, created_by)
+        SELECT %s, %s, %s, COUNT(*), %s
+        FROM Player
+        WHERE tenant_id = %s AND status = 'ACTIVE'
+        ON CONFLICT (campaign_id)
+        DO UPDATE SET status = 'RUNNING', error = NULL, updated_at = NOW()
+        WHERE BonusDistributionJob.status = 'FAILED' AND BonusDistributionJob.amount = EXCLUDED.amount
+        RETURNING job_id, amount, total_players, processed_players
+        """,
+        (campaign_id, tenant_id, amount, created_by, tenant_id)
+    )
+    job = await cur.fetchone()
+    if job:
+        return job
+
+    await cur.execute(
+        "SELECT status, amount, processed_players FROM BonusDistributionJob WHERE campaign_id = %s",
+        (campaign_id,)
+    )
+    existing = await cur.fetchone()
+    if existing and existing['status'] == 'FAILED':
+        raise HTTPException(
+            409,
+            f"A failed distribution of {existing['amount']} to {existing['processed_players']} players "
+            f"can only be resumed with the same amount"
+        )
+    raise HTTPException(409, "This campaign is already being distributed")
+
+
+async def _credit_chunk(cur, job: dict) -> int:
+    """Credits the next chunk of players after job['last_player_id']. Returns the chunk's size."""
+    after_sql, after_params = "", []
+    if job['last_player_id'] is not None:
+        after_sql, after_params = "AND player_id > %s", [job['last_player_id']]
+
+    await cur.execute(
+        f"""
+        WITH chunk AS (
+            SELECT player_id FROM Player
+            WHERE tenant_id = %s AND status = 'ACTIVE' {after_sql}
+            ORDER BY player_id
+            LIMIT %s
+        ), credited AS (
+            INSERT INTO Wallet (player_id, wallet_type, currency_code, balance)
+            SELECT player_id, 'BONUS', 'USD', %s::numeric FROM chunk
+            ON CONFLICT (player_id, wallet_type)
+            DO UPDATE SET balance = Wallet.balance + EXCLUDED.balance
+            RETURNING wallet_id, balance
+        ), txn AS (
+            INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at)
+            SELECT wallet_id, 'BONUS_CREDIT', %s::numeric, balance, 'CAMPAIGN', %s, NOW()
+            FROM credited
+        )
+        UPDATE BonusDistributionJob
+        SET last_player_id = COALESCE((SELECT player_id FROM chunk ORDER BY player_id DESC LIMIT 1), last_player_id),
+            processed_players = processed_players + (SELECT COUNT(*) FROM credited),
+            updated_at = NOW()
+        WHERE job_id = %s
+        RETURNING (SELECT COUNT(*) FROM chunk) AS chunk_size
+        """,
+        (
+            job['tenant_id'], *after_params, settings.BONUS_DISTRIBUTION_CHUNK_SIZE,
+            job['amount'],
+            job['amount'], str(job['campaign_id']),
+            job['job_id']
+        )
+    )
+    return (await cur.fetchone())['chunk_size']
+
+
+async def _process_next_chunk(job_id) -> bool:
+    """One committed chunk. Returns True once the job has nothing left to do."""
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            try:
+                # Row lock: a second runner of the same job (another worker) waits here and
+                # then continues after this chunk instead of crediting it again
+                await cur.execute(
+                    """
+                    SELECT job_id, campaign_id, tenant_id, amount, status, last_player_id, created_by
+                    FROM BonusDistributionJob WHERE job_id = %s FOR UPDATE
+                    """,
+                    (job_id,)
+                )
+                job = await cur.fetchone()
+                if not job or job['status'] != 'RUNNING':
+                    await conn.rollback()
+                    return True
+
+                if await _credit_chunk(cur, job) == settings.BONUS_DISTRIBUTION_CHUNK_SIZE:
+                    await conn.commit()
+                    return False
+
+                # Last chunk: finish the job and archive the campaign in the same transaction
+                await cur.execute(
+                    """
+                    UPDATE BonusDistributionJob
+                    SET status = 'COMPLETED', finished_at = NOW(), updated_at = NOW()
+                    WHERE job_id = %s
+                    RETURNING processed_players
+                    """,
+                    (job_id,)
+                )
+                processed = (await cur.fetchone())['processed_players']
+                await cur.execute(
+                    """
+                    UPDATE BonusCampaign
+                    SET is_active = FALSE, name = CONCAT(name, ' [ARCHIVED]')
+                    WHERE campaign_id = %s AND name NOT LIKE '%%[ARCHIVED]%%'
+                    """,
+                    (job['campaign_id'],)
+                )
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+
+    log_activity(
+        tenant_id=job['tenant_id'],
+        user_email=job['created_by'] or "unknown",
+        action="DISTRIBUTE_BONUS",
+        details=f"Campaign {job['campaign_id']}: Distributed to {processed} players"
+    )
+    return True
+
+
+async def _mark_failed(job_id, error: str):
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                UPDATE BonusDistributionJob
+                SET status = 'FAILED', error = %s, updated_at = NOW()
+                WHERE job_id = %s AND status = 'RUNNING'
+                """,
+                (error, job_id)
+            )
+            await conn.commit()
+
+
+async def run_job(job_id):
+    """Credits chunk after chunk until the job is done. A failed job keeps its position and can be restarted."""
+    try:
+        while not await _process_next_chunk(job_id):
+            pass
+    except asyncio.CancelledError:
+        # Shutdown: the job stays RUNNING and resume_jobs() continues it on the next startup
+        raise
+    except Exception as e:
+        print(f"Bonus distribution {job_id} failed: {e}")
+        try:
+            await _mark_failed(job_id, str(e))
+        except Exception as e2:
+            print(f"Could not mark bonus distribution {job_id} as failed: {e2}")
+
+
+def launch(job_id):
+    """Runs the job in the background of this worker (no-op if it is already running here)."""
+    key = str(job_id)
+    if key in _tasks:
+        return
+    task = asyncio.create_task(run_job(job_id))
+    _tasks[key] = task
+    task.add_done_callback(lambda _: _tasks.pop(key, None))
+
+
+async def get_job(job_id, tenant_id):
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT job_id, campaign_id, amount, status, total_players, processed_players,
+                       error, created_at, updated_at, finished_at
+                FROM BonusDistributionJob
+                WHERE job_id = %s AND tenant_id = %s
+                """,
+                (job_id, tenant_id)
+            )
+            return await cur.fetchone()
+
+
+async def resume_jobs():
+    """Startup: picks up jobs left RUNNING by a crash or a restart."""
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT job_id FROM BonusDistributionJob WHERE status = 'RUNNING'")
+            jobs = await cur.fetchall()
+    for job in jobs:
+        print(f"Resuming bonus distribution {job['job_id']}")
+        launch(job['job_id'])
+
+
+async def stop_jobs():
+    for task in list(_tasks.values()):
+        task.cancel()
+    for task in list(_tasks.values()):
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _tasks.clear()
@@ -1,4 +1,5 @@
 from uuid import UUID
+from app.core import wallet_ledger
 
 
 class BonusService:
@@ -39,23 +40,92 @@ class BonusService:
             (player_id, campaign_id, amount)
         )
 
-        # 5. Credit BONUS Wallet
-        await cursor.execute(
-            "SELECT wallet_id, balance FROM Wallet WHERE player_id = %s AND wallet_type = 'BONUS'",
-            (player_id,)
+        # 5. Credit BONUS Wallet (opened on the first bonus) and record the transaction
+        await wallet_ledger.credit_or_open(
+            cursor, player_id, 'BONUS', currency, amount, 'BONUS_CREDIT', 'CAMPAIGN', campaign_id
         )
-        bonus_wallet = await cursor.fetchone()
-
-        if bonus_wallet:
-            new_bal = float(bonus_wallet['balance']) + amount
-            await cursor.execute("UPDATE Wallet SET balance = %s WHERE wallet_id = %s", (new_bal, bonus_wallet['wallet_id']))
-        else:
-            await cursor.execute(
-                """
-                INSERT INTO Wallet (player_id, wallet_type, currency_code, balance)
-                VALUES (%s, 'BONUS', %s, %s)
-                """,
-                (player_id, currency, amount)
-            )
             
-        print(f"Granted ${amount} (Campaign: {campaign_id}) to Player {player_id}")
\ No newline at end of file
+        print(f"Granted ${amount} (Campaign: {campaign_id}) to Player {player_id}")
+
+    @staticmethod
+    async def track_bet_threshold_progress(
+        cursor,
+        player_id,
+        tenant_id,
+        bet_amount: float
+    ):
+        """
+        Adds a settled stake to the player's progress on every running BET_THRESHOLD
+        campaign (is_active is kept in sync with the campaign window by campaign_scheduler). A row flips to awarded (awarded_at set) only once, in this statement.
+        Returns the campaigns that were just reached: [{campaign_id, bonus_amount}].
+        """
+        await cursor.execute(
+            """
+            WITH progressed AS (
+                INSERT INTO CampaignProgress AS cp (player_id, campaign_id, wagered_amount, awarded_at, updated_at)
+                SELECT
+                    %s,
+                    c.campaign_id,
+                    %s,
+                    CASE WHEN %s >= c.wagering_requirement THEN NOW() END,
+                    NOW()
+                FROM BonusCampaign c
+                WHERE c.tenant_id = %s
+                  AND c.bonus_type = 'BET_THRESHOLD'
+                  AND c.is_active = TRUE
+                ON CONFLICT (player_id, campaign_id) DO UPDATE
+                SET wagered_amount = cp.wagered_amount + EXCLUDED.wagered_amount,
+                    awarded_at = CASE
+                        WHEN cp.wagered_amount + EXCLUDED.wagered_amount >= (
+                            SELECT wagering_requirement FROM BonusCampaign WHERE campaign_id = EXCLUDED.campaign_id
+                        ) THEN NOW()
+                    END,
+                    updated_at = NOW()
+                WHERE cp.awarded_at IS NULL
+                RETURNING cp.campaign_id, cp.awarded_at
+            )
+            SELECT c.campaign_id, c.bonus_amount
+            FROM progressed pr
+            JOIN BonusCampaign c ON c.campaign_id = pr.campaign_id
+            WHERE pr.awarded_at IS NOT NULL
+            """,
+            (player_id, bet_amount, bet_amount, tenant_id)
+        )
+        return await cursor.fetchall()
+
+    @staticmethod
+    async def backfill_campaign_progress(cursor, campaign_id):
+        """
+        Recomputes CampaignProgress for one BET_THRESHOLD campaign from existing Bets
+        in its window. Players who already got the bonus stay awarded.
+        """
+        await cursor.execute(
+            """
+            INSERT INTO CampaignProgress AS cp (player_id, campaign_id, wagered_amount, awarded_at, updated_at)
+            SELECT
+                b.player_id,
+                c.campaign_id,
+                SUM(b.bet_amount),
+                (
+                    SELECT MIN(wt.created_at)
+                    FROM WalletTransaction wt
+                    JOIN Wallet w ON wt.wallet_id = w.wallet_id
+                    WHERE w.player_id = b.player_id
+                      AND wt.reference_type = 'CAMPAIGN'
+                      AND wt.reference_id = c.campaign_id::text
+                ),
+                NOW()
+            FROM BonusCampaign c
+            JOIN Bet b ON b.tenant_id = c.tenant_id
+                      AND b.created_at >= c.start_date
+                      AND (c.end_date IS NULL OR b.created_at <= c.end_date)
+            WHERE c.campaign_id = %s AND c.bonus_type = 'BET_THRESHOLD'
+            GROUP BY b.player_id, c.campaign_id
+            ON CONFLICT (player_id, campaign_id) DO UPDATE
+            SET wagered_amount = EXCLUDED.wagered_amount,
+                awarded_at = COALESCE(cp.awarded_at, EXCLUDED.awarded_at),
+                updated_at = NOW()
+            """,
+            (campaign_id,)
+        )
+        return cursor.rowcount
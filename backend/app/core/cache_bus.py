@@ -0,0 +1,71 @@
+import asyncio
+import psycopg
+from app.core.config import settings
+
+# Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+# Payload format: "<topic>:<key>", key "*" means "drop everything for this topic".
+CHANNEL = "cache_invalidation"
+
+_handlers = {}
+_listener_task = None
+
+
+def register(topic: str, handler):
+    """handler(key: str) is called for every invalidation of `topic` (local or remote)."""
+    _handlers[topic] = handler
+
+
+def _dispatch(topic: str, key: str):
+    handler = _handlers.get(topic)
+    if handler:
+        handler(key)
+
+
+def _dispatch_all():
+    for handler in _handlers.values():
+        handler("*")
+
+
+async def publish(cur, topic: str, key="*"):
+    """
+    Invalidates this worker right away and queues a NOTIFY for the others.
+    Run it inside the transaction that changes the data: NOTIFY is only delivered on commit.
+    """
+    key = str(key) if key is not None else "*"
+    _dispatch(topic, key)
+    await cur.execute("SELECT pg_notify(%s, %s)", (CHANNEL, f"{topic}:{key}"))
+
+
+async def _listen_forever():
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(settings.DB_CONFIG, autocommit=True) as conn:
+                await conn.execute(f"LISTEN {CHANNEL}")
+                # Anything published while we were disconnected is lost, so start clean
+                _dispatch_all()
+                async for notify in conn.notifies():
+                    topic, _, key = notify.payload.partition(":")
+                    _dispatch(topic, key or "*")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Cache listener error: {e}. Reconnecting in 5s")
+            _dispatch_all()
+            await asyncio.sleep(5)
+
+
+def start_listener():
+    global _listener_task
+    if _listener_task is None:
+        _listener_task = asyncio.create_task(_listen_forever())
+
+
+async def stop_listener():
+    global _listener_task
+    if _listener_task:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
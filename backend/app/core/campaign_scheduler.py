@@ -0,0 +1,134 @@
+import asyncio
+import heapq
+from app.core import cache_bus
+from app.core.config import settings
+from app.core.database import get_db_connection
+
+# Starts and ends bonus campaigns at their start_date / end_date, so reads never write and
+# settlement can trust is_active. Upcoming boundaries sit in a heap of (due, campaign_id);
+# the loop sleeps until the earliest one. Campaign changes in any worker are published on
+# the cache bus and reload the heap; the periodic rescan covers lost notifications.
+TOPIC = "campaign_schedule"
+
+# (loop time when due, campaign_id)
+_deadlines = []
+_wake = asyncio.Event()
+_reload = True
+_task = None
+
+
+def _on_change(key: str):
+    global _reload
+    _reload = True
+    _wake.set()
+
+
+cache_bus.register(TOPIC, _on_change)
+
+
+async def publish_change(cur, campaign_id=None):
+    """Call in the transaction that creates a campaign or changes its dates / is_active."""
+    await cache_bus.publish(cur, TOPIC, campaign_id)
+
+
+async def apply_boundaries():
+    """Expires campaigns past end_date and starts pending ones whose start_date has come."""
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                UPDATE BonusCampaign
+                SET is_active = FALSE, pending_start = FALSE
+                WHERE (is_active = TRUE OR pending_start = TRUE)
+                  AND end_date IS NOT NULL AND end_date < NOW()
+                RETURNING campaign_id
+                """
+            )
+            expired = await cur.fetchall()
+            await cur.execute(
+                """
+                UPDATE BonusCampaign
+                SET is_active = TRUE, pending_start = FALSE
+                WHERE pending_start = TRUE AND start_date <= NOW()
+                RETURNING campaign_id
+                """
+            )
+            started = await cur.fetchall()
+            await conn.commit()
+
+    if expired or started:
+        print(f"Campaign scheduler: {len(started)} started, {len(expired)} expired")
+    return len(started), len(expired)
+
+
+async def _load_deadlines():
+    """Rebuilds the heap from the database, as seconds from the database's NOW()."""
+    global _deadlines
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT campaign_id, EXTRACT(EPOCH FROM (start_date - NOW())) AS due_in
+                FROM BonusCampaign WHERE pending_start = TRUE
+                UNION ALL
+                SELECT campaign_id, EXTRACT(EPOCH FROM (end_date - NOW())) AS due_in
+                FROM BonusCampaign WHERE is_active = TRUE AND end_date IS NOT NULL
+                """
+            )
+            rows = await cur.fetchall()
+
+    now = asyncio.get_running_loop().time()
+    _deadlines = [(now + max(float(r['due_in']), 0.0), str(r['campaign_id'])) for r in rows]
+    heapq.heapify(_deadlines)
+
+
+async def _run_forever():
+    global _reload
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            if _reload:
+                _reload = False
+                await apply_boundaries()
+                await _load_deadlines()
+
+            if _deadlines and _deadlines[0][0] <= loop.time():
+                # Everything due is handled by the same two UPDATEs; the reload then
+                # puts back anything the database clock didn't consider due yet
+                while _deadlines and _deadlines[0][0] <= loop.time():
+                    heapq.heappop(_deadlines)
+                _reload = True
+                continue
+
+            timeout = settings.CAMPAIGN_SCHEDULER_RESCAN_SECONDS
+            if _deadlines:
+                timeout = min(timeout, _deadlines[0][0] - loop.time())
+            _wake.clear()
+            try:
+                await asyncio.wait_for(_wake.wait(), timeout=max(timeout, 0))
+            except asyncio.TimeoutError:
+                if not _deadlines or _deadlines[0][0] > loop.time():
+                    _reload = True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Campaign scheduler failed: {e}")
+            _reload = True
+            await asyncio.sleep(settings.CAMPAIGN_SCHEDULER_RESCAN_SECONDS)
+
+
+def start_scheduler():
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_run_forever())
+
+
+async def stop_scheduler():
+    global _task
+    if _task:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
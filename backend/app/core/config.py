@@ -11,11 +11,74 @@ class Settings(BaseSettings):
     DB_PASS: str
     DB_HOST: str = "localhost"
     DB_PORT: int = 5432
+    # Connection pool: min_size connections are opened at startup and kept ready
+    DB_POOL_MIN_SIZE: int = 4
+    DB_POOL_MAX_SIZE: int = 20
+    # Seconds a request waits for a free connection before getting a 503
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    # Idle connections above min_size are closed after this long; every connection is replaced after max lifetime
+    DB_POOL_MAX_IDLE_SECONDS: float = 600.0
+    DB_POOL_MAX_LIFETIME_SECONDS: float = 3600.0
+    # statement_timeout set on every pooled connection (0 = no limit); migrations and rebuilds lift it
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    # Optional read replica (same name/user/password) for analytics and listings, see get_read_connection();
+    # empty host means those reads use the primary
+    DB_REPLICA_HOST: str = ""
+    DB_REPLICA_PORT: int = 5432
+    DB_REPLICA_POOL_MIN_SIZE: int = 2
+    DB_REPLICA_POOL_MAX_SIZE: int = 10
+    # Reads go to the primary while the replica is further behind than this, or can't hand out
+    # a connection within DB_REPLICA_TIMEOUT_SECONDS
+    DB_REPLICA_MAX_LAG_SECONDS: float = 30.0
+    DB_REPLICA_TIMEOUT_SECONDS: float = 2.0
+    DB_REPLICA_STATEMENT_TIMEOUT_MS: int = 60000
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 # 24 Hours
+    # Threads used for bcrypt hash/verify (max concurrent hashes per worker)
+    PASSWORD_HASH_WORKERS: int = 4
+    # get_current_user principal cache (status changes also evict explicitly)
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+
+    # Game Engine
+    # "SINGLE_TRIP" settles a spin with one settle_game_round() call,
+    # "MULTI_STATEMENT" keeps the original statement-by-statement path
+    SETTLEMENT_MODE: str = "SINGLE_TRIP"
+    # Upper bound on spins per /engine/play/{game_id}/batch request
+    MAX_BATCH_ROUNDS: int = 100
+    # Paytable config (JSON); empty means backend/paytables/paytables.json
+    PAYTABLES_FILE: str = ""
+    # Per-worker TenantGame/PlatformGame cache, also invalidated by admin changes
+    GAME_CATALOG_TTL_SECONDS: int = 300
+    # How often /admin/earnings' daily cube is topped up from the GGR rollup
+    EARNINGS_CUBE_REFRESH_SECONDS: int = 60
+    # Idempotency-Key responses are replayed for this long, then deleted by a background task
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_CLEANUP_SECONDS: int = 600
+    # Rows fetched from the server-side cursor (and sent as one chunk) per step of an export
+    EXPORT_BATCH_ROWS: int = 2000
+    # Players credited per committed transaction by a FESTIVAL bonus distribution job
+    BONUS_DISTRIBUTION_CHUNK_SIZE: int = 1000
+    # Campaign scheduler: upper bound on its sleep, reloads deadlines in case a change notification was lost
+    CAMPAIGN_SCHEDULER_RESCAN_SECONDS: int = 300
+    # Game sessions older than GAME_SESSION_MAX_HOURS or without a round for GAME_SESSION_IDLE_MINUTES
+    # are closed by the background reaper, which runs every GAME_SESSION_REAP_SECONDS
+    GAME_SESSION_MAX_HOURS: int = 2
+    GAME_SESSION_IDLE_MINUTES: int = 30
+    GAME_SESSION_REAP_SECONDS: int = 60
+    # Sessions closed per reaper transaction
+    GAME_SESSION_REAP_BATCH_SIZE: int = 1000
+
+    # Audit log: records queued beyond this are dropped (and counted) instead of blocking requests
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    # Max records the background writer flushes to disk at once
+    AUDIT_BATCH_SIZE: int = 200
+    # Per-tenant audit files (logs/tenants/<tenant_id>.log): rotate size and rotated files kept
+    AUDIT_TENANT_LOG_MAX_BYTES: int = 2 * 1024 * 1024
+    AUDIT_TENANT_LOG_BACKUPS: int = 5
 
     # Pydantic V2 Config
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
@@ -25,4 +88,11 @@ class Settings(BaseSettings):
         """Constructs the connection string for psycopg"""
         return f"dbname={self.DB_NAME} user={self.DB_USER} password={self.DB_PASS} host={self.DB_HOST} port={self.DB_PORT}"
 
+    @property
+    def DB_REPLICA_CONFIG(self) -> str:
+        """Connection string for the read replica, empty when none is configured"""
+        if not self.DB_REPLICA_HOST:
+            return ""
+        return f"dbname={self.DB_NAME} user={self.DB_USER} password={self.DB_PASS} host={self.DB_REPLICA_HOST} port={self.DB_REPLICA_PORT}"
+
 settings = Settings()
\ No newline at end of file
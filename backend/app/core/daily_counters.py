@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+from datetime import date, datetime
+from app.core.database import pool, get_db_connection, without_statement_timeout
+
+
+async def record_daily_wager(cur, player_id, bet_amount: float, payout: float):
+    """
+    Adds one settled bet to the player's counter row for today.
+    Must run in the same transaction as the Bet insert.
+    """
+    await cur.execute(
+        """
+        INSERT INTO PlayerDailyWager (player_id, wager_date, total_wagered, total_won, updated_at)
+        VALUES (%s, CURRENT_DATE, %s, %s, NOW())
+        ON CONFLICT (player_id, wager_date) DO UPDATE
+        SET total_wagered = PlayerDailyWager.total_wagered + EXCLUDED.total_wagered,
+            total_won = PlayerDailyWager.total_won + EXCLUDED.total_won,
+            updated_at = NOW()
+        """,
+        (player_id, bet_amount, payout)
+    )
+
+
+async def rebuild_daily_counters(since: date = None) -> int:
+    """
+    Recomputes PlayerDailyWager from Bet/BetOutcome history.
+    With `since`, only days from that date onwards are replaced.
+    Returns the number of counter rows written.
+    """
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            try:
+                await without_statement_timeout(cur)
+                if since:
+                    await cur.execute("DELETE FROM PlayerDailyWager WHERE wager_date >= %s", (since,))
+                else:
+                    await cur.execute("DELETE FROM PlayerDailyWager")
+
+                await cur.execute(
+                    """
+                    INSERT INTO PlayerDailyWager (player_id, wager_date, total_wagered, total_won, updated_at)
+                    SELECT
+                        b.player_id,
+                        b.created_at::date,
+                        COALESCE(SUM(b.bet_amount), 0),
+                        COALESCE(SUM(bo.payout_amount), 0),
+                        NOW()
+                    FROM Bet b
+                    LEFT JOIN BetOutcome bo ON b.bet_id = bo.bet_id
+                    WHERE %s::date IS NULL OR b.created_at >= %s::date
+                    GROUP BY b.player_id, b.created_at::date
+                    """,
+                    (since, since)
+                )
+                written = cur.rowcount
+                await conn.commit()
+                return written
+            except Exception:
+                await conn.rollback()
+                raise
+
+
+async def _main(since: date = None):
+    await pool.open()
+    try:
+        written = await rebuild_daily_counters(since)
+        print(f"Rebuilt {written} daily wager counter rows" + (f" since {since}" if since else ""))
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    # Usage (from backend/): python -m app.core.daily_counters [--since YYYY-MM-DD]
+    parser = argparse.ArgumentParser(description="Rebuild PlayerDailyWager from Bet history")
+    parser.add_argument("--since", help="Only rebuild days on or after this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+    since_date = datetime.strptime(args.since, "%Y-%m-%d").date() if args.since else None
+    asyncio.run(_main(since_date))
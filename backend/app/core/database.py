@@ -1,20 +1,87 @@
+import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
-from psycopg_pool import AsyncConnectionPool
+from fastapi import HTTPException
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
 from psycopg.rows import dict_row
 from app.core.config import settings
 
-# Initialize Pool
+
+def _session_setup(statement_timeout_ms: int, read_only: bool = False):
+    """configure callback: runs once on every new pooled connection, session settings all requests can rely on."""
+    async def configure(conn):
+        await conn.execute("SELECT set_config('statement_timeout', %s, false)", (str(statement_timeout_ms),))
+        if read_only:
+            # A replica that isn't a hot standby (e.g. a second local instance) still refuses writes
+            await conn.execute("SELECT set_config('default_transaction_read_only', 'on', false)")
+        # The pool only accepts idle connections back
+        await conn.commit()
+    return configure
+
+
+# Initialize Pool (sizes and timeouts: DB_POOL_* / DB_STATEMENT_TIMEOUT_MS in config)
 pool = AsyncConnectionPool(
     conninfo=settings.DB_CONFIG,
-    open=False, 
-    min_size=1,
-    max_size=20, # increase or decrease entries at a time based on traffic
+    open=False,
+    min_size=settings.DB_POOL_MIN_SIZE,
+    max_size=settings.DB_POOL_MAX_SIZE,
+    timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    max_idle=settings.DB_POOL_MAX_IDLE_SECONDS,
+    max_lifetime=settings.DB_POOL_MAX_LIFETIME_SECONDS,
+    configure=_session_setup(settings.DB_STATEMENT_TIMEOUT_MS),
+    name="main",
     kwargs={
         "row_factory": dict_row # to return results as dictionaries
     }
 )
 
+# Read replica for get_read_connection(), None when DB_REPLICA_HOST is not set
+replica_pool = None
+if settings.DB_REPLICA_CONFIG:
+    replica_pool = AsyncConnectionPool(
+        conninfo=settings.DB_REPLICA_CONFIG,
+        open=False,
+        min_size=settings.DB_REPLICA_POOL_MIN_SIZE,
+        max_size=settings.DB_REPLICA_POOL_MAX_SIZE,
+        timeout=settings.DB_REPLICA_TIMEOUT_SECONDS,
+        max_idle=settings.DB_POOL_MAX_IDLE_SECONDS,
+        max_lifetime=settings.DB_POOL_MAX_LIFETIME_SECONDS,
+        configure=_session_setup(settings.DB_REPLICA_STATEMENT_TIMEOUT_MS, read_only=True),
+        name="replica",
+        kwargs={"row_factory": dict_row}
+    )
+
+# Replica lag is measured at most this often; in between, the last verdict routes reads
+REPLICA_CHECK_SECONDS = 5
+
+_replica_state = {"usable": True, "checked_at": 0.0, "lag_seconds": None}
+
+# Read through replica_status()
+replica_metrics = {"replica_reads": 0, "primary_fallbacks": 0, "replica_errors": 0}
+
+
+async def open_pool():
+    """
+    Startup: opens the pool and waits until its min_size connections are connected and configured,
+    so the first burst of requests doesn't pay for connection setup.
+    The replica pool connects in the background: a replica that is down must not block startup.
+    """
+    await pool.open(wait=True, timeout=settings.DB_POOL_TIMEOUT_SECONDS)
+    if replica_pool is not None:
+        await replica_pool.open(wait=False)
+
+
+async def close_pool():
+    if replica_pool is not None:
+        await replica_pool.close()
+    await pool.close()
+
+
+async def without_statement_timeout(cur):
+    """Lifts DB_STATEMENT_TIMEOUT_MS for the rest of the current transaction (backfills, full rebuilds)."""
+    await cur.execute("SELECT set_config('statement_timeout', '0', true)")
+
+
 @asynccontextmanager
 async def get_db_connection() -> AsyncGenerator:
     """
@@ -22,5 +89,102 @@ async def get_db_connection() -> AsyncGenerator:
     async with get_db_connection() as conn:
         await conn.execute(...)
     """
-    async with pool.connection() as conn:
-        yield conn
\ No newline at end of file
+    try:
+        async with pool.connection() as conn:
+            yield conn
+    except PoolTimeout:
+        # Every connection stayed busy for DB_POOL_TIMEOUT_SECONDS
+        raise HTTPException(503, "Server is busy, please try again.")
+
+
+def _set_replica_state(usable: bool, lag_seconds=None, reason: str = ""):
+    if usable != _replica_state["usable"]:
+        print(f"Read replica {'back in use' if usable else 'not used'}: {reason}")
+    _replica_state.update(usable=usable, checked_at=time.monotonic(), lag_seconds=lag_seconds)
+
+
+async def _replica_lag_seconds(conn) -> float:
+    cur = await conn.execute(
+        """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            -- Everything received is applied: an idle primary isn't lag
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp()), 0)
+        END AS lag_seconds
+        """
+    )
+    lag = float((await cur.fetchone())['lag_seconds'])
+    await conn.rollback()
+    return lag
+
+
+async def _checkout_replica():
+    """A replica connection if the replica is reachable and fresh enough, else None."""
+    if replica_pool is None:
+        return None
+    due = time.monotonic() - _replica_state["checked_at"] >= REPLICA_CHECK_SECONDS
+    if not _replica_state["usable"] and not due:
+        return None
+
+    try:
+        conn = await replica_pool.getconn()
+    except Exception as e:
+        replica_metrics["replica_errors"] += 1
+        _set_replica_state(False, reason=f"unavailable ({e})")
+        return None
+
+    if due:
+        try:
+            lag = await _replica_lag_seconds(conn)
+        except Exception as e:
+            replica_metrics["replica_errors"] += 1
+            await replica_pool.putconn(conn)
+            _set_replica_state(False, reason=f"lag check failed ({e})")
+            return None
+        usable = lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+        _set_replica_state(usable, lag, reason=f"{lag:.1f}s behind the primary")
+        if not usable:
+            await replica_pool.putconn(conn)
+            return None
+    return conn
+
+
+@asynccontextmanager
+async def get_read_connection() -> AsyncGenerator:
+    """
+    Same usage as get_db_connection(), for read-only endpoints that can show data up to
+    DB_REPLICA_MAX_LAG_SECONDS old: served by the replica, so heavy reports don't take
+    connections from the money path. Falls back to the primary when no replica is configured,
+    it is unreachable or it lags. Never write through it.
+    """
+    conn = await _checkout_replica()
+    if conn is None:
+        if replica_pool is not None:
+            replica_metrics["primary_fallbacks"] += 1
+        async with get_db_connection() as conn:
+            yield conn
+        return
+
+    replica_metrics["replica_reads"] += 1
+    try:
+        # Same commit / rollback on exit as pool.connection()
+        async with conn:
+            yield conn
+    finally:
+        await replica_pool.putconn(conn)
+
+
+def replica_status():
+    if replica_pool is None:
+        return None
+    return {
+        "name": replica_pool.name,
+        "min_size": replica_pool.min_size,
+        "max_size": replica_pool.max_size,
+        "max_lag_seconds": settings.DB_REPLICA_MAX_LAG_SECONDS,
+        "in_use": _replica_state["usable"],
+        "lag_seconds": _replica_state["lag_seconds"],
+        **replica_metrics,
+        "stats": replica_pool.get_stats()
+    }
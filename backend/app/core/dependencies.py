@@ -3,6 +3,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from app.core.config import settings
 from app.core.database import get_db_connection
+from app.core.principal_cache import principal_cache
 
 security = HTTPBearer()
 
@@ -24,18 +25,25 @@ async def get_current_user(token_obj: HTTPAuthorizationCredentials = Depends(sec
         if user_id is None or token_role is None:
             raise credentials_exception
         
+        # 2. Principal cache (user row + status fields for the verify_* guards)
+        cached = principal_cache.get(user_id, token_role)
+        if cached:
+            return cached
+
         async with get_db_connection() as conn:
             async with conn.cursor() as cur:
                 user = None
 
                 # --- CASE A: TENANT ADMIN / STAFF ---
                 if token_role in ["TENANT_ADMIN", "TENANT_STAFF"]:
-                    # We query the 'tenant_user' table
+                    # We query the 'tenant_user' table (+ Tenant KYC for the guards)
                     await cur.execute(
                         """
-                        SELECT tenant_user_id as user_id, email, tenant_id 
-                        FROM tenantuser 
-                        WHERE tenant_user_id = %s
+                        SELECT tu.tenant_user_id as user_id, tu.email, tu.tenant_id,
+                               tu.status as staff_status, t.kyc_status as tenant_kyc
+                        FROM tenantuser tu
+                        LEFT JOIN tenant t ON tu.tenant_id = t.tenant_id
+                        WHERE tu.tenant_user_id = %s
                         """, 
                         (user_id,)
                     )
@@ -50,7 +58,7 @@ async def get_current_user(token_obj: HTTPAuthorizationCredentials = Depends(sec
                     # We query the 'player' table
                     await cur.execute(
                         """
-                        SELECT player_id as user_id, email, tenant_id 
+                        SELECT player_id as user_id, email, tenant_id, kyc_status, status
                         FROM player 
                         WHERE player_id = %s
                         """, 
@@ -66,7 +74,7 @@ async def get_current_user(token_obj: HTTPAuthorizationCredentials = Depends(sec
                     # We query the 'platform_user' table
                     await cur.execute(
                         """
-                        SELECT platform_user_id as user_id, email 
+                        SELECT platform_user_id as user_id, email, status
                         FROM platformuser 
                         WHERE platform_user_id = %s
                         """, 
@@ -82,6 +90,7 @@ async def get_current_user(token_obj: HTTPAuthorizationCredentials = Depends(sec
                 if not user:
                     raise credentials_exception
                 
+                principal_cache.put(user_id, token_role, user)
                 return user
 
     except JWTError:
@@ -117,49 +126,26 @@ async def verify_tenant_is_approved(current_user: dict = Depends(require_tenant_
     if current_user["role"] == "SUPER_ADMIN":
         return current_user
 
-    user_id = current_user["user_id"]
+    # tenant_kyc comes from the principal (TenantUser JOIN Tenant)
+    if not current_user.get("tenant_id"):
+        raise HTTPException(status_code=401, detail="Tenant profile not found.")
     
-    async with get_db_connection() as conn:
-        async with conn.cursor() as cur:
-            # Join TenantUser -> Tenant to check the MAIN Tenant status
-            await cur.execute("""
-                SELECT t.kyc_status 
-                FROM TenantUser tu
-                JOIN Tenant t ON tu.tenant_id = t.tenant_id
-                WHERE tu.tenant_user_id = %s
-            """, (user_id,))
-            result = await cur.fetchone()
-            
-            if not result:
-                raise HTTPException(status_code=401, detail="Tenant profile not found.")
-            
-            if result['kyc_status'] != 'APPROVED':
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN, 
-                    detail="Action blocked: Tenant KYC is not APPROVED. Please submit documents."
-                )
+    if current_user.get("tenant_kyc") != 'APPROVED':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail="Action blocked: Tenant KYC is not APPROVED. Please submit documents."
+        )
     return current_user
 
 async def verify_player_is_approved(current_user: dict = Depends(require_player)):
     """
     Blocks action if the Player's KYC is not 'APPROVED'.
     """
-    user_id = current_user["user_id"]
-    
-    async with get_db_connection() as conn:
-        async with conn.cursor() as cur:
-            # Check the Player table status
-            await cur.execute("SELECT kyc_status FROM Player WHERE player_id = %s", (user_id,))
-            result = await cur.fetchone()
-            
-            if not result:
-                 raise HTTPException(status_code=401, detail="Player profile not found.")
-
-            if result['kyc_status'] != 'APPROVED':
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN, 
-                    detail="Action blocked: Your KYC is pending or rejected. You cannot play yet."
-                )
+    if current_user.get("kyc_status") != 'APPROVED':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail="Action blocked: Your KYC is pending or rejected. You cannot play yet."
+        )
     return current_user
 
 
@@ -180,25 +166,13 @@ async def verify_staff_is_active(current_user: dict = Depends(require_staff_or_a
     1. Checks if the Staff Member is ACTIVE (not suspended).
     2. Checks if their Tenant is APPROVED (The Gatekeeper).
     """
-    user_id = current_user["user_id"]
+    if not current_user.get("tenant_id"):
+        raise HTTPException(status_code=401, detail="User profile not found.")
     
-    async with get_db_connection() as conn:
-        async with conn.cursor() as cur:
-            await cur.execute("""
-                SELECT tu.status as staff_status, t.kyc_status as tenant_kyc
-                FROM TenantUser tu
-                JOIN Tenant t ON tu.tenant_id = t.tenant_id
-                WHERE tu.tenant_user_id = %s
-            """, (user_id,))
-            data = await cur.fetchone()
-            
-            if not data:
-                raise HTTPException(status_code=401, detail="User profile not found.")
-            
-            if data['staff_status'] != 'ACTIVE':
-                 raise HTTPException(status_code=403, detail="Your staff account is suspended.")
+    if current_user.get('staff_status') != 'ACTIVE':
+         raise HTTPException(status_code=403, detail="Your staff account is suspended.")
+         
+    if current_user.get('tenant_kyc') != 'APPROVED':
+         raise HTTPException(status_code=403, detail="Casino operation suspended (KYC Pending).")
                  
-            if data['tenant_kyc'] != 'APPROVED':
-                 raise HTTPException(status_code=403, detail="Casino operation suspended (KYC Pending).")
-                 
-    return current_user
\ No newline at end of file
+    return current_user
@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+from datetime import timedelta
+from app.core.config import settings
+from app.core.database import pool, get_db_connection, without_statement_timeout
+
+# Only one worker refreshes at a time; the others skip that round
+REFRESH_LOCK_ID = 814_000_002
+
+# Rollup rows of the hour before the last refresh may still have been growing
+REFRESH_SLACK = timedelta(hours=1)
+
+_refresh_task = None
+
+
+async def refresh_earnings_cube(full: bool = False) -> int:
+    """
+    Recomputes PlatformEarningsDaily from GgrHourlyRollup.
+    Incremental by default: only days from the last refresh (minus REFRESH_SLACK) onwards are rebuilt,
+    which in steady state is just today.
+    Returns the number of cube rows written, or -1 if another worker is already refreshing.
+    """
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            try:
+                await cur.execute("SELECT pg_try_advisory_xact_lock(%s) AS locked", (REFRESH_LOCK_ID,))
+                if not (await cur.fetchone())['locked']:
+                    await conn.rollback()
+                    return -1
+
+                await cur.execute(
+                    "SELECT NOW()::timestamp AS now, (SELECT refreshed_at FROM PlatformEarningsRefresh) AS refreshed_at"
+                )
+                state = await cur.fetchone()
+                from_date = None
+                if not full and state['refreshed_at'] is not None:
+                    from_date = (state['refreshed_at'] - REFRESH_SLACK).date()
+
+                if from_date:
+                    await cur.execute("DELETE FROM PlatformEarningsDaily WHERE earnings_date >= %s", (from_date,))
+                else:
+                    # A full rebuild reads the whole rollup
+                    await without_statement_timeout(cur)
+                    await cur.execute("DELETE FROM PlatformEarningsDaily")
+
+                await cur.execute(
+                    """
+                    INSERT INTO PlatformEarningsDaily (earnings_date, tenant_id, tenant_game_id, fee_sum, bet_count)
+                    SELECT bucket_hour::date, tenant_id, tenant_game_id, SUM(platform_fee), SUM(bet_count)
+                    FROM GgrHourlyRollup
+                    WHERE %s::date IS NULL OR bucket_hour >= %s::date
+                    GROUP BY bucket_hour::date, tenant_id, tenant_game_id
+                    """,
+                    (from_date, from_date)
+                )
+                written = cur.rowcount
+
+                await cur.execute(
+                    """
+                    INSERT INTO PlatformEarningsRefresh (id, refreshed_at) VALUES (TRUE, %s)
+                    ON CONFLICT (id) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+                    """,
+                    (state['now'],)
+                )
+                await conn.commit()
+                return written
+            except Exception:
+                await conn.rollback()
+                raise
+
+
+async def _refresh_forever():
+    while True:
+        try:
+            await refresh_earnings_cube()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Earnings cube refresh failed: {e}")
+        await asyncio.sleep(settings.EARNINGS_CUBE_REFRESH_SECONDS)
+
+
+def start_refresher():
+    global _refresh_task
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_forever())
+
+
+async def stop_refresher():
+    global _refresh_task
+    if _refresh_task:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+
+
+async def _main(full: bool):
+    await pool.open()
+    try:
+        written = await refresh_earnings_cube(full)
+        if written < 0:
+            print("Another worker is refreshing the earnings cube, try again shortly")
+        else:
+            print(f"Wrote {written} earnings cube rows" + (" (full rebuild)" if full else ""))
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    # Usage (from backend/): python -m app.core.earnings_cube [--full]
+    # Run python -m app.core.ggr_rollup first if the rollup itself needs repairing
+    parser = argparse.ArgumentParser(description="Refresh PlatformEarningsDaily from GgrHourlyRollup")
+    parser.add_argument("--full", action="store_true", help="Rebuild every day instead of only recent ones")
+    args = parser.parse_args()
+    asyncio.run(_main(args.full))
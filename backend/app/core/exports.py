@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.database import get_read_connection
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _encode_csv(rows, columns, with_header: bool) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if with_header:
+        writer.writerow(columns)
+    writer.writerows([row[c] for c in columns] for row in rows)
+    return buf.getvalue().encode()
+
+
+def _encode_ndjson(rows) -> bytes:
+    # UUIDs, Decimals and timestamps become strings, as in the JSON endpoints
+    return "".join(json.dumps(row, default=str) + "\n" for row in rows).encode()
+
+
+async def stream_rows(sql: str, params, fmt: str):
+    """
+    Runs `sql` on a server-side cursor and yields it encoded, one chunk per EXPORT_BATCH_ROWS rows.
+    Only one batch is in memory at a time, and the next one is fetched only after the
+    previous chunk was sent, so a slow client slows the cursor down instead of filling memory.
+    Served by the read replica when there is one.
+    """
+    async with get_read_connection() as conn:
+        try:
+            async with conn.cursor(name="export") as cur:
+                await cur.execute(sql, params)
+                columns = [c.name for c in cur.description]
+                first = True
+                while True:
+                    rows = await cur.fetchmany(settings.EXPORT_BATCH_ROWS)
+                    if fmt == "csv":
+                        # The header goes out even when there are no rows
+                        if rows or first:
+                            yield _encode_csv(rows, columns, with_header=first)
+                    elif rows:
+                        yield _encode_ndjson(rows)
+                    first = False
+                    if len(rows) < settings.EXPORT_BATCH_ROWS:
+                        break
+        except Exception as e:
+            # Headers are already sent, all we can do is cut the stream short
+            print(f"Export failed mid-stream: {e}")
+            raise
+        finally:
+            # Read-only: nothing to commit, and the named cursor goes with the transaction
+            await conn.rollback()
+
+
+def export_response(sql: str, params, fmt: str, name: str) -> StreamingResponse:
+    fmt = (fmt or "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(400, f"Invalid format, expected one of: {', '.join(EXPORT_FORMATS)}")
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return StreamingResponse(
+        stream_rows(sql, params, fmt),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
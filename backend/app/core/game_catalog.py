@@ -0,0 +1,86 @@
+import time
+from app.core.config import settings
+from app.core import cache_bus
+
+TOPIC = "game_catalog"
+
+
+class GameCatalogCache:
+    """
+    Per-worker cache of each tenant's installed games (TenantGame + PlatformGame).
+    Whole tenants are loaded at once and kept for GAME_CATALOG_TTL_SECONDS,
+    or until an admin change invalidates them through the cache bus.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        # tenant_id -> (loaded_at, games list, {tenant_game_id / platform_game_id: game})
+        self._tenants = {}
+
+    async def _load(self, cur, tenant_id: str):
+        await cur.execute(
+            """
+            SELECT
+                tg.tenant_game_id,
+                tg.platform_game_id,
+                tg.tenant_id,
+                COALESCE(pg.title, 'Unknown Game') as title,
+                pg.game_type,
+                pg.provider,
+                pg.default_thumbnail_url,
+                pg.video_url,
+                tg.min_bet,
+                tg.max_bet,
+                tg.is_active,
+                COALESCE(pg.is_active, FALSE) as platform_is_active,
+                (pg.platform_game_id IS NOT NULL) as has_platform_game
+            FROM TenantGame tg
+            LEFT JOIN PlatformGame pg ON tg.platform_game_id = pg.platform_game_id
+            WHERE tg.tenant_id = %s
+            """,
+            (tenant_id,)
+        )
+        games = [dict(row) for row in await cur.fetchall()]
+
+        by_id = {}
+        for game in games:
+            # play_game accepts either id, the tenant_game_id wins on a clash
+            if game['platform_game_id'] is not None:
+                by_id.setdefault(str(game['platform_game_id']), game)
+        for game in games:
+            by_id[str(game['tenant_game_id'])] = game
+
+        entry = (time.monotonic(), games, by_id)
+        self._tenants[tenant_id] = entry
+        return entry
+
+    async def _entry(self, cur, tenant_id):
+        tenant_id = str(tenant_id)
+        entry = self._tenants.get(tenant_id)
+        if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+            entry = await self._load(cur, tenant_id)
+        return entry
+
+    async def get_game(self, cur, tenant_id, game_id: str):
+        """Game by tenant_game_id or platform_game_id, or None. `cur` is only used on a miss."""
+        _, _, by_id = await self._entry(cur, tenant_id)
+        return by_id.get(str(game_id))
+
+    async def get_tenant_games(self, cur, tenant_id):
+        _, games, _ = await self._entry(cur, tenant_id)
+        return games
+
+    def invalidate(self, key: str = "*"):
+        if key == "*":
+            self._tenants.clear()
+        else:
+            self._tenants.pop(str(key), None)
+
+
+game_catalog = GameCatalogCache(settings.GAME_CATALOG_TTL_SECONDS)
+cache_bus.register(TOPIC, game_catalog.invalidate)
+
+
+async def invalidate_game_catalog(cur, tenant_id=None):
+    """Call from endpoints that change TenantGame/PlatformGame, before commit."""
+    await cache_bus.publish(cur, TOPIC, tenant_id or "*")
@@ -0,0 +1,215 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from app.core.config import settings
+from app.core.database import get_db_connection
+
+# Per-worker registry of each player's open GameSession per game, so a spin doesn't have to
+# look its session up. The registry is only a hint: the round counter on GameSession
+# (last_round_number) is the durable state, and a session that was ended elsewhere (another
+# worker, /session/end, the reaper) simply misses on its next bump and is looked up again.
+# Sessions older than GAME_SESSION_MAX_HOURS, or idle for GAME_SESSION_IDLE_MINUTES, are closed
+# by the reaper below, not on the spin path.
+
+# Least recently played entries are dropped beyond this many
+REGISTRY_MAX_SIZE = 50000
+
+# (player_id, tenant_game_id) -> session_id
+_sessions = OrderedDict()
+_reaper_task = None
+
+# Read through get_metrics(), also printed on shutdown
+metrics = {
+    "runs": 0,
+    "sessions_closed": 0,
+    "batches": 0,
+    "errors": 0,
+    "last_run_closed": 0,
+    "last_run_at": None,
+}
+
+
+def _key(player_id, game_id):
+    return (str(player_id), str(game_id))
+
+
+def cached_session(player_id, game_id):
+    session_id = _sessions.get(_key(player_id, game_id))
+    if session_id is not None:
+        _sessions.move_to_end(_key(player_id, game_id))
+    return session_id
+
+
+def remember(player_id, game_id, session_id):
+    _sessions[_key(player_id, game_id)] = session_id
+    _sessions.move_to_end(_key(player_id, game_id))
+    while len(_sessions) > REGISTRY_MAX_SIZE:
+        _sessions.popitem(last=False)
+
+
+def forget(player_id, game_id=None):
+    """Drops one game's session, or all of the player's when game_id is None."""
+    if game_id is not None:
+        _sessions.pop(_key(player_id, game_id), None)
+        return
+    player = str(player_id)
+    for key in [k for k in _sessions if k[0] == player]:
+        del _sessions[key]
+
+
+def _forget_sessions(session_ids):
+    closed = {str(s) for s in session_ids}
+    for key in [k for k, v in _sessions.items() if str(v) in closed]:
+        del _sessions[key]
+
+
+async def _bump(cur, session_id, player_id, game_id, rounds: int):
+    """Reserves `rounds` round numbers on an open session and writes the rounds. [] if it was ended."""
+    await cur.execute(
+        """
+        WITH bumped AS (
+            UPDATE GameSession
+            SET last_round_number = last_round_number + %s, last_activity_at = NOW()
+            WHERE session_id = %s AND player_id = %s AND game_id = %s AND ended_at IS NULL
+            RETURNING session_id, last_round_number
+        )
+        INSERT INTO GameRound (session_id, round_number, started_at, ended_at)
+        SELECT session_id, last_round_number - %s + g.i, NOW(), NOW()
+        FROM bumped, generate_series(1, %s) AS g(i)
+        RETURNING round_id, round_number
+        """,
+        (rounds, session_id, player_id, game_id, rounds, rounds)
+    )
+    return await cur.fetchall()
+
+
+async def open_session_id(cur, player_id, game_id):
+    """The player's open session for this game in the database, or None."""
+    await cur.execute(
+        """
+        SELECT session_id FROM GameSession
+        WHERE player_id = %s AND game_id = %s AND ended_at IS NULL
+        ORDER BY started_at DESC LIMIT 1
+        """,
+        (player_id, game_id)
+    )
+    row = await cur.fetchone()
+    return row['session_id'] if row else None
+
+
+async def start_rounds(cur, player_id, game_id, client_ip, rounds: int = 1):
+    """
+    Writes `rounds` finished GameRound rows on the player's open session (opening one if needed),
+    in the caller's transaction. Returns (session_id, [round_id, ...] in round order).
+    """
+    session_id = cached_session(player_id, game_id)
+    rows = await _bump(cur, session_id, player_id, game_id, rounds) if session_id else []
+
+    if not rows:
+        session_id = await open_session_id(cur, player_id, game_id)
+        if session_id:
+            rows = await _bump(cur, session_id, player_id, game_id, rounds)
+
+    if not rows:
+        await cur.execute(
+            """
+            WITH opened AS (
+                INSERT INTO GameSession (player_id, game_id, ip_address, started_at, last_round_number, last_activity_at)
+                VALUES (%s, %s, %s, NOW(), %s, NOW())
+                RETURNING session_id
+            )
+            INSERT INTO GameRound (session_id, round_number, started_at, ended_at)
+            SELECT session_id, g.i, NOW(), NOW()
+            FROM opened, generate_series(1, %s) AS g(i)
+            RETURNING session_id, round_id, round_number
+            """,
+            (player_id, game_id, client_ip, rounds, rounds)
+        )
+        rows = await cur.fetchall()
+        session_id = rows[0]['session_id']
+
+    remember(player_id, game_id, session_id)
+    return session_id, [r['round_id'] for r in sorted(rows, key=lambda r: r['round_number'])]
+
+
+async def close_expired_sessions() -> int:
+    """
+    Ends sessions started more than GAME_SESSION_MAX_HOURS ago or idle for GAME_SESSION_IDLE_MINUTES,
+    GAME_SESSION_REAP_BATCH_SIZE per transaction. Sessions locked by a spin in progress are skipped
+    (that spin just made them active). Returns how many were closed.
+    """
+    closed_total = 0
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            while True:
+                await cur.execute(
+                    """
+                    WITH expired AS (
+                        SELECT session_id FROM GameSession
+                        WHERE ended_at IS NULL
+                          AND (started_at < NOW() - make_interval(hours => %s)
+                               OR last_activity_at < NOW() - make_interval(mins => %s))
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    UPDATE GameSession gs
+                    SET ended_at = NOW()
+                    FROM expired
+                    WHERE gs.session_id = expired.session_id
+                    RETURNING gs.session_id
+                    """,
+                    (
+                        settings.GAME_SESSION_MAX_HOURS,
+                        settings.GAME_SESSION_IDLE_MINUTES,
+                        settings.GAME_SESSION_REAP_BATCH_SIZE
+                    )
+                )
+                closed = [r['session_id'] for r in await cur.fetchall()]
+                await conn.commit()
+                metrics["batches"] += 1
+                _forget_sessions(closed)
+                closed_total += len(closed)
+                if len(closed) < settings.GAME_SESSION_REAP_BATCH_SIZE:
+                    break
+
+    metrics["runs"] += 1
+    metrics["sessions_closed"] += closed_total
+    metrics["last_run_closed"] = closed_total
+    metrics["last_run_at"] = datetime.utcnow().isoformat()
+    return closed_total
+
+
+def get_metrics() -> dict:
+    return {**metrics, "registry_size": len(_sessions)}
+
+
+async def _reap_forever():
+    while True:
+        try:
+            closed = await close_expired_sessions()
+            if closed:
+                print(f"Game session reaper: closed {closed} expired sessions")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            metrics["errors"] += 1
+            print(f"Game session reaper failed: {e}")
+        await asyncio.sleep(settings.GAME_SESSION_REAP_SECONDS)
+
+
+def start_reaper():
+    global _reaper_task
+    if _reaper_task is None:
+        _reaper_task = asyncio.create_task(_reap_forever())
+
+
+async def stop_reaper():
+    global _reaper_task
+    if _reaper_task:
+        _reaper_task.cancel()
+        try:
+            await _reaper_task
+        except asyncio.CancelledError:
+            pass
+        _reaper_task = None
+        print(f"Game session reaper stopped: {metrics['sessions_closed']} sessions closed in {metrics['runs']} runs")
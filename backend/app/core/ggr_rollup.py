@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+from datetime import datetime
+from app.core.database import pool, get_db_connection, without_statement_timeout
+
+# Bets without a tenant_game_id are rolled up under this id (it can't be NULL in the key)
+UNKNOWN_GAME_ID = "00000000-0000-0000-0000-000000000000"
+
+
+async def record_ggr(
+    cur, tenant_id, player_id, tenant_game_id, bet_amount: float, payout: float, platform_fee: float,
+    bet_count: int = 1, max_bet_amount: float = None
+):
+    """
+    Adds settled bets to the current hour's GgrHourlyRollup row. Amounts are totals over
+    `bet_count` bets (1 for a single spin); max_bet_amount defaults to bet_amount.
+    Must run in the same transaction as the Bet insert (settle_game_round() does the same in SQL).
+    """
+    await cur.execute(
+        """
+        INSERT INTO GgrHourlyRollup AS r (
+            tenant_id, player_id, tenant_game_id, bucket_hour,
+            total_wagered, total_paid_out, bet_count, platform_fee, max_bet_amount, last_bet_at
+        )
+        VALUES (%s, %s, %s, date_trunc('hour', NOW()), %s, %s, %s, %s, %s, NOW())
+        ON CONFLICT (tenant_id, bucket_hour, player_id, tenant_game_id) DO UPDATE
+        SET total_wagered = r.total_wagered + EXCLUDED.total_wagered,
+            total_paid_out = r.total_paid_out + EXCLUDED.total_paid_out,
+            bet_count = r.bet_count + EXCLUDED.bet_count,
+            platform_fee = r.platform_fee + EXCLUDED.platform_fee,
+            max_bet_amount = GREATEST(r.max_bet_amount, EXCLUDED.max_bet_amount),
+            last_bet_at = GREATEST(r.last_bet_at, EXCLUDED.last_bet_at)
+        """,
+        (
+            tenant_id, player_id, tenant_game_id or UNKNOWN_GAME_ID, bet_amount, payout, bet_count, platform_fee,
+            bet_amount if max_bet_amount is None else max_bet_amount
+        )
+    )
+
+
+async def rebuild_ggr_rollup(since: datetime = None) -> int:
+    """
+    Recomputes GgrHourlyRollup from Bet/BetOutcome history (catch-up / repair job).
+    With `since`, only hours from that point onwards are replaced.
+    Returns the number of rollup rows written.
+    """
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            try:
+                await without_statement_timeout(cur)
+                if since:
+                    await cur.execute("DELETE FROM GgrHourlyRollup WHERE bucket_hour >= date_trunc('hour', %s::timestamp)", (since,))
+                else:
+                    await cur.execute("DELETE FROM GgrHourlyRollup")
+
+                await cur.execute(
+                    """
+                    INSERT INTO GgrHourlyRollup (
+                        tenant_id, player_id, tenant_game_id, bucket_hour,
+                        total_wagered, total_paid_out, bet_count, platform_fee, max_bet_amount, last_bet_at
+                    )
+                    SELECT
+                        b.tenant_id,
+                        b.player_id,
+                        COALESCE(b.tenant_game_id, %s::uuid),
+                        date_trunc('hour', b.created_at),
+                        COALESCE(SUM(b.bet_amount), 0),
+                        COALESCE(SUM(bo.payout_amount), 0),
+                        COUNT(*),
+                        COALESCE(SUM(b.platform_fee_amount), 0),
+                        COALESCE(MAX(b.bet_amount), 0),
+                        MAX(b.created_at)
+                    FROM Bet b
+                    LEFT JOIN BetOutcome bo ON b.bet_id = bo.bet_id
+                    WHERE %s::timestamp IS NULL OR b.created_at >= date_trunc('hour', %s::timestamp)
+                    GROUP BY b.tenant_id, b.player_id, COALESCE(b.tenant_game_id, %s::uuid), date_trunc('hour', b.created_at)
+                    """,
+                    (UNKNOWN_GAME_ID, since, since, UNKNOWN_GAME_ID)
+                )
+                written = cur.rowcount
+                await conn.commit()
+                return written
+            except Exception:
+                await conn.rollback()
+                raise
+
+
+async def _main(since: datetime = None):
+    await pool.open()
+    try:
+        written = await rebuild_ggr_rollup(since)
+        print(f"Rebuilt {written} hourly GGR rollup rows" + (f" since {since}" if since else ""))
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    # Usage (from backend/): python -m app.core.ggr_rollup [--since "YYYY-MM-DD HH:MM"]
+    parser = argparse.ArgumentParser(description="Rebuild GgrHourlyRollup from Bet history")
+    parser.add_argument("--since", help="Only rebuild hours from this point on (YYYY-MM-DD or 'YYYY-MM-DD HH:MM')")
+    args = parser.parse_args()
+    since_ts = None
+    if args.since:
+        since_ts = datetime.strptime(args.since, "%Y-%m-%d %H:%M" if " " in args.since else "%Y-%m-%d")
+    asyncio.run(_main(since_ts))
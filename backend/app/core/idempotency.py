@@ -0,0 +1,132 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import Header, HTTPException
+from psycopg import errors
+from app.core.config import settings
+from app.core.database import get_db_connection
+
+HEADER = "Idempotency-Key"
+
+# Expired keys are deleted this many at a time so cleanup never holds long locks
+CLEANUP_BATCH_SIZE = 5000
+
+_cleanup_task = None
+
+
+class IdempotencyClaim:
+    """
+    A request's Idempotency-Key, recorded in the same statement as its money movement
+    (see wallet_ledger and settle_round). `response` is what the endpoint will return;
+    the balance is filled in by the statement itself as `balance_field`.
+    """
+
+    def __init__(self, owner_id, scope: str, key: str):
+        self.owner_id = owner_id
+        self.scope = scope
+        self.key = key
+        self.response = {}
+        self.balance_field = "new_balance"
+
+    def response_json(self) -> str:
+        # UUIDs / Decimals in the response are stored the way FastAPI would render them
+        return json.dumps(self.response, default=str)
+
+
+def key_header(idempotency_key: Optional[str] = Header(None, alias=HEADER, max_length=255)) -> Optional[str]:
+    """FastAPI dependency: the optional Idempotency-Key request header."""
+    return idempotency_key or None
+
+
+def claim(owner_id, scope: str, key: Optional[str]) -> Optional[IdempotencyClaim]:
+    """None when the client sent no key, so callers can pass the result straight through."""
+    if not key:
+        return None
+    return IdempotencyClaim(owner_id, scope, key)
+
+
+def is_duplicate(e: Exception) -> bool:
+    return isinstance(e, errors.UniqueViolation) and e.diag.constraint_name == "idempotencykey_pkey"
+
+
+async def find_response(conn, claim: IdempotencyClaim) -> Optional[dict]:
+    async with conn.cursor() as cur:
+        await cur.execute(
+            """
+            SELECT response FROM IdempotencyKey
+            WHERE owner_id = %s AND scope = %s AND idempotency_key = %s
+            """,
+            (claim.owner_id, claim.scope, claim.key)
+        )
+        row = await cur.fetchone()
+        return row['response'] if row else None
+
+
+async def replay_or_raise(conn, claim: Optional[IdempotencyClaim], exc: Exception) -> dict:
+    """
+    Failure path of a request that may be a retry: rolls back, then returns the stored response
+    if an earlier request with the same key went through, else raises `exc`.
+    Covers both the duplicate-key error from the claim and 4xx checks a retry can trip over
+    (the OTP is already used, the balance is already spent...). The happy path never reads the table.
+    """
+    await conn.rollback()
+    replayable = is_duplicate(exc) or (isinstance(exc, HTTPException) and exc.status_code < 500)
+    if claim is not None and replayable:
+        stored = await find_response(conn, claim)
+        if stored is not None:
+            return stored
+        if is_duplicate(exc):
+            # The first request has the key but hasn't committed (or rolled back) yet
+            raise HTTPException(409, "A request with this Idempotency-Key is still being processed.")
+    raise exc
+
+
+async def delete_expired_keys() -> int:
+    deleted = 0
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            while True:
+                await cur.execute(
+                    """
+                    DELETE FROM IdempotencyKey
+                    WHERE (owner_id, scope, idempotency_key) IN (
+                        SELECT owner_id, scope, idempotency_key FROM IdempotencyKey
+                        WHERE created_at < NOW() - make_interval(hours => %s)
+                        LIMIT %s
+                    )
+                    """,
+                    (settings.IDEMPOTENCY_KEY_TTL_HOURS, CLEANUP_BATCH_SIZE)
+                )
+                batch = cur.rowcount
+                await conn.commit()
+                deleted += batch
+                if batch < CLEANUP_BATCH_SIZE:
+                    return deleted
+
+
+async def _cleanup_forever():
+    while True:
+        try:
+            await delete_expired_keys()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Idempotency key cleanup failed: {e}")
+        await asyncio.sleep(settings.IDEMPOTENCY_CLEANUP_SECONDS)
+
+
+def start_cleaner():
+    global _cleanup_task
+    if _cleanup_task is None:
+        _cleanup_task = asyncio.create_task(_cleanup_forever())
+
+
+async def stop_cleaner():
+    global _cleanup_task
+    if _cleanup_task:
+        _cleanup_task.cancel()
+        try:
+            await _cleanup_task
+        except asyncio.CancelledError:
+            pass
+        _cleanup_task = None
@@ -0,0 +1,55 @@
+import base64
+from datetime import datetime
+from uuid import UUID
+
+# Keyset pagination over WalletTransaction, newest first, ordered by (created_at, wallet_txn_id).
+# The cursor is opaque to clients: base64 of the last row's key, passed back as ?cursor=.
+
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Returns (created_at, wallet_txn_id) of the last row already seen, or raises ValueError."""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def filters_sql(alias: str, cursor: str = None, transaction_type: str = None, since: datetime = None, until: datetime = None):
+    """
+    Extra WHERE conditions (each starting with AND) and their params for one page:
+    rows after the cursor, optionally one transaction_type and a created_at range [since, until).
+    """
+    sql = []
+    params = []
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # Row comparison keeps the scan on the (…, created_at, wallet_txn_id) index
+        sql.append(f"AND ({alias}.created_at, {alias}.wallet_txn_id) < (%s, %s)")
+        params += [created_at, row_id]
+    if transaction_type:
+        sql.append(f"AND {alias}.transaction_type = %s")
+        params.append(transaction_type.upper())
+    if since:
+        sql.append(f"AND {alias}.created_at >= %s")
+        params.append(since)
+    if until:
+        sql.append(f"AND {alias}.created_at < %s")
+        params.append(until)
+    return " ".join(sql), params
+
+
+def split_page(rows: list, limit: int, id_key: str = "transaction_id"):
+    """
+    Queries fetch limit + 1 rows; the extra row only says another page exists.
+    Returns (rows for this page, cursor for the next page or None).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last['created_at'], last[id_key])
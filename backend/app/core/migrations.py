@@ -0,0 +1,61 @@
+import os
+from app.core.config import settings
+from app.core.database import get_db_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "migrations")
+
+# Any constant works, it only has to be the same for every worker
+MIGRATION_LOCK_ID = 814_000_001
+
+
+async def apply_migrations():
+    """
+    Runs every migrations/*.sql file that has not been applied yet, in filename order.
+    Called once on startup; the advisory lock keeps several workers from racing.
+    """
+    if not os.path.isdir(MIGRATIONS_DIR):
+        return
+
+    files = sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith(".sql"))
+
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            # Index builds and backfills can be slow, and so can waiting for another worker's lock
+            await cur.execute("SELECT set_config('statement_timeout', '0', false)")
+            await cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+            try:
+                await cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS SchemaMigration (
+                        filename VARCHAR(255) PRIMARY KEY,
+                        applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+                    )
+                    """
+                )
+                await cur.execute("SELECT filename FROM SchemaMigration")
+                applied = {row['filename'] for row in await cur.fetchall()}
+                await conn.commit()
+
+                for filename in files:
+                    if filename in applied:
+                        continue
+                    with open(os.path.join(MIGRATIONS_DIR, filename), "r") as f:
+                        sql = f.read()
+                    try:
+                        # No params, so the whole file is sent as one multi-statement query
+                        await cur.execute(sql)
+                        await cur.execute("INSERT INTO SchemaMigration (filename) VALUES (%s)", (filename,))
+                        await conn.commit()
+                        print(f"Applied migration {filename}")
+                    except Exception as e:
+                        await conn.rollback()
+                        print(f"MIGRATION ERROR ({filename}): {e}")
+                        raise
+            finally:
+                await cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+                # Back to the pool's setting before the connection is reused
+                await cur.execute(
+                    "SELECT set_config('statement_timeout', %s, false)",
+                    (str(settings.DB_STATEMENT_TIMEOUT_MS),)
+                )
+                await conn.commit()
@@ -0,0 +1,216 @@
+import itertools
+import json
+import os
+from app.core.rng import secure_rng
+
+# backend/paytables/paytables.json unless settings.PAYTABLES_FILE points elsewhere
+DEFAULT_PAYTABLES_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "paytables", "paytables.json"
+)
+
+
+def build_alias_table(weights):
+    """
+    Vose's alias method: turns n weights into (prob, alias) lists so that a weighted draw
+    costs one uniform column pick and one comparison, whatever n is.
+    """
+    n = len(weights)
+    total = float(sum(weights))
+    if n == 0 or total <= 0 or any(w < 0 for w in weights):
+        raise ValueError("Weights must be non-negative with a positive sum")
+
+    scaled = [w * n / total for w in weights]
+    prob = [0.0] * n
+    alias = [0] * n
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] + scaled[s] - 1.0
+        (small if scaled[l] < 1.0 else large).append(l)
+
+    # Whatever is left is 1.0 up to rounding error
+    for i in small + large:
+        prob[i] = 1.0
+        alias[i] = i
+
+    return prob, alias
+
+
+class AliasSampler:
+    def __init__(self, weights):
+        self.n = len(weights)
+        self.prob, self.alias = build_alias_table(weights)
+
+    def sample(self, rng=None) -> int:
+        # Unbiased column, then a coin weighted by prob[column] decides column vs alias
+        rng = rng or secure_rng
+        i = rng.randbelow(self.n)
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class ReelsPaytable:
+    """
+    Slot-style game: `reels` independent weighted reels. All reels equal pays a per-symbol
+    multiplier, two neighbouring reels equal pays pair_multiplier.
+    Every reel combination's multiplier is precomputed, so a spin is `reels` alias draws and one lookup.
+    """
+    kind = "reels"
+
+    def __init__(self, game_type: str, spec: dict):
+        self.game_type = game_type
+        self.result_key = spec.get("result_key", "symbols")
+        self.symbols = list(spec["symbols"])
+        self.weights = [float(w) for w in spec["weights"]]
+        self.reels = int(spec.get("reels", 3))
+        if len(self.symbols) != len(self.weights):
+            raise ValueError(f"{game_type}: symbols and weights differ in length")
+        if self.reels < 2:
+            raise ValueError(f"{game_type}: needs at least 2 reels")
+
+        self.sampler = AliasSampler(self.weights)
+
+        triple = spec.get("triple_multipliers", {})
+        triple_default = float(spec.get("triple_default_multiplier", 0.0))
+        pair = float(spec.get("pair_multiplier", 0.0))
+        # Index of a combination = reel digits in base len(symbols), first reel most significant
+        self.multipliers = []
+        for combo in itertools.product(range(len(self.symbols)), repeat=self.reels):
+            if all(c == combo[0] for c in combo):
+                self.multipliers.append(float(triple.get(self.symbols[combo[0]], triple_default)))
+            elif any(a == b for a, b in zip(combo, combo[1:])):
+                self.multipliers.append(pair)
+            else:
+                self.multipliers.append(0.0)
+
+    @property
+    def probabilities(self):
+        total = sum(self.weights)
+        return [w / total for w in self.weights]
+
+    def play(self, prediction=None, rng=None):
+        n = len(self.symbols)
+        index = 0
+        drawn = []
+        for _ in range(self.reels):
+            symbol = self.sampler.sample(rng)
+            drawn.append(self.symbols[symbol])
+            index = index * n + symbol
+        return self.multipliers[index], {self.result_key: drawn}
+
+
+class PredictPaytable:
+    """
+    Player predicts an outcome (dice face, coin side, wheel segment...). Wins pay `multiplier`.
+    By default a prediction wins on the outcome with the same label; `winning_outcomes`
+    maps named predictions (e.g. LOW / HIGH) to sets of outcomes instead.
+    """
+    kind = "predict"
+
+    def __init__(self, game_type: str, spec: dict):
+        self.game_type = game_type
+        self.result_key = spec.get("result_key", "result")
+        self.outcomes = list(spec["outcomes"])
+        self.weights = [float(w) for w in spec.get("weights", [1] * len(self.outcomes))]
+        self.multiplier = float(spec["multiplier"])
+        if len(self.outcomes) != len(self.weights):
+            raise ValueError(f"{game_type}: outcomes and weights differ in length")
+
+        self.sampler = AliasSampler(self.weights)
+
+        index_by_label = {str(o).upper(): i for i, o in enumerate(self.outcomes)}
+        if "winning_outcomes" in spec:
+            self.winning = {
+                str(name).upper(): frozenset(index_by_label[str(o).upper()] for o in outcomes)
+                for name, outcomes in spec["winning_outcomes"].items()
+            }
+        else:
+            self.winning = {label: frozenset([i]) for label, i in index_by_label.items()}
+
+    @property
+    def probabilities(self):
+        total = sum(self.weights)
+        return [w / total for w in self.weights]
+
+    def winning_indices(self, prediction) -> frozenset:
+        return self.winning.get(str(prediction).upper(), frozenset())
+
+    def play(self, prediction=None, rng=None):
+        outcome = self.sampler.sample(rng)
+        multiplier = self.multiplier if outcome in self.winning_indices(prediction) else 0.0
+        return multiplier, {self.result_key: self.outcomes[outcome]}
+
+
+PAYTABLE_KINDS = {"reels": ReelsPaytable, "predict": PredictPaytable}
+
+
+def compile_paytable(game_type: str, spec: dict):
+    kind = spec.get("kind")
+    if kind not in PAYTABLE_KINDS:
+        raise ValueError(f"{game_type}: unknown paytable kind {kind!r}")
+    return PAYTABLE_KINDS[kind](game_type, spec)
+
+
+class PaytableRegistry:
+    """
+    Compiled paytables keyed by PlatformGame.game_type, plus optional per-tenant variants
+    ("tenants": {tenant_id: {game_type: {fields to override}}}). Loaded once at startup.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.fallback_game_type = None
+        self._games = {}
+        self._tenants = {}
+
+    def load(self, path: str = None):
+        path = path or DEFAULT_PAYTABLES_FILE
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        games = {}
+        specs = {}
+        for game_type, spec in config.get("games", {}).items():
+            game_type = game_type.upper()
+            specs[game_type] = spec
+            games[game_type] = compile_paytable(game_type, spec)
+
+        tenants = {}
+        for tenant_id, overrides in config.get("tenants", {}).items():
+            tenants[str(tenant_id)] = {
+                game_type.upper(): compile_paytable(game_type.upper(), {**specs.get(game_type.upper(), {}), **spec})
+                for game_type, spec in overrides.items()
+            }
+
+        fallback = str(config.get("fallback_game_type", "SLOT")).upper()
+        if fallback not in games:
+            raise ValueError(f"Fallback game type {fallback} has no paytable")
+
+        # Swap in only once everything compiled, a bad file leaves the old tables in place
+        self.path, self.fallback_game_type, self._games, self._tenants = path, fallback, games, tenants
+        print(f"Loaded {len(games)} paytables ({len(tenants)} tenant variants) from {path}")
+
+    def get(self, game_type: str, tenant_id=None):
+        """Tenant variant, else the game type's default, else the fallback game (as play_game always did)."""
+        if not self._games:
+            self.load()
+        game_type = (game_type or "").upper()
+        if tenant_id is not None:
+            variant = self._tenants.get(str(tenant_id), {}).get(game_type)
+            if variant:
+                return variant
+        return self._games.get(game_type) or self._games[self.fallback_game_type]
+
+    def game_types(self):
+        if not self._games:
+            self.load()
+        return list(self._games)
+
+    def tenant_ids(self):
+        return list(self._tenants)
+
+
+paytable_registry = PaytableRegistry()
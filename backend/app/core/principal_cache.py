@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from app.core.config import settings
+from app.core import cache_bus
+
+TOPIC = "principal"
+
+
+class PrincipalCache:
+    """
+    Bounded LRU of authenticated principals keyed by (user_id, role).
+    Each entry holds the user row plus the status fields the verify_* guards need
+    (kyc_status, status, staff_status, tenant_kyc), so the whole auth chain is one lookup.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+
+    def get(self, user_id: str, role: str):
+        key = (str(user_id), role)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        loaded_at, principal = entry
+        if time.monotonic() - loaded_at > self.ttl_seconds:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return dict(principal)
+
+    def put(self, user_id: str, role: str, principal: dict):
+        key = (str(user_id), role)
+        self._entries[key] = (time.monotonic(), dict(principal))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str = "*"):
+        """key: "*", "user:<id>", "email:<email>" or "tenant:<id>"."""
+        if key == "*":
+            self._entries.clear()
+            return
+
+        kind, _, value = key.partition(":")
+        if kind == "user":
+            stale = [k for k in self._entries if k[0] == value]
+        elif kind == "email":
+            stale = [k for k, (_, p) in self._entries.items() if str(p.get("email", "")).lower() == value.lower()]
+        elif kind == "tenant":
+            stale = [k for k, (_, p) in self._entries.items() if str(p.get("tenant_id")) == value]
+        else:
+            stale = list(self._entries)
+
+        for k in stale:
+            self._entries.pop(k, None)
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_MAX_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+cache_bus.register(TOPIC, principal_cache.invalidate)
+
+
+# Call these from endpoints that change a user's status/KYC, before commit
+async def evict_user(cur, user_id):
+    await cache_bus.publish(cur, TOPIC, f"user:{user_id}")
+
+
+async def evict_email(cur, email: str):
+    await cache_bus.publish(cur, TOPIC, f"email:{email}")
+
+
+async def evict_tenant(cur, tenant_id):
+    await cache_bus.publish(cur, TOPIC, f"tenant:{tenant_id}")
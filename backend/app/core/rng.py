@@ -0,0 +1,196 @@
+"""
+Buffered CSPRNG for game outcomes.
+
+Usage (from backend/):
+    python -m app.core.rng --selftest [--samples N]   # chi-square per game + uniformity
+    python -m app.core.rng --bench                    # throughput vs random / per-call urandom
+"""
+import argparse
+import math
+import os
+import queue
+import threading
+import time
+
+# One os.urandom() call per block; 64KB = 8192 draws
+BLOCK_BYTES = 64 * 1024
+# Blocks kept ready by the refill thread (1MB)
+BUFFER_BLOCKS = 16
+
+_INV_TWO_POW_53 = 1.0 / (1 << 53)
+_EMPTY = iter(())
+
+
+class BufferedCSPRNG:
+    """
+    Hands out OS CSPRNG output from pre-filled blocks: a background thread keeps up to
+    `buffer_blocks` blocks of os.urandom() ready, so a draw is the next word of a block in
+    memory, not a syscall. If the buffer ever runs dry the draw refills synchronously instead of waiting.
+    """
+
+    def __init__(self, block_bytes: int = BLOCK_BYTES, buffer_blocks: int = BUFFER_BLOCKS):
+        self.block_bytes = block_bytes - block_bytes % 8
+        self._ready = queue.Queue(maxsize=buffer_blocks)
+        self._lock = threading.Lock()
+        # Iterator over the current block's 64-bit words; next() on it is atomic under the GIL
+        self._words = _EMPTY
+        self._refill_thread = None
+        # Cache of rejection limits per range size used by randbelow
+        self._limits = {}
+        self.metrics = {"blocks_used": 0, "sync_refills": 0}
+
+    def _refill_forever(self):
+        while True:
+            # Blocks while the buffer is full
+            self._ready.put(os.urandom(self.block_bytes))
+
+    def start(self):
+        with self._lock:
+            if self._refill_thread is None:
+                self._refill_thread = threading.Thread(target=self._refill_forever, name="csprng-refill", daemon=True)
+                self._refill_thread.start()
+
+    def _next_block(self):
+        if self._refill_thread is None:
+            self.start()
+        with self._lock:
+            try:
+                block = self._ready.get_nowait()
+            except queue.Empty:
+                block = os.urandom(self.block_bytes)
+                self.metrics["sync_refills"] += 1
+            self.metrics["blocks_used"] += 1
+            self._words = iter(memoryview(block).cast("Q"))
+
+    def getrandbits64(self) -> int:
+        try:
+            return next(self._words)
+        except StopIteration:
+            self._next_block()
+            return next(self._words)
+
+    def random(self) -> float:
+        """Uniform float in [0, 1) with 53 random bits, like random.random()."""
+        try:
+            word = next(self._words)
+        except StopIteration:
+            self._next_block()
+            word = next(self._words)
+        return (word >> 11) * _INV_TWO_POW_53
+
+    def randbelow(self, n: int) -> int:
+        """Unbiased integer in [0, n): rejection sampling, no modulo bias."""
+        limit = self._limits.get(n)
+        if limit is None:
+            if n <= 0:
+                raise ValueError("n must be positive")
+            # Largest multiple of n that fits in 64 bits; values at or above it are redrawn
+            limit = self._limits[n] = (1 << 64) - (1 << 64) % n
+        while True:
+            word = self.getrandbits64()
+            if word < limit:
+                return word % n
+
+    def randint(self, a: int, b: int) -> int:
+        return a + self.randbelow(b - a + 1)
+
+
+secure_rng = BufferedCSPRNG()
+
+
+# --- Self-tests ---
+
+def _chi_square_p_value(statistic: float, dof: int) -> float:
+    """Upper tail of the chi-square distribution (Wilson-Hilferty approximation, fine for dof >= 1)."""
+    if dof <= 0:
+        return 1.0
+    z = ((statistic / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def chi_square(observed, expected_probabilities):
+    total = sum(observed)
+    statistic = 0.0
+    dof = -1
+    for count, p in zip(observed, expected_probabilities):
+        if p <= 0:
+            continue
+        expected = total * p
+        statistic += (count - expected) ** 2 / expected
+        dof += 1
+    return statistic, dof, _chi_square_p_value(statistic, dof)
+
+
+def self_test(samples: int = 200_000, alpha: float = 0.001, rng: BufferedCSPRNG = None) -> bool:
+    """
+    Draws `samples` outcomes per configured game through its alias table and compares the
+    outcome counts with the paytable probabilities. Also checks randbelow for uniformity.
+    Returns True if nothing falls below `alpha`.
+    """
+    from app.core.paytables import paytable_registry
+
+    rng = rng or secure_rng
+    ok = True
+
+    checks = [("randbelow(10)", [0.1] * 10, lambda: rng.randbelow(10))]
+    for game_type in paytable_registry.game_types():
+        table = paytable_registry.get(game_type)
+        checks.append((game_type, table.probabilities, lambda t=table: t.sampler.sample(rng)))
+
+    for name, probabilities, draw in checks:
+        counts = [0] * len(probabilities)
+        for _ in range(samples):
+            counts[draw()] += 1
+        statistic, dof, p_value = chi_square(counts, probabilities)
+        passed = p_value >= alpha
+        ok = ok and passed
+        print(f"{name:<14} chi2={statistic:9.2f}  dof={dof:3d}  p={p_value:.4f}  {'PASS' if passed else 'FAIL'}")
+
+    return ok
+
+
+def benchmark(draws: int = 1_000_000):
+    import random
+
+    def per_call_urandom():
+        return int.from_bytes(os.urandom(8), "little")
+
+    candidates = [
+        ("random.random (Mersenne Twister)", random.random),
+        ("os.urandom(8) per draw", per_call_urandom),
+        ("BufferedCSPRNG.random", secure_rng.random),
+    ]
+    secure_rng.start()
+    time.sleep(0.1)  # let the refill thread fill the buffer first
+
+    for name, draw in candidates:
+        started = time.perf_counter()
+        for _ in range(draws):
+            draw()
+        elapsed = time.perf_counter() - started
+        print(f"{name:<34} {draws / elapsed / 1e6:6.2f}M draws/s")
+
+    from app.core.game_logic_core import GameLogic
+    spins = draws // 10
+    started = time.perf_counter()
+    for _ in range(spins):
+        GameLogic.play("SLOT")
+    elapsed = time.perf_counter() - started
+    print(f"{'SLOT spins on BufferedCSPRNG':<34} {spins / elapsed / 1e3:6.1f}K spins/s")
+    print(f"Refill metrics: {secure_rng.metrics}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSPRNG pool self-test and benchmark")
+    parser.add_argument("--selftest", action="store_true", help="Chi-square tests per configured game")
+    parser.add_argument("--bench", action="store_true", help="Throughput benchmark")
+    parser.add_argument("--samples", type=int, default=200_000, help="Draws per self-test")
+    args = parser.parse_args()
+
+    if args.selftest:
+        if not self_test(args.samples):
+            raise SystemExit(1)
+    if args.bench:
+        benchmark()
+    if not args.selftest and not args.bench:
+        parser.print_help()
@@ -0,0 +1,183 @@
+"""
+Monte Carlo RTP / volatility check for the configured paytables.
+
+Usage (from backend/):
+    python -m app.core.rtp_simulator                      # every game, 10^7 rounds each
+    python -m app.core.rtp_simulator SLOT --rounds 100000000 --workers 8
+    python -m app.core.rtp_simulator SLOT --tenant <tenant_id> --paytables path/to/paytables.json
+
+Rounds are drawn in NumPy batches from the same compiled paytables (alias tables and
+multiplier lookups) the game engine uses, so a paytable change or tenant variant can be
+checked before it ships. numpy is only needed for this tool.
+"""
+import argparse
+import itertools
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from app.core.paytables import ReelsPaytable, paytable_registry
+
+# Rounds per array batch: ~100MB of temporaries for SLOT, small enough for any laptop
+DEFAULT_BATCH_SIZE = 2_000_000
+
+
+def default_prediction(table):
+    """Outcomes are what they are whatever the player picks; a fixed pick keeps runs comparable."""
+    if isinstance(table, ReelsPaytable):
+        return None
+    return next(iter(table.winning))
+
+
+def _alias_draw(rng: np.random.Generator, prob: np.ndarray, alias: np.ndarray, shape) -> np.ndarray:
+    u = rng.random(shape) * len(prob)
+    column = np.minimum(u.astype(np.int64), len(prob) - 1)
+    return np.where(u - column < prob[column], column, alias[column])
+
+
+def draw_multipliers(rng: np.random.Generator, table, n: int, prediction=None) -> np.ndarray:
+    """Multipliers of n independent rounds of one compiled paytable (vectorised table.play)."""
+    prob = np.array(table.sampler.prob)
+    alias = np.array(table.sampler.alias)
+
+    if isinstance(table, ReelsPaytable):
+        reels = _alias_draw(rng, prob, alias, (n, table.reels))
+        # Same base-len(symbols) combination index as ReelsPaytable.play
+        index = np.zeros(n, dtype=np.int64)
+        for reel in range(table.reels):
+            index = index * len(table.symbols) + reels[:, reel]
+        return np.asarray(table.multipliers)[index]
+
+    if prediction is None:
+        prediction = default_prediction(table)
+    pays = np.zeros(len(table.outcomes))
+    pays[list(table.winning_indices(prediction))] = table.multiplier
+    return pays[_alias_draw(rng, prob, alias, n)]
+
+
+def exact_rtp(table, prediction=None) -> float:
+    """Closed-form RTP straight from the paytable, to sanity-check the simulation."""
+    probabilities = table.probabilities
+    if isinstance(table, ReelsPaytable):
+        rtp = 0.0
+        for combo, multiplier in zip(itertools.product(range(len(table.symbols)), repeat=table.reels), table.multipliers):
+            if multiplier:
+                rtp += math.prod(probabilities[c] for c in combo) * multiplier
+        return rtp
+
+    if prediction is None:
+        prediction = default_prediction(table)
+    return table.multiplier * sum(probabilities[i] for i in table.winning_indices(prediction))
+
+
+def _table_for(game_type: str, tenant_id=None, paytables_file: str = None):
+    if paytables_file and paytable_registry.path != paytables_file:
+        paytable_registry.load(paytables_file)
+    return paytable_registry.get(game_type, tenant_id)
+
+
+def _simulate_chunk(args):
+    """Worker body: (sum, sum of squares, hits, max) over `rounds` rounds. Runs in a subprocess."""
+    game_type, tenant_id, paytables_file, rounds, seed, batch_size, prediction = args
+    table = _table_for(game_type, tenant_id, paytables_file)
+    rng = np.random.Generator(np.random.PCG64(seed))
+    total = total_sq = 0.0
+    hits = 0
+    best = 0.0
+    remaining = rounds
+    while remaining > 0:
+        n = min(batch_size, remaining)
+        multipliers = draw_multipliers(rng, table, n, prediction)
+        total += float(multipliers.sum())
+        total_sq += float(np.dot(multipliers, multipliers))
+        hits += int(np.count_nonzero(multipliers))
+        best = max(best, float(multipliers.max()))
+        remaining -= n
+    return total, total_sq, hits, best
+
+
+def simulate(
+    game_type: str,
+    rounds: int,
+    seed: int = None,
+    workers: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    prediction=None,
+    tenant_id=None,
+    paytables_file: str = None
+) -> dict:
+    """
+    Plays `rounds` rounds of a 1-unit stake on the game's paytable (or a tenant's variant).
+    Returns RTP, hit frequency, per-round variance / standard deviation, a 95% confidence
+    interval on RTP and the exact RTP.
+    Each worker gets an independent stream spawned from one SeedSequence, so a seed is reproducible.
+    """
+    workers = max(1, workers)
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    shares = [rounds // workers + (1 if i < rounds % workers else 0) for i in range(workers)]
+    table = _table_for(game_type, tenant_id, paytables_file)
+    # Workers are separate processes: they reload the same file and pick the same table
+    jobs = [
+        (game_type, tenant_id, paytables_file, share, s, batch_size, prediction)
+        for share, s in zip(shares, seeds) if share
+    ]
+
+    started = time.perf_counter()
+    if len(jobs) == 1:
+        parts = [_simulate_chunk(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+            parts = list(executor.map(_simulate_chunk, jobs))
+    elapsed = time.perf_counter() - started
+
+    total = sum(p[0] for p in parts)
+    total_sq = sum(p[1] for p in parts)
+    hits = sum(p[2] for p in parts)
+    rtp = total / rounds
+    variance = max(0.0, total_sq / rounds - rtp * rtp)
+    margin = 1.96 * math.sqrt(variance / rounds)
+
+    return {
+        "game_type": table.game_type + (f" ({tenant_id})" if tenant_id else ""),
+        "rounds": rounds,
+        "rtp": rtp,
+        "exact_rtp": exact_rtp(table, prediction),
+        "ci95_low": rtp - margin,
+        "ci95_high": rtp + margin,
+        "hit_frequency": hits / rounds,
+        "variance": variance,
+        "std_dev": math.sqrt(variance),
+        "max_multiplier": max(p[3] for p in parts),
+        "seconds": elapsed,
+        "rounds_per_second": rounds / elapsed if elapsed else float("inf")
+    }
+
+
+def _print_report(result: dict):
+    print(
+        f"{result['game_type']:<8} rounds={result['rounds']:>12,}  "
+        f"RTP={result['rtp'] * 100:7.3f}%  (exact {result['exact_rtp'] * 100:7.3f}%, "
+        f"95% CI {result['ci95_low'] * 100:.3f}-{result['ci95_high'] * 100:.3f}%)  "
+        f"hit={result['hit_frequency'] * 100:6.2f}%  sd={result['std_dev']:7.3f}  "
+        f"max={result['max_multiplier']:g}x  "
+        f"{result['seconds']:6.2f}s ({result['rounds_per_second'] / 1e6:,.1f}M rounds/s)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo RTP simulator for the configured paytables")
+    parser.add_argument("games", nargs="*", help="Game types (default: every configured game)")
+    parser.add_argument("--tenant", default=None, help="Simulate this tenant's paytable variants")
+    parser.add_argument("--paytables", default=None, help="Paytable JSON file (default: paytables/paytables.json)")
+    parser.add_argument("--rounds", type=int, default=10_000_000, help="Rounds per game (default 10^7)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes to split the rounds across")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rounds per NumPy batch")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible run")
+    args = parser.parse_args()
+
+    paytable_registry.load(args.paytables)
+    for game in args.games or paytable_registry.game_types():
+        _print_report(simulate(
+            game, args.rounds, args.seed, args.workers, args.batch_size,
+            tenant_id=args.tenant, paytables_file=paytable_registry.path
+        ))
@@ -0,0 +1,277 @@
+from decimal import Decimal
+from fastapi import HTTPException
+from psycopg import errors
+from app.core.config import settings
+from app.core import wallet_ledger, game_sessions
+from app.core.daily_counters import record_daily_wager
+from app.core.ggr_rollup import record_ggr
+from app.core.bonus_service import BonusService
+
+
+async def settle_round(
+    cur,
+    player_id,
+    tenant_id,
+    tenant_game_id,
+    active_wallet: dict,
+    bonus_wallet: dict,
+    currency_code: str,
+    bet_amount: float,
+    payout: float,
+    client_ip: str,
+    idempotency=None
+):
+    """
+    Records one finished spin: debit/credit, session, round, Bet, BetOutcome,
+    daily wager counters, hourly GGR rollup, WalletTransaction and BET_THRESHOLD campaign awards.
+    Returns {bet_id, session_id, round_id, balance_after}. Caller commits.
+    With an IdempotencyClaim its key and response (balance_after / session_id filled in) are
+    written in the same round trip; a replayed key raises UniqueViolation (see app.core.idempotency).
+
+    SETTLEMENT_MODE picks the implementation:
+      SINGLE_TRIP     -> one call to the settle_game_round() PL/pgSQL function
+      MULTI_STATEMENT -> the original statement-by-statement path (kept for A/B)
+    """
+    platform_fee = bet_amount * 0.01
+
+    if settings.SETTLEMENT_MODE.upper() == "MULTI_STATEMENT":
+        return await _settle_multi_statement(
+            cur, player_id, tenant_id, tenant_game_id, active_wallet, bonus_wallet,
+            currency_code, bet_amount, payout, platform_fee, client_ip, idempotency
+        )
+
+    return await _settle_single_trip(
+        cur, player_id, tenant_id, tenant_game_id, active_wallet,
+        currency_code, bet_amount, payout, platform_fee, client_ip, idempotency
+    )
+
+
+async def _settle_single_trip(cur, player_id, tenant_id, tenant_game_id, active_wallet, currency_code, bet_amount, payout, platform_fee, client_ip, idempotency=None):
+    claim_sql, claim_params = "", []
+    if idempotency:
+        # Referenced twice, so the function call runs once and both readers see its row
+        claim_sql = """
+            , claimed AS (
+                INSERT INTO IdempotencyKey (owner_id, scope, idempotency_key, response, created_at)
+                SELECT %s::uuid, %s, %s,
+                       %s::jsonb || jsonb_build_object('balance_after', balance_after, 'session_id', session_id::text),
+                       NOW()
+                FROM settled
+            )
+            """
+        claim_params = [idempotency.owner_id, idempotency.scope, idempotency.key, idempotency.response_json()]
+
+    try:
+        await cur.execute(
+            f"""
+            WITH settled AS (
+                SELECT
+                    out_bet_id AS bet_id,
+                    out_session_id AS session_id,
+                    out_round_id AS round_id,
+                    out_balance_after AS balance_after
+                FROM settle_game_round(%s, %s, %s, %s, %s, %s::numeric, %s::numeric, %s::numeric, %s, %s::uuid)
+            ){claim_sql}
+            SELECT * FROM settled
+            """,
+            (
+                player_id, tenant_id, tenant_game_id, active_wallet['wallet_id'], currency_code,
+                bet_amount, payout, platform_fee, client_ip,
+                game_sessions.cached_session(player_id, tenant_game_id), *claim_params
+            )
+        )
+    except errors.RaiseException as e:
+        # The balance moved between our read and the guarded debit
+        if e.diag.message_primary == "INSUFFICIENT_FUNDS":
+            raise HTTPException(400, "Insufficient funds.")
+        raise
+
+    row = await cur.fetchone()
+    game_sessions.remember(player_id, tenant_game_id, row['session_id'])
+    return {
+        "bet_id": row['bet_id'],
+        "session_id": row['session_id'],
+        "round_id": row['round_id'],
+        "balance_after": float(row['balance_after'])
+    }
+
+
+async def _settle_multi_statement(cur, player_id, tenant_id, tenant_game_id, active_wallet, bonus_wallet, currency_code, bet_amount, payout, platform_fee, client_ip, idempotency=None):
+    is_win = payout > 0
+    outcome_status = "WIN" if is_win else "LOSS"
+
+    await cur.execute("BEGIN;")
+
+    # --- SESSION & ROUND: the round is written once, already ended ---
+    session_id, round_ids = await game_sessions.start_rounds(cur, player_id, tenant_game_id, client_ip)
+    round_id = round_ids[0]
+
+    # Record Bet
+    await cur.execute(
+        """
+        INSERT INTO Bet (
+            tenant_id, player_id, round_id, wallet_type,
+            bet_amount, currency_code, tenant_game_id,
+            platform_fee_amount, created_at
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
+        RETURNING bet_id;
+        """,
+        (
+            tenant_id, player_id, round_id, active_wallet['wallet_type'],
+            bet_amount, currency_code,
+            tenant_game_id, platform_fee
+        )
+    )
+    bet_id = (await cur.fetchone())['bet_id']
+
+    # --- WALLET: stake and payout in one guarded statement, with its WalletTransaction ---
+    if idempotency:
+        idempotency.response["session_id"] = str(session_id)
+        idempotency.balance_field = "balance_after"
+    settled = await wallet_ledger.apply_game_result(
+        cur, active_wallet['wallet_id'], bet_amount, payout, 'GAME_BET', bet_id, idempotency, bet_id=bet_id
+    )
+    if not settled:
+        raise HTTPException(400, "Insufficient funds.")
+
+    # Outcome & Payout
+    await cur.execute("INSERT INTO BetOutcome (bet_id, result, payout_amount, settled_at) VALUES (%s, %s, %s, NOW())", (bet_id, outcome_status, payout))
+    await record_daily_wager(cur, player_id, bet_amount, payout)
+    await record_ggr(cur, tenant_id, player_id, tenant_game_id, bet_amount, payout, platform_fee)
+
+    awarded_campaigns = await BonusService.track_bet_threshold_progress(cur, player_id, tenant_id, bet_amount)
+    await _credit_campaign_awards(cur, player_id, bonus_wallet, awarded_campaigns)
+
+    return {
+        "bet_id": bet_id,
+        "session_id": session_id,
+        "round_id": round_id,
+        "balance_after": settled['balance_after']
+    }
+
+
+async def settle_round_batch(
+    cur,
+    player_id,
+    tenant_id,
+    tenant_game_id,
+    active_wallet: dict,
+    bonus_wallet: dict,
+    currency_code: str,
+    bet_amount: float,
+    payouts: list,
+    client_ip: str
+):
+    """
+    Records several spins of the same stake in one go (auto-play): one guarded wallet update,
+    then multi-row inserts for GameRound, Bet, BetOutcome and WalletTransaction, and one
+    upsert each for the daily counters, GGR rollup and campaign progress.
+    Returns {session_id, balance_after, rounds: [{bet_id, round_id, balance_after}]}. Caller commits.
+    """
+    stake = Decimal(str(bet_amount))
+    payouts = [Decimal(str(p)) for p in payouts]
+    platform_fee = stake * Decimal("0.01")
+    rounds = len(payouts)
+
+    # Smallest starting balance that covers every stake as the spins play out in order
+    required_balance = Decimal(0)
+    spent = Decimal(0)
+    for payout in payouts:
+        required_balance = max(required_balance, spent + stake)
+        spent += stake - payout
+    net_change = -spent
+
+    # --- WALLET: one guarded update for the whole batch ---
+    await cur.execute(
+        """
+        UPDATE Wallet SET balance = balance + %s::numeric
+        WHERE wallet_id = %s AND player_id = %s AND balance >= %s::numeric
+        RETURNING balance
+        """,
+        (net_change, active_wallet['wallet_id'], player_id, required_balance)
+    )
+    wallet_row = await cur.fetchone()
+    if not wallet_row:
+        raise HTTPException(400, "Insufficient funds.")
+
+    balance = wallet_row['balance'] - net_change
+    balances_after = []
+    for payout in payouts:
+        balance += payout - stake
+        balances_after.append(balance)
+
+    # --- SESSION, ROUNDS, BETS, OUTCOMES: one statement each ---
+    session_id, round_ids = await game_sessions.start_rounds(cur, player_id, tenant_game_id, client_ip, rounds)
+
+    await cur.execute(
+        """
+        INSERT INTO Bet (
+            tenant_id, player_id, round_id, wallet_type,
+            bet_amount, currency_code, tenant_game_id,
+            platform_fee_amount, created_at
+        )
+        SELECT %s, %s, r.round_id, %s, %s, %s, %s, %s, NOW()
+        FROM unnest(%s::uuid[]) AS r(round_id)
+        RETURNING bet_id, round_id
+        """,
+        (
+            tenant_id, player_id, active_wallet['wallet_type'],
+            stake, currency_code, tenant_game_id, platform_fee, round_ids
+        )
+    )
+    bet_by_round = {r['round_id']: r['bet_id'] for r in await cur.fetchall()}
+    bet_ids = [bet_by_round[round_id] for round_id in round_ids]
+
+    await cur.execute(
+        """
+        INSERT INTO BetOutcome (bet_id, result, payout_amount, settled_at)
+        SELECT o.bet_id, CASE WHEN o.payout > 0 THEN 'WIN' ELSE 'LOSS' END, o.payout, NOW()
+        FROM unnest(%s::uuid[], %s::numeric[]) AS o(bet_id, payout)
+        """,
+        (bet_ids, payouts)
+    )
+
+    await record_daily_wager(cur, player_id, stake * rounds, sum(payouts))
+    await record_ggr(
+        cur, tenant_id, player_id, tenant_game_id, stake * rounds, sum(payouts), platform_fee * rounds,
+        bet_count=rounds, max_bet_amount=stake
+    )
+
+    await cur.execute(
+        """
+        INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, bet_id, created_at)
+        SELECT %s, CASE WHEN t.net >= 0 THEN 'WIN' ELSE 'LOSS' END, ABS(t.net), t.balance_after, 'GAME_BET', t.bet_id::text, t.bet_id, NOW()
+        FROM unnest(%s::uuid[], %s::numeric[], %s::numeric[]) AS t(bet_id, net, balance_after)
+        """,
+        (active_wallet['wallet_id'], bet_ids, [p - stake for p in payouts], balances_after)
+    )
+
+    awarded_campaigns = await BonusService.track_bet_threshold_progress(cur, player_id, tenant_id, stake * rounds)
+    await _credit_campaign_awards(cur, player_id, bonus_wallet, awarded_campaigns)
+
+    return {
+        "session_id": session_id,
+        "balance_after": float(balances_after[-1]),
+        "rounds": [
+            {"bet_id": bet_id, "round_id": round_id, "balance_after": float(bal)}
+            for bet_id, round_id, bal in zip(bet_ids, round_ids, balances_after)
+        ]
+    }
+
+
+async def _credit_campaign_awards(cur, player_id, bonus_wallet, awarded_campaigns):
+    """Credits the BET_THRESHOLD bonuses returned by BonusService.track_bet_threshold_progress."""
+    if not awarded_campaigns:
+        return
+
+    for camp in awarded_campaigns:
+        c_id = camp['campaign_id']
+        bonus_reward = float(camp['bonus_amount'])
+
+        # Opens the BONUS wallet if the player doesn't have one yet
+        currency_code = bonus_wallet['currency_code'] if bonus_wallet else 'USD'
+        await wallet_ledger.credit_or_open(
+            cur, player_id, 'BONUS', currency_code, bonus_reward, 'BONUS_CREDIT', 'CAMPAIGN', c_id
+        )
+        print(f"💰 AUTOMATIC BONUS: Player {player_id} awarded ${bonus_reward} for Campaign {c_id}")
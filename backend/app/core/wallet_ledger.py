@@ -0,0 +1,199 @@
+from typing import Optional
+
+# Every balance change is one statement: the guarded UPDATE and its WalletTransaction row
+# are written together, so concurrent requests on a wallet never lose an update and never
+# need SELECT ... FOR UPDATE in Python.
+# Amounts are cast to numeric in SQL, pass floats or Decimals as you have them.
+# An IdempotencyClaim passed as `idempotency` is recorded by the same statement (see app.core.idempotency).
+
+
+def _wallet_filter(wallet_id, player_id, wallet_type):
+    if wallet_id is not None:
+        return "wallet_id = %s", [wallet_id]
+    if player_id is None or wallet_type is None:
+        raise ValueError("Pass wallet_id, or player_id and wallet_type")
+    return "player_id = %s AND wallet_type = %s", [player_id, wallet_type]
+
+
+def _ref(reference_id):
+    return str(reference_id) if reference_id is not None else None
+
+
+def _tail(claim):
+    """
+    End of every statement after the `txn` CTE (the WalletTransaction insert): claims the
+    idempotency key when there is one, then returns the new balance. Returns (sql, params).
+    """
+    if claim is None:
+        return "SELECT wallet_id, balance_after FROM txn", []
+    return (
+        """
+        , claimed AS (
+            INSERT INTO IdempotencyKey (owner_id, scope, idempotency_key, response, created_at)
+            SELECT %s::uuid, %s, %s, %s::jsonb || jsonb_build_object(%s::text, balance_after), NOW()
+            FROM txn
+        )
+        SELECT wallet_id, balance_after FROM txn
+        """,
+        [claim.owner_id, claim.scope, claim.key, claim.response_json(), claim.balance_field]
+    )
+
+
+async def _fetch_result(cur):
+    row = await cur.fetchone()
+    if not row:
+        return None
+    return {"wallet_id": row['wallet_id'], "balance_after": float(row['balance_after'])}
+
+
+async def _apply(cur, delta_sql: str, guard_sql: str, params: list, wallet_sql: str, wallet_params: list,
+                 transaction_type, amount, reference_type, reference_id, idempotency):
+    tail_sql, tail_params = _tail(idempotency)
+    await cur.execute(
+        f"""
+        WITH updated AS (
+            UPDATE Wallet
+            SET balance = balance {delta_sql}
+            WHERE {wallet_sql} {guard_sql}
+            RETURNING wallet_id, balance
+        ), txn AS (
+            INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at)
+            SELECT wallet_id, %s, %s::numeric, balance, %s, %s, NOW()
+            FROM updated
+            RETURNING wallet_id, balance_after
+        )
+        {tail_sql}
+        """,
+        (
+            *params, *wallet_params,
+            transaction_type, amount, reference_type, _ref(reference_id),
+            *tail_params
+        )
+    )
+    return await _fetch_result(cur)
+
+
+async def credit(
+    cur,
+    amount,
+    transaction_type: str,
+    reference_type: str,
+    reference_id=None,
+    wallet_id=None,
+    player_id=None,
+    wallet_type: str = None,
+    idempotency=None
+) -> Optional[dict]:
+    """
+    Adds `amount` and records the transaction. Identify the wallet by wallet_id, or by
+    player_id + wallet_type. Returns {wallet_id, balance_after}, or None if the wallet doesn't exist.
+    """
+    wallet_sql, wallet_params = _wallet_filter(wallet_id, player_id, wallet_type)
+    return await _apply(
+        cur, "+ %s::numeric", "", [amount], wallet_sql, wallet_params,
+        transaction_type, amount, reference_type, reference_id, idempotency
+    )
+
+
+async def debit(
+    cur,
+    amount,
+    transaction_type: str,
+    reference_type: str,
+    reference_id=None,
+    wallet_id=None,
+    player_id=None,
+    wallet_type: str = None,
+    idempotency=None
+) -> Optional[dict]:
+    """
+    Subtracts `amount` only if the balance covers it, and records the transaction.
+    Returns {wallet_id, balance_after}, or None when funds are insufficient (or there is no such wallet).
+    """
+    wallet_sql, wallet_params = _wallet_filter(wallet_id, player_id, wallet_type)
+    return await _apply(
+        cur, "- %s::numeric", "AND balance >= %s::numeric", [amount], wallet_sql, [*wallet_params, amount],
+        transaction_type, amount, reference_type, reference_id, idempotency
+    )
+
+
+async def apply_game_result(
+    cur,
+    wallet_id,
+    stake,
+    payout,
+    reference_type: str,
+    reference_id=None,
+    idempotency=None,
+    bet_id=None
+) -> Optional[dict]:
+    """
+    Settles one round in one statement: takes the stake (if covered), adds the payout and
+    records the net as a WIN or LOSS transaction (linked to the Bet through bet_id).
+    Returns {wallet_id, balance_after}, or None when the balance doesn't cover the stake.
+    """
+    tail_sql, tail_params = _tail(idempotency)
+    await cur.execute(
+        f"""
+        WITH updated AS (
+            UPDATE Wallet
+            SET balance = balance - %s::numeric + %s::numeric
+            WHERE wallet_id = %s AND balance >= %s::numeric
+            RETURNING wallet_id, balance
+        ), txn AS (
+            INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, bet_id, created_at)
+            SELECT
+                wallet_id,
+                CASE WHEN %s::numeric >= %s::numeric THEN 'WIN' ELSE 'LOSS' END,
+                ABS(%s::numeric - %s::numeric),
+                balance, %s, %s, %s::uuid, NOW()
+            FROM updated
+            RETURNING wallet_id, balance_after
+        )
+        {tail_sql}
+        """,
+        (
+            stake, payout, wallet_id, stake,
+            payout, stake,
+            payout, stake,
+            reference_type, _ref(reference_id), bet_id,
+            *tail_params
+        )
+    )
+    return await _fetch_result(cur)
+
+
+async def credit_or_open(
+    cur,
+    player_id,
+    wallet_type: str,
+    currency_code: str,
+    amount,
+    transaction_type: str,
+    reference_type: str,
+    reference_id=None
+) -> dict:
+    """
+    Like credit(), but opens the player's wallet of that type with `amount` if it doesn't exist yet
+    (e.g. the first bonus a player receives). Returns {wallet_id, balance_after}.
+    """
+    await cur.execute(
+        """
+        WITH updated AS (
+            INSERT INTO Wallet (player_id, wallet_type, currency_code, balance)
+            VALUES (%s, %s, %s, %s::numeric)
+            ON CONFLICT (player_id, wallet_type)
+            DO UPDATE SET balance = Wallet.balance + EXCLUDED.balance
+            RETURNING wallet_id, balance
+        )
+        INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at)
+        SELECT wallet_id, %s, %s::numeric, balance, %s, %s, NOW()
+        FROM updated
+        RETURNING wallet_id, balance_after
+        """,
+        (
+            player_id, wallet_type, currency_code, amount,
+            transaction_type, amount, reference_type, _ref(reference_id)
+        )
+    )
+    return await _fetch_result(cur)
@@ -1,8 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import pool
-from app.routers import auth, admin, players, tenant_admin, kyc,  wallet, staff,game_engine, bonus, tenant_stats, tenant_logs
+from app.core.database import pool, open_pool, close_pool
+from app.core.migrations import apply_migrations
+from app.core.paytables import paytable_registry
+from app.core.rng import secure_rng
+from app.core import cache_bus, audit_logger, earnings_cube, idempotency, bonus_distribution, campaign_scheduler, game_sessions
+from app.routers import auth, admin, players, tenant_admin, kyc,  wallet, staff,game_engine, bonus, tenant_stats, tenant_logs, exports, internal
 
 
 app = FastAPI(
@@ -38,12 +42,33 @@ app.add_middleware(
 # 2. Database (Open on start, close on stop)
 @app.on_event("startup")
 async def startup_db():
-    await pool.open()
-    print("New  Database Connection Pool Opened")
+    # Waits for DB_POOL_MIN_SIZE connections, so the first requests don't pay for connecting
+    await open_pool()
+    print(f"New  Database Connection Pool Opened ({pool.min_size}-{pool.max_size} connections)")
+    await apply_migrations()
+    paytable_registry.load(settings.PAYTABLES_FILE or None)
+    # Start filling the outcome RNG buffer before the first spin
+    secure_rng.start()
+    cache_bus.start_listener()
+    audit_logger.start_writer()
+    earnings_cube.start_refresher()
+    idempotency.start_cleaner()
+    campaign_scheduler.start_scheduler()
+    game_sessions.start_reaper()
+    # Festival bonus distributions interrupted by a crash or restart
+    await bonus_distribution.resume_jobs()
 
 @app.on_event("shutdown")
 async def shutdown_db():
-    await pool.close()
+    await cache_bus.stop_listener()
+    await earnings_cube.stop_refresher()
+    await idempotency.stop_cleaner()
+    await campaign_scheduler.stop_scheduler()
+    await game_sessions.stop_reaper()
+    await bonus_distribution.stop_jobs()
+    await close_pool()
+    # Flush queued audit records after the last request has finished
+    audit_logger.stop_writer()
     print("Database Connection Pool Closed")
 
 app.include_router(auth.router)
@@ -60,6 +85,8 @@ app.include_router(game_engine.router)
 app.include_router(players.router)
 app.include_router(admin.router, prefix="/admin", tags=["Super Admin"])
 app.include_router(bonus.router)
+app.include_router(exports.router)
+app.include_router(internal.router)
 @app.get("/")
 async def root():
     return {
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from app.core.database import get_db_connection
-from app.core.security import hash_password,verify_password
+from app.core.database import get_db_connection, get_read_connection
+from app.core.security import hash_password_async, verify_password_async
 from app.core.dependencies import require_super_admin
+from app.core.game_catalog import invalidate_game_catalog
+from app.core.principal_cache import evict_email, evict_tenant
 from app.routers.auth import get_current_user
 from datetime import datetime, timedelta
 from typing import Optional
@@ -19,7 +21,7 @@ async def create_super_admin_user(
 
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
-            hashed_pwd = hash_password(data.password)
+            hashed_pwd = await hash_password_async(data.password)
             try:
                 await cur.execute(
                     """
@@ -62,6 +64,7 @@ async def update_super_admin_status(
             if cur.rowcount == 0:
                 raise HTTPException(404, "User not found")
                 
+            await evict_email(cur, data.email)
             await conn.commit()
             return {"message": f"User {data.email} status updated to {data.status}"}
 
@@ -77,10 +80,10 @@ async def update_own_password(
             # 1. Verify Old Password
             await cur.execute("SELECT password_hash FROM PlatformUser WHERE platform_user_id = %s", (user_id,))
             row = await cur.fetchone()          
-            if not row or not verify_password(data.old_password, row['password_hash']):
+            if not row or not await verify_password_async(data.old_password, row['password_hash']):
                 raise HTTPException(400, "Incorrect old password")
             # 2. Update to New Password
-            new_hash = hash_password(data.new_password)
+            new_hash = await hash_password_async(data.new_password)
             await cur.execute(
                 "UPDATE PlatformUser SET password_hash = %s WHERE platform_user_id = %s",
                 (new_hash, user_id)
@@ -92,7 +95,7 @@ async def update_own_password(
 # get tenants
 @router.get("/tenants/all")
 async def get_all_tenants(admin: dict = Depends(require_super_admin)):
-    async with get_db_connection() as conn:
+    async with get_read_connection() as conn:
         async with conn.cursor() as cur:
            
             await cur.execute("""
@@ -163,7 +166,7 @@ async def create_tenant(data: CreateTenantRequest, current_user: dict = Depends(
                 new_tenant_id = tenant_row['tenant_id']
 
                 # B. Create Tenant Admin
-                hashed_pw = hash_password(data.admin_password)
+                hashed_pw = await hash_password_async(data.admin_password)
                 
                 await cur.execute(
                     """
@@ -221,6 +224,7 @@ async def update_tenant_status(data: dict, admin: dict = Depends(require_super_a
                     (data["status"], data["tenant_id"])
                 )
 
+            await evict_tenant(cur, data["tenant_id"])
             await conn.commit()
             return {"status": "success", "message": f"Tenant updated to {data['status']}"}
 
@@ -421,6 +425,8 @@ async def update_platform_game(game_id: str, data: PlatformGameUpdate, current_u
             if not updated:
                 raise HTTPException(status_code=404, detail="Game not found")
             
+            # A platform game can be installed by any tenant
+            await invalidate_game_catalog(cur)
             await conn.commit()
             return {"status": "updated", "is_active": updated['is_active']}
 
@@ -452,9 +458,9 @@ async def get_platform_earnings(
         if not query_start:
              query_start = now - timedelta(days=365)
 
-        print(f"DEBUG: Searching Bets from {query_start} to {query_end}")
+        print(f"DEBUG: Searching earnings cube from {query_start} to {query_end}")
 
-        async with get_db_connection() as conn:
+        async with get_read_connection() as conn:
             async with conn.cursor() as cur:
                 # Grouping
                 if group_by == "GAME":
@@ -464,24 +470,29 @@ async def get_platform_earnings(
                     select_clause = "t.tenant_name"
                     group_clause = "t.tenant_name"
 
-                # SQL Query
-                # We removed the WHERE clause for testing if time_range is 'ALL'
+                # Reads the daily cube (refreshed by app.core.earnings_cube), not raw Bet rows,
+                # so the range is whole days
                 sql = f"""
                     SELECT 
                         COALESCE({select_clause}, 'Unknown') AS label,
-                        COALESCE(SUM(b.platform_fee_amount), 0) AS earnings,
-                        COUNT(b.bet_id) AS total_bets
-                    FROM Bet b
-                    LEFT JOIN TenantGame tg ON b.tenant_game_id = tg.tenant_game_id
-                    LEFT JOIN Tenant t ON b.tenant_id = t.tenant_id
+                        COALESCE(SUM(e.fee_sum), 0) AS earnings,
+                        COALESCE(SUM(e.bet_count), 0)::bigint AS total_bets
+                    FROM PlatformEarningsDaily e
+                    LEFT JOIN TenantGame tg ON e.tenant_game_id = tg.tenant_game_id
+                    LEFT JOIN Tenant t ON e.tenant_id = t.tenant_id
                     LEFT JOIN PlatformGame pg ON tg.platform_game_id = pg.platform_game_id
-                    WHERE b.created_at >= %s AND b.created_at <= %s
+                    WHERE e.earnings_date >= %s AND e.earnings_date <= %s
                     GROUP BY {group_clause}
                     ORDER BY earnings DESC
                 """
                 
-                await cur.execute(sql, (query_start, query_end))
+                await cur.execute(sql, (query_start.date(), query_end.date()))
                 raw_results = await cur.fetchall()
+
+                await cur.execute(
+                    "SELECT refreshed_at, EXTRACT(EPOCH FROM (NOW()::timestamp - refreshed_at)) AS age FROM PlatformEarningsRefresh"
+                )
+                freshness = await cur.fetchone()
                 
                 print(f" DEBUG: Database returned {len(raw_results)} rows")
 
@@ -514,7 +525,10 @@ async def get_platform_earnings(
                     "period": {
                         "start": query_start.strftime("%Y-%m-%d"),
                         "end": query_end.strftime("%Y-%m-%d")
-                    }
+                    },
+                    # Bets settled after this point show up on the next cube refresh
+                    "data_as_of": freshness['refreshed_at'].isoformat() if freshness else None,
+                    "staleness_seconds": int(freshness['age']) if freshness else None
                 }
 
     except Exception as e:
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from app.core.database import get_db_connection
-from app.core.security import verify_password, create_access_token, hash_password
+from app.core.security import verify_password_async, create_access_token, hash_password_async
 from app.schemas.auth_schema import LoginRequest, Token, SignupRequest
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 import os
 from dotenv import load_dotenv
 from app.core.dependencies import require_player 
+from app.core import game_sessions
 import random
 import string
 import requests 
@@ -83,7 +84,7 @@ async def login(credentials: LoginRequest):
             if not user:
                 raise HTTPException(status_code=404, detail="Invalid Credentials")
 
-            if not verify_password(credentials.password, found_hash):
+            if not await verify_password_async(credentials.password, found_hash):
                 raise HTTPException(status_code=401, detail="Incorrect password")
 
            
@@ -103,7 +104,7 @@ async def login(credentials: LoginRequest):
 @router.post("/register/super-admin")
 async def create_super_admin(data: SignupRequest):
     """Temporary route to create your first Super Admin"""
-    hashed = hash_password(data.password)
+    hashed = await hash_password_async(data.password)
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
             try:
@@ -137,6 +138,7 @@ async def logout_player(user: dict = Depends(require_player)):
                 (player_id,)
             )
             await conn.commit()
+    game_sessions.forget(player_id)
             
     return {"status": "success", "message": "Logged out and sessions closed"}
 
@@ -214,7 +216,7 @@ async def forgot_password(data: dict):
 
             # 3. Generate & Hash
             temp_pass = generate_temp_password()
-            hashed_pass = hash_password(temp_pass)
+            hashed_pass = await hash_password_async(temp_pass)
 
             # 4. Update DB
             if player:
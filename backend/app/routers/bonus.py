@@ -2,9 +2,12 @@ from fastapi import APIRouter, HTTPException, Depends
 from app.core.database import get_db_connection
 from app.core.dependencies import verify_tenant_is_approved
 from app.core.audit_logger import log_activity
+from app.core.bonus_service import BonusService
+from app.core import bonus_distribution, campaign_scheduler
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
+from uuid import UUID
 
 
 router = APIRouter(prefix="/tenant-admin/bonus", tags=["Bonus Operations"])
@@ -44,17 +47,28 @@ async def update_campaign(campaign_id: str, data: CampaignUpdate, user: dict = D
                 fields.append("bonus_amount = %s")
                 values.append(data.bonus_amount)
             if data.is_active is not None:
-                fields.append("is_active = %s")
-                values.append(data.is_active)
+                # Enabling a campaign before its start_date leaves it to the scheduler;
+                # one whose end_date has passed stays inactive
+                fields.append("is_active = (%s AND start_date <= NOW() AND (end_date IS NULL OR end_date >= NOW()))")
+                fields.append("pending_start = (%s AND start_date > NOW())")
+                values += [data.is_active, data.is_active]
             
             if not fields: return {"message": "No changes"}
             
             values.append(campaign_id)
             values.append(tenant_id)
             
-            query = f"UPDATE BonusCampaign SET {', '.join(fields)} WHERE campaign_id = %s AND tenant_id = %s"
+            query = f"UPDATE BonusCampaign SET {', '.join(fields)} WHERE campaign_id = %s AND tenant_id = %s RETURNING bonus_type"
             
             await cur.execute(query, tuple(values))
+            updated = await cur.fetchone()
+
+            # Reactivated threshold campaigns missed the bets placed while suspended
+            if updated and updated['bonus_type'] == 'BET_THRESHOLD' and data.is_active:
+                await BonusService.backfill_campaign_progress(cur, campaign_id)
+            if data.is_active is not None:
+                await campaign_scheduler.publish_change(cur, campaign_id)
+
             await conn.commit()
 
             log_activity(
@@ -77,11 +91,12 @@ async def delete_campaign(campaign_id: str, user: dict = Depends(verify_tenant_i
             await cur.execute(
                 """
                 UPDATE BonusCampaign 
-                SET is_active = FALSE, name = CONCAT(name, ' [ARCHIVED]') 
+                SET is_active = FALSE, pending_start = FALSE, name = CONCAT(name, ' [ARCHIVED]') 
                 WHERE campaign_id = %s AND tenant_id = %s AND name NOT LIKE '%%[ARCHIVED]%%'
                 """, 
                 (campaign_id, tenant_id)
             )
+            await campaign_scheduler.publish_change(cur, campaign_id)
             await conn.commit()
 
             log_activity(
@@ -110,8 +125,8 @@ async def create_campaign(data: CampaignCreate, user: dict = Depends(verify_tena
                 await cur.execute(
                     """
                     UPDATE BonusCampaign 
-                    SET is_active = FALSE, name = CONCAT(name, ' [ARCHIVED]')
-                    WHERE tenant_id = %s AND bonus_type = %s AND is_active = TRUE
+                    SET is_active = FALSE, pending_start = FALSE, name = CONCAT(name, ' [ARCHIVED]')
+                    WHERE tenant_id = %s AND bonus_type = %s AND (is_active = TRUE OR pending_start = TRUE)
                     """, 
                     (tenant_id, data.bonus_type)
                 )
@@ -120,9 +135,9 @@ async def create_campaign(data: CampaignCreate, user: dict = Depends(verify_tena
             await cur.execute(
                 """
                 INSERT INTO BonusCampaign 
-                (tenant_id, name, bonus_amount, bonus_type, wagering_requirement, start_date, end_date, is_active, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, TRUE, NOW()) 
-                RETURNING campaign_id
+                (tenant_id, name, bonus_amount, bonus_type, wagering_requirement, start_date, end_date, is_active, pending_start, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s <= NOW(), %s > NOW(), NOW()) 
+                RETURNING campaign_id, is_active
                 """,
                 (
                     tenant_id, 
@@ -131,9 +146,20 @@ async def create_campaign(data: CampaignCreate, user: dict = Depends(verify_tena
                     data.bonus_type, 
                     data.wagering_requirement, 
                     data.start_date,
-                    data.end_date
+                    data.end_date,
+                    data.start_date,
+                    data.start_date
                 )
             )
+            created = await cur.fetchone()
+            campaign_id = created['campaign_id']
+
+            # Count bets already placed inside the campaign window
+            if data.bonus_type == 'BET_THRESHOLD':
+                await BonusService.backfill_campaign_progress(cur, campaign_id)
+
+            # Future start_date / any end_date: the scheduler picks it up
+            await campaign_scheduler.publish_change(cur, campaign_id)
             await conn.commit()
 
             log_activity(
@@ -142,7 +168,8 @@ async def create_campaign(data: CampaignCreate, user: dict = Depends(verify_tena
                 action="CREATE_CAMPAIGN",
                 details=f"Created {data.bonus_type} Campaign: {data.name}"
             )
-            return {"status": "success", "message": f"Active {data.bonus_type} campaign created."}
+            state = "Active" if created['is_active'] else "Scheduled"
+            return {"status": "success", "message": f"{state} {data.bonus_type} campaign created."}
 
 
 @router.get("/campaigns")
@@ -152,19 +179,8 @@ async def get_campaigns(user: dict = Depends(verify_tenant_is_approved)):
         async with conn.cursor() as cur:
             await cur.execute("SELECT tenant_id FROM TenantUser WHERE tenant_user_id = %s", (admin_id,))
             tenant_id = (await cur.fetchone())['tenant_id']
-            
-            # 1. AUTO-EXPIRE: Mark campaigns inactive if End Date has passed
-            await cur.execute(
-                """
-                UPDATE BonusCampaign
-                SET is_active = FALSE
-                WHERE tenant_id = %s AND is_active = TRUE AND end_date IS NOT NULL AND end_date < NOW()
-                """,
-                (tenant_id,)
-            )
-            await conn.commit()
 
-            # 2. Fetch List
+            # Expiry and start are handled by app.core.campaign_scheduler, this is a pure read
             await cur.execute(
                 """
                 SELECT * FROM BonusCampaign 
@@ -193,35 +209,40 @@ async def distribute_bonus_to_all(
             if not camp: raise HTTPException(404, "Campaign not found")
             if not camp['is_active']: raise HTTPException(400, "Campaign is inactive")
 
+            # FESTIVAL goes to every active player: credited in chunks by a background job
+            if camp['bonus_type'] == 'FESTIVAL':
+                job = await bonus_distribution.create_job(
+                    cur, campaign_id, tenant_id, data.amount, user.get("email", "unknown")
+                )
+                await conn.commit()
+                bonus_distribution.launch(job['job_id'])
+
+                log_activity(
+                    tenant_id=tenant_id,
+                    user_email=user.get("email", "unknown"),
+                    action="START_BONUS_DISTRIBUTION",
+                    details=f"Campaign {campaign_id}: Distribution job {job['job_id']} of {job['amount']} for {job['total_players']} players"
+                )
+                # A resumed job reports where it stands, not just the new request
+                resumed = job['processed_players'] > 0
+                return {
+                    "status": "success",
+                    "message": (
+                        f"{'Resuming' if resumed else 'Distributing'} {job['amount']} bonuses to "
+                        f"{job['total_players']} players ({job['processed_players']} done). "
+                        f"The campaign is archived when done."
+                    ),
+                    "job_id": job['job_id'],
+                    "amount": job['amount'],
+                    "total_players": job['total_players'],
+                    "processed_players": job['processed_players']
+                }
+
             try:
                 await cur.execute("BEGIN;")
                 
                 affected_count = 0
-                if camp['bonus_type'] == 'FESTIVAL':
-                    await cur.execute(
-                        """
-                        INSERT INTO Wallet (player_id, wallet_type, currency_code, balance)
-                        SELECT player_id, 'BONUS', 'USD', %s
-                        FROM Player 
-                        WHERE tenant_id = %s AND status = 'ACTIVE'
-                        ON CONFLICT (player_id, wallet_type) 
-                        DO UPDATE SET balance = Wallet.balance + %s
-                        RETURNING wallet_id;
-                        """,
-                        (data.amount, tenant_id, data.amount)
-                    )
-                    affected_wallets = await cur.fetchall()
-                    affected_count = len(affected_wallets)
-                    if affected_wallets:
-                        values_list = [(w['wallet_id'], 'BONUS_CREDIT', data.amount, 'CAMPAIGN', campaign_id) for w in affected_wallets]
-                        await cur.executemany(
-                            """
-                            INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at)
-                            VALUES (%s, %s, %s, 0, %s, %s, NOW())
-                            """,
-                            values_list
-                        )
-                elif camp['bonus_type'] == 'MONTHLY_DEPOSIT':
+                if camp['bonus_type'] == 'MONTHLY_DEPOSIT':
                     percentage = float(camp['bonus_amount'])
                     await cur.execute(
                         """
@@ -269,7 +290,7 @@ async def distribute_bonus_to_all(
 
                 # Auto-Archive Campaign
               
-                if camp['bonus_type'] in ['FESTIVAL', 'MONTHLY_DEPOSIT']:
+                if camp['bonus_type'] == 'MONTHLY_DEPOSIT':
                     await cur.execute(
                         """
                         UPDATE BonusCampaign 
@@ -292,4 +313,20 @@ async def distribute_bonus_to_all(
             except Exception as e:
                 await conn.rollback()
                 print(f"DIST ERROR: {e}")
-                raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+                raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/distribution/{job_id}")
+async def get_distribution_progress(job_id: UUID, user: dict = Depends(verify_tenant_is_approved)):
+    """Progress of a FESTIVAL distribution started by distribute-all."""
+    admin_id = user["user_id"]
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT tenant_id FROM TenantUser WHERE tenant_user_id = %s", (admin_id,))
+            tenant_id = (await cur.fetchone())['tenant_id']
+
+    job = await bonus_distribution.get_job(job_id, tenant_id)
+    if not job: raise HTTPException(404, "Distribution job not found")
+    total = job['total_players']
+    job['percent_done'] = 100.0 if job['status'] == 'COMPLETED' or not total else round(min(job['processed_players'] / total, 1) * 100, 1)
+    return job
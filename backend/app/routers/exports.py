@@ -0,0 +1,169 @@
+from datetime import date, datetime
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.core.dependencies import require_tenant_admin, require_super_admin
+from app.core.exports import export_response
+
+# Bulk downloads streamed from a server-side cursor (app.core.exports), ?format=csv|ndjson.
+# Bets and transactions come in storage order (no ORDER BY), so the first rows go out
+# without sorting the whole range first; filter with since/until instead.
+router = APIRouter(tags=["Exports"])
+
+FORMAT = Query("csv", alias="format", description="csv or ndjson")
+
+
+def _filters_sql(tenant_column: str, tenant_id, column: str, since: Optional[datetime], until: Optional[datetime]):
+    """WHERE conditions after `TRUE`: the tenant (None = every tenant) and a [since, until) range."""
+    sql, params = "", []
+    if tenant_id:
+        sql += f" AND {tenant_column} = %s"
+        params.append(tenant_id)
+    if since:
+        sql += f" AND {column} >= %s"
+        params.append(since)
+    if until:
+        sql += f" AND {column} < %s"
+        params.append(until)
+    return sql, params
+
+
+def _bets_query(tenant_id, since, until):
+    range_sql, range_params = _filters_sql("b.tenant_id", tenant_id, "b.created_at", since, until)
+    sql = f"""
+        SELECT b.bet_id, b.created_at, b.tenant_id, b.player_id, p.username,
+               b.tenant_game_id, pg.title AS game, b.wallet_type, b.currency_code,
+               b.bet_amount, bo.result, bo.payout_amount, b.platform_fee_amount, b.round_id
+        FROM Bet b
+        LEFT JOIN BetOutcome bo ON bo.bet_id = b.bet_id
+        LEFT JOIN Player p ON p.player_id = b.player_id
+        LEFT JOIN TenantGame tg ON tg.tenant_game_id = b.tenant_game_id
+        LEFT JOIN PlatformGame pg ON pg.platform_game_id = tg.platform_game_id
+        WHERE TRUE{range_sql}
+    """
+    return sql, range_params
+
+
+def _transactions_query(tenant_id, since, until, transaction_type):
+    range_sql, range_params = _filters_sql("p.tenant_id", tenant_id, "wt.created_at", since, until)
+    if transaction_type:
+        range_sql += " AND wt.transaction_type = %s"
+        range_params.append(transaction_type.upper())
+    sql = f"""
+        SELECT wt.wallet_txn_id, wt.created_at, p.tenant_id, p.player_id, p.username,
+               w.wallet_type, w.currency_code, wt.transaction_type, wt.amount, wt.balance_after,
+               wt.reference_type, wt.reference_id, wt.bet_id
+        FROM WalletTransaction wt
+        JOIN Wallet w ON w.wallet_id = wt.wallet_id
+        JOIN Player p ON p.player_id = w.player_id
+        WHERE TRUE{range_sql}
+    """
+    return sql, range_params
+
+
+def _players_query(tenant_id):
+    tenant_sql, params = _filters_sql("tenant_id", tenant_id, "created_at", None, None)
+    sql = f"""
+        SELECT player_id, tenant_id, username, email, kyc_status, status,
+               daily_bet_limit, daily_loss_limit, max_single_bet, created_at
+        FROM Player
+        WHERE TRUE{tenant_sql}
+        ORDER BY created_at DESC
+    """
+    return sql, params
+
+
+def _tenant_of(admin: dict):
+    # SECURITY CHECK: tenant exports only ever cover the caller's own tenant
+    if not admin.get('tenant_id'):
+        raise HTTPException(403, "Tenant data not found")
+    return admin['tenant_id']
+
+
+# --- Tenant admin ---
+
+@router.get("/tenant/exports/bets")
+async def export_tenant_bets(
+    fmt: str = FORMAT,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    admin: dict = Depends(require_tenant_admin)
+):
+    sql, params = _bets_query(_tenant_of(admin), since, until)
+    return export_response(sql, params, fmt, "bets")
+
+
+@router.get("/tenant/exports/transactions")
+async def export_tenant_transactions(
+    fmt: str = FORMAT,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    transaction_type: Optional[str] = None,
+    admin: dict = Depends(require_tenant_admin)
+):
+    sql, params = _transactions_query(_tenant_of(admin), since, until, transaction_type)
+    return export_response(sql, params, fmt, "transactions")
+
+
+@router.get("/tenant/exports/players")
+async def export_tenant_players(fmt: str = FORMAT, admin: dict = Depends(require_tenant_admin)):
+    sql, params = _players_query(_tenant_of(admin))
+    return export_response(sql, params, fmt, "players")
+
+
+# --- Super admin (all tenants unless tenant_id is given) ---
+
+@router.get("/admin/exports/bets")
+async def export_platform_bets(
+    fmt: str = FORMAT,
+    tenant_id: Optional[UUID] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: dict = Depends(require_super_admin)
+):
+    sql, params = _bets_query(tenant_id, since, until)
+    return export_response(sql, params, fmt, "bets")
+
+
+@router.get("/admin/exports/transactions")
+async def export_platform_transactions(
+    fmt: str = FORMAT,
+    tenant_id: Optional[UUID] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    transaction_type: Optional[str] = None,
+    current_user: dict = Depends(require_super_admin)
+):
+    sql, params = _transactions_query(tenant_id, since, until, transaction_type)
+    return export_response(sql, params, fmt, "transactions")
+
+
+@router.get("/admin/exports/players")
+async def export_platform_players(
+    fmt: str = FORMAT,
+    tenant_id: Optional[UUID] = None,
+    current_user: dict = Depends(require_super_admin)
+):
+    sql, params = _players_query(tenant_id)
+    return export_response(sql, params, fmt, "players")
+
+
+@router.get("/admin/exports/earnings")
+async def export_platform_earnings(
+    fmt: str = FORMAT,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: dict = Depends(require_super_admin)
+):
+    """Daily platform fees per tenant and game, from the same cube as /admin/earnings (inclusive dates)."""
+    sql = """
+        SELECT e.earnings_date, e.tenant_id, t.tenant_name, e.tenant_game_id, pg.title AS game,
+               e.fee_sum, e.bet_count
+        FROM PlatformEarningsDaily e
+        LEFT JOIN Tenant t ON t.tenant_id = e.tenant_id
+        LEFT JOIN TenantGame tg ON tg.tenant_game_id = e.tenant_game_id
+        LEFT JOIN PlatformGame pg ON pg.platform_game_id = tg.platform_game_id
+        WHERE e.earnings_date >= %s AND e.earnings_date <= %s
+        ORDER BY e.earnings_date, t.tenant_name
+    """
+    return export_response(sql, [start_date or date.min, end_date or date.max], fmt, "earnings")
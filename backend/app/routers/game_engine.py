@@ -1,20 +1,123 @@
 import traceback
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Depends, Request
+from app.core.config import settings
 from app.core.database import get_db_connection
 from app.core.dependencies import verify_player_is_approved
-from app.schemas.game_schema import GamePlayRequest, GamePlayResponse
+from app.schemas.game_schema import GamePlayRequest, GamePlayResponse, GameBatchPlayRequest, GameBatchPlayResponse
 from app.core.game_logic_core import GameLogic
-import datetime
+from app.core.settlement import settle_round, settle_round_batch
+from app.core.game_catalog import game_catalog
+from app.core import idempotency
 
 router = APIRouter(prefix="/engine", tags=["Game Engine (Play)"])
 
+
+async def _fetch_player_limits(cur, player_id):
+    """Player's tenant, responsible-gaming limits and today's counters (limits as floats, 0 = none)."""
+    await cur.execute(
+        """
+        SELECT
+            p.tenant_id, p.daily_bet_limit, p.daily_loss_limit, p.max_single_bet,
+            COALESCE(d.total_wagered, 0) as total_wagered,
+            COALESCE(d.total_won, 0) as total_won
+        FROM Player p
+        LEFT JOIN PlayerDailyWager d ON d.player_id = p.player_id AND d.wager_date = CURRENT_DATE
+        WHERE p.player_id = %s LIMIT 1
+        """,
+        (player_id,)
+    )
+    player_row = await cur.fetchone()
+    if not player_row: raise HTTPException(400, "Player account error.")
+
+    return {
+        "tenant_id": player_row['tenant_id'],
+        "max_single_bet": float(player_row['max_single_bet']) if player_row['max_single_bet'] else 0.0,
+        "daily_bet_limit": float(player_row['daily_bet_limit']) if player_row['daily_bet_limit'] else 0.0,
+        "daily_loss_limit": float(player_row['daily_loss_limit']) if player_row['daily_loss_limit'] else 0.0,
+        "total_wagered": float(player_row['total_wagered']),
+        "total_won": float(player_row['total_won'])
+    }
+
+
+async def _fetch_game(cur, tenant_id, game_id: str, bet_amount: float):
+    """Looks the game up in the cached catalog and checks it's enabled and the stake fits its limits."""
+    cached_game = await game_catalog.get_game(cur, tenant_id, game_id)
+    game_data = None
+    if cached_game:
+        game_data = {
+            "tenant_game_id": cached_game['tenant_game_id'],
+            "game_name": cached_game['title'],
+            "game_type": cached_game['game_type'],
+            "min_bet": cached_game['min_bet'],
+            "max_bet": cached_game['max_bet'],
+            "status": cached_game['is_active'],
+            "tenant_id": cached_game['tenant_id']
+        }
+
+    if not game_data: raise HTTPException(404, "Game not found.")
+    if not game_data['status']: raise HTTPException(400, "Game is disabled.")
+
+    min_bet = float(game_data['min_bet'])
+    max_bet = float(game_data['max_bet'])
+    if bet_amount < min_bet: raise HTTPException(400, f"Minimum bet is ${min_bet}")
+    if max_bet > 0 and bet_amount > max_bet: raise HTTPException(400, f"Maximum bet for this game is ${max_bet}")
+
+    return game_data
+
+
+async def _fetch_wallets(cur, player_id, lock: bool = False):
+    """lock: holds both wallet rows until the transaction ends, so the balances read stay true."""
+    await cur.execute(
+        "SELECT wallet_id, wallet_type, balance, currency_code FROM Wallet WHERE player_id = %s AND wallet_type IN ('REAL', 'BONUS')"
+        + (" ORDER BY wallet_type FOR UPDATE" if lock else ""),
+        (player_id,)
+    )
+    wallets = await cur.fetchall()
+    real_wallet = next((w for w in wallets if w['wallet_type'] == 'REAL'), None)
+    bonus_wallet = next((w for w in wallets if w['wallet_type'] == 'BONUS'), None)
+    if not real_wallet: raise HTTPException(404, "Wallet not found.")
+    return real_wallet, bonus_wallet
+
+
+def _pick_wallet(use_wallet_type, real_wallet, bonus_wallet, bet_amount: float):
+    """Requested wallet, or BONUS first then REAL when none was requested."""
+    bal_real = float(real_wallet['balance'])
+    bal_bonus = float(bonus_wallet['balance']) if bonus_wallet else 0.0
+
+    if use_wallet_type:
+        req_type = use_wallet_type.upper()
+        if req_type == 'BONUS':
+            if not bonus_wallet or bal_bonus < bet_amount: raise HTTPException(400, "Insufficient BONUS funds.")
+            return bonus_wallet
+        elif req_type == 'REAL':
+            if bal_real < bet_amount: raise HTTPException(400, "Insufficient REAL funds.")
+            return real_wallet
+        else:
+            raise HTTPException(400, "Invalid wallet type.")
+
+    if bal_bonus >= bet_amount: return bonus_wallet
+    elif bal_real >= bet_amount: return real_wallet
+    else: raise HTTPException(400, "Insufficient funds.")
+
+
+def _run_game_logic(game_type: str, bet_data: dict, tenant_id=None):
+    # Paytable registry: per-tenant variant, else the game type's table, else SLOT
+    try:
+        return GameLogic.play(game_type, (bet_data or {}).get('prediction'), tenant_id)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+
 @router.post("/play/{game_id}", response_model=GamePlayResponse)
 async def play_game(
     game_id: str,
     play_req: GamePlayRequest,
     request: Request,
-    player: dict = Depends(verify_player_is_approved)
+    player: dict = Depends(verify_player_is_approved),
+    idempotency_key: Optional[str] = Depends(idempotency.key_header)
     ):
+    claim = idempotency.claim(player["user_id"], "PLAY", idempotency_key)
     try:
         player_id = player["user_id"]
         bet_amount = play_req.bet_amount
@@ -25,43 +128,21 @@ async def play_game(
 
         async with get_db_connection() as conn:
             async with conn.cursor() as cur:
-                # --- 1. FETCH PLAYER LIMITS & TENANT ---
-                await cur.execute(
-                    """
-                    SELECT tenant_id, daily_bet_limit, daily_loss_limit, max_single_bet 
-                    FROM Player WHERE player_id = %s LIMIT 1
-                    """, 
-                    (player_id,)
-                )
-                player_row = await cur.fetchone()
-                if not player_row: raise HTTPException(400, "Player account error.")
-                
-                player_tenant_id = player_row['tenant_id']
-                
+                # --- 1. FETCH PLAYER LIMITS, TENANT & TODAY'S COUNTERS ---
+                limits = await _fetch_player_limits(cur, player_id)
+                player_tenant_id = limits['tenant_id']
+
                 # Check Limits
-                limit_max_single = float(player_row['max_single_bet']) if player_row['max_single_bet'] else 0.0
-                limit_daily_bet = float(player_row['daily_bet_limit']) if player_row['daily_bet_limit'] else 0.0
-                limit_daily_loss = float(player_row['daily_loss_limit']) if player_row['daily_loss_limit'] else 0.0
-                
+                limit_max_single = limits['max_single_bet']
+                limit_daily_bet = limits['daily_bet_limit']
+                limit_daily_loss = limits['daily_loss_limit']
+
                 if limit_max_single > 0 and bet_amount > limit_max_single:
                     raise HTTPException(400, f"Bet rejected. Exceeds your max single bet limit of ${limit_max_single}")
 
                 if limit_daily_bet > 0 or limit_daily_loss > 0:
-                    await cur.execute(
-                        """
-                        SELECT 
-                            COALESCE(SUM(b.bet_amount), 0) as total_wagered,
-                            COALESCE(SUM(bo.payout_amount), 0) as total_won
-                        FROM Bet b
-                        LEFT JOIN BetOutcome bo ON b.bet_id = bo.bet_id
-                        WHERE b.player_id = %s 
-                        AND b.created_at >= CURRENT_DATE
-                        """, 
-                        (player_id,)
-                    )
-                    stats = await cur.fetchone()
-                    total_wagered_today = float(stats['total_wagered'])
-                    total_won_today = float(stats['total_won'])
+                    total_wagered_today = limits['total_wagered']
+                    total_won_today = limits['total_won']
                     current_net_loss = total_wagered_today - total_won_today
 
                     if limit_daily_bet > 0:
@@ -73,277 +154,195 @@ async def play_game(
                         if current_net_loss >= limit_daily_loss:
                              raise HTTPException(400, f"Daily loss limit reached. Please come back tomorrow.")
 
-                # --- 2. FETCH GAME & WALLETS ---
-                await cur.execute(
-                    """
-                    SELECT 
-                        tg.tenant_game_id,
-                        COALESCE(pg.title, 'Unknown Game') as game_name,
-                        pg.game_type,
-                        tg.min_bet, 
-                        tg.max_bet, 
-                        tg.is_active as status, 
-                        tg.tenant_id
-                    FROM TenantGame tg
-                    LEFT JOIN PlatformGame pg ON tg.platform_game_id = pg.platform_game_id
-                    WHERE tg.tenant_id = %s 
-                    AND (tg.tenant_game_id = %s OR pg.platform_game_id = %s)
-                    """,
-                    (player_tenant_id, game_id, game_id)
-                )
-                game_data = await cur.fetchone()
-
-                if not game_data: raise HTTPException(404, "Game not found.")
-                if not game_data['status']: raise HTTPException(400, "Game is disabled.")
-                
-                min_bet = float(game_data['min_bet'])
-                max_bet = float(game_data['max_bet'])
-                if bet_amount < min_bet: raise HTTPException(400, f"Minimum bet is ${min_bet}")
-                if max_bet > 0 and bet_amount > max_bet: raise HTTPException(400, f"Maximum bet for this game is ${max_bet}")
-
+                # --- 2. FETCH GAME (cached catalog) & WALLETS ---
+                game_data = await _fetch_game(cur, player_tenant_id, game_id, bet_amount)
                 real_tenant_game_id = game_data['tenant_game_id']
 
-                await cur.execute(
-                    "SELECT wallet_id, wallet_type, balance, currency_code FROM Wallet WHERE player_id = %s AND wallet_type IN ('REAL', 'BONUS')",
-                    (player_id,)
-                )
-                wallets = await cur.fetchall()
-                real_wallet = next((w for w in wallets if w['wallet_type'] == 'REAL'), None)
-                bonus_wallet = next((w for w in wallets if w['wallet_type'] == 'BONUS'), None)
-                if not real_wallet: raise HTTPException(404, "Wallet not found.")
-                
-                bal_real = float(real_wallet['balance'])
-                bal_bonus = float(bonus_wallet['balance']) if bonus_wallet else 0.0
-                active_wallet = None
-
-                if play_req.use_wallet_type:
-                    req_type = play_req.use_wallet_type.upper()
-                    if req_type == 'BONUS':
-                        if not bonus_wallet or bal_bonus < bet_amount: raise HTTPException(400, "Insufficient BONUS funds.")
-                        active_wallet = bonus_wallet
-                    elif req_type == 'REAL':
-                        if bal_real < bet_amount: raise HTTPException(400, "Insufficient REAL funds.")
-                        active_wallet = real_wallet
-                    else:
-                        raise HTTPException(400, "Invalid wallet type.")
-                else:
-                    if bal_bonus >= bet_amount: active_wallet = bonus_wallet
-                    elif bal_real >= bet_amount: active_wallet = real_wallet
-                    else: raise HTTPException(400, "Insufficient funds.")
+                real_wallet, bonus_wallet = await _fetch_wallets(cur, player_id)
+                active_wallet = _pick_wallet(play_req.use_wallet_type, real_wallet, bonus_wallet, bet_amount)
 
                 # --- 3. RUN GAME LOGIC ---
-                game_type = game_data['game_type'].upper()
-                multiplier = 0.0
-                result_data = {}
-
-                try:
-                    if game_type == "SLOT": multiplier, result_data = GameLogic.play_slot_machine()
-                    elif game_type == "DICE": multiplier, result_data = GameLogic.play_dice_roll(play_req.bet_data.get('prediction'))
-                    elif game_type == "WHEEL": multiplier, result_data = GameLogic.play_wheel_of_fortune(play_req.bet_data.get('prediction'))
-                    elif game_type == "COIN": multiplier, result_data = GameLogic.play_coin_flip(play_req.bet_data.get('prediction'))
-                    elif game_type == "HIGHLOW": multiplier, result_data = GameLogic.play_high_low(play_req.bet_data.get('prediction'))
-                    else: multiplier, result_data = GameLogic.play_slot_machine()
-                except ValueError as ve:
-                    raise HTTPException(status_code=400, detail=str(ve))
+                multiplier, result_data = _run_game_logic(game_data['game_type'], play_req.bet_data, game_data['tenant_id'])
 
                 payout = bet_amount * multiplier
-                is_win = payout > 0
-                outcome_status = "WIN" if is_win else "LOSS"
-
-                try:
-                    await cur.execute("BEGIN;")
-                    
-                    # --- SESSION MANAGEMENT ---
-                    await cur.execute(
-                        """
-                        SELECT session_id, started_at 
-                        FROM GameSession 
-                        WHERE player_id = %s AND game_id = %s AND ended_at IS NULL
-                        ORDER BY started_at DESC LIMIT 1
-                        """,
-                        (player_id, real_tenant_game_id)
-                    )
-                    existing_session = await cur.fetchone()
-                    session_id = None
-                    
-                    if existing_session:
-                        start_time = existing_session['started_at']
-                        now = datetime.datetime.now()
-                        age = now - start_time if isinstance(start_time, datetime.datetime) else datetime.timedelta(0)                       
-                        if age.total_seconds() > 7200: 
-                            await cur.execute(
-                                "UPDATE GameSession SET ended_at = NOW() WHERE session_id = %s",
-                                (existing_session['session_id'],)
-                            )
-                            session_id = None 
-                        else:
-                            session_id = existing_session['session_id']
-
-                    if not session_id:
-                        await cur.execute(
-                            "INSERT INTO GameSession (player_id, game_id, ip_address, started_at) VALUES (%s, %s, %s, NOW()) RETURNING session_id",
-                            (player_id, real_tenant_game_id, client_ip)
-                        )
-                        session_id = (await cur.fetchone())['session_id']
-                    
-                    await cur.execute(
-                        "SELECT COALESCE(MAX(round_number), 0) + 1 AS next_num FROM GameRound WHERE session_id = %s",
-                        (session_id,)
-                    )
-                    next_round_num = (await cur.fetchone())['next_num']
-
-                    await cur.execute(
-                        "INSERT INTO GameRound (session_id, round_number, started_at) VALUES (%s, %s, NOW()) RETURNING round_id",
-                        (session_id, next_round_num)
-                    )
-                    round_id = (await cur.fetchone())['round_id']
-
-                    # --- WALLET DEDUCTION ---
-                    new_balance = float(active_wallet['balance']) - bet_amount
-                    await cur.execute("UPDATE Wallet SET balance = %s WHERE wallet_id = %s", (new_balance, active_wallet['wallet_id']))
-
-                    platform_fee = bet_amount * 0.01
-                    
-                    # Record Bet
-                    await cur.execute(
-                        """
-                        INSERT INTO Bet (
-                            tenant_id, player_id, round_id, wallet_type, 
-                            bet_amount, currency_code, tenant_game_id, 
-                            platform_fee_amount, created_at
-                        )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW()) 
-                        RETURNING bet_id;
-                        """,
-                        (
-                            game_data['tenant_id'], player_id, round_id, active_wallet['wallet_type'],
-                            bet_amount, real_wallet['currency_code'],
-                            real_tenant_game_id, platform_fee
-                        )
-                    )
-                    bet_id = (await cur.fetchone())['bet_id']
-
-                    # Outcome & Payout
-                    await cur.execute("INSERT INTO BetOutcome (bet_id, result, payout_amount, settled_at) VALUES (%s, %s, %s, NOW())", (bet_id, outcome_status, payout))
-
-                    final_balance = new_balance
-                    if is_win:
-                        final_balance = new_balance + payout
-                        await cur.execute("UPDATE Wallet SET balance = %s WHERE wallet_id = %s", (final_balance, active_wallet['wallet_id']))
-
-                    await cur.execute("UPDATE GameRound SET ended_at = NOW() WHERE round_id = %s", (round_id,))
-                    
-                    net_change = payout - bet_amount
-                    txn_type = 'WIN' if net_change >= 0 else 'LOSS'
-                    await cur.execute(
-                        "INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at) VALUES (%s, %s, %s, %s, 'GAME_BET', %s, NOW())",
-                        (active_wallet['wallet_id'], txn_type, abs(net_change), final_balance, bet_id)
-                    )
+                outcome_status = "WIN" if payout > 0 else "LOSS"
 
+                if claim:
+                    # Stored with the key; settlement adds balance_after and session_id
+                    claim.response = {
+                        "game_id": str(real_tenant_game_id),
+                        "game_name": game_data['game_name'],
+                        "bet_amount": bet_amount,
+                        "win_amount": payout - bet_amount,
+                        "outcome": outcome_status,
+                        "game_data": result_data
+                    }
 
-                    await cur.execute(
-                        """
-                        SELECT campaign_id, bonus_amount, wagering_requirement, start_date, end_date
-                        FROM BonusCampaign 
-                        WHERE tenant_id = %s 
-                          AND bonus_type = 'BET_THRESHOLD' 
-                          AND is_active = TRUE 
-                          AND start_date <= NOW() 
-                          AND (end_date IS NULL OR end_date >= NOW())
-                        """,
-                        (player_tenant_id,)
+                try:
+                    settled = await settle_round(
+                        cur,
+                        player_id=player_id,
+                        tenant_id=game_data['tenant_id'],
+                        tenant_game_id=real_tenant_game_id,
+                        active_wallet=active_wallet,
+                        bonus_wallet=bonus_wallet,
+                        currency_code=real_wallet['currency_code'],
+                        bet_amount=bet_amount,
+                        payout=payout,
+                        client_ip=client_ip,
+                        idempotency=claim
                     )
-                    active_campaigns = await cur.fetchall()
-
-                    if active_campaigns:
-                        # Ensure we have a BONUS wallet ID to credit to
-                        bonus_wallet_id = bonus_wallet['wallet_id'] if bonus_wallet else None
-                        
-                        # If user doesn't have a bonus wallet yet, create one now
-                        if not bonus_wallet_id:
-                            await cur.execute(
-                                "INSERT INTO Wallet (player_id, wallet_type, currency_code, balance) VALUES (%s, 'BONUS', 'USD', 0) RETURNING wallet_id",
-                                (player_id,)
-                            )
-                            bonus_wallet_id = (await cur.fetchone())['wallet_id']
-
-                        for camp in active_campaigns:
-                            c_id = camp['campaign_id']
-                            target_bet_amount = float(camp['wagering_requirement'])
-                            bonus_reward = float(camp['bonus_amount'])
-                            c_start = camp['start_date']
-                            c_end = camp['end_date'] if camp['end_date'] else datetime.datetime.now()
-
-                            # 2. Check if player ALREADY received this bonus
-                            #    We check WalletTransaction for a reference to this campaign_id
-                            await cur.execute(
-                                """
-                                SELECT 1 FROM WalletTransaction 
-                                WHERE wallet_id = %s 
-                                  AND reference_type = 'CAMPAIGN' 
-                                  AND reference_id = %s
-                                LIMIT 1
-                                """,
-                                (bonus_wallet_id, str(c_id))
-                            )
-                            already_awarded = await cur.fetchone()
-
-                            if not already_awarded:
-                                #  Calculate total bets by this player within the campaign period
-                                await cur.execute(
-                                    """
-                                    SELECT COALESCE(SUM(bet_amount), 0) as total_bets
-                                    FROM Bet 
-                                    WHERE player_id = %s 
-                                      AND created_at >= %s 
-                                      AND created_at <= %s
-                                    """,
-                                    (player_id, c_start, c_end)
-                                )
-                                total_bets_row = await cur.fetchone()
-                                total_bets = float(total_bets_row['total_bets'])
-
-                                #Award Bonus if Threshold Reached
-                                if total_bets >= target_bet_amount:
-                                    # Update Bonus Wallet
-                                    await cur.execute(
-                                        "UPDATE Wallet SET balance = balance + %s WHERE wallet_id = %s RETURNING balance",
-                                        (bonus_reward, bonus_wallet_id)
-                                    )
-                                    new_bonus_bal = (await cur.fetchone())['balance']
-
-                                    
-                                    await cur.execute(
-                                        """
-                                        INSERT INTO WalletTransaction 
-                                        (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at) 
-                                        VALUES (%s, 'BONUS_CREDIT', %s, %s, 'CAMPAIGN', %s, NOW())
-                                        """,
-                                        (bonus_wallet_id, bonus_reward, new_bonus_bal, str(c_id))
-                                    )
-                                    print(f"💰 AUTOMATIC BONUS: Player {player_id} awarded ${bonus_reward} for Campaign {c_id}")
-
-                   
                     await conn.commit()
 
                     return {
                         "game_id": str(real_tenant_game_id),
                         "game_name": game_data['game_name'],
                         "bet_amount": bet_amount,
-                        "win_amount": net_change,
-                        "balance_after": final_balance,
+                        "win_amount": payout - bet_amount,
+                        "balance_after": settled['balance_after'],
                         "outcome": outcome_status,
                         "game_data": result_data,
-                        "session_id":str(session_id)
+                        "session_id": str(settled['session_id'])
                     }
 
                 except Exception as e:
                     await conn.rollback()
-                    raise e 
+                    raise e
 
     except HTTPException as http_e:
-        raise http_e 
+        if claim is None:
+            raise http_e
+        # A retry of a spin that already settled gets the original result back
+        async with get_db_connection() as conn:
+            return await idempotency.replay_or_raise(conn, claim, http_e)
     except Exception as e:
+        if idempotency.is_duplicate(e):
+            async with get_db_connection() as conn:
+                return await idempotency.replay_or_raise(conn, claim, e)
         print(f"SERVER CRASH IN /play: {str(e)}")
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Server Error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Server Error: {str(e)}")
+
+
+@router.post("/play/{game_id}/batch", response_model=GameBatchPlayResponse)
+async def play_game_batch(
+    game_id: str,
+    play_req: GameBatchPlayRequest,
+    request: Request,
+    player: dict = Depends(verify_player_is_approved)
+    ):
+    """
+    Auto-play: up to `rounds` spins with the same stake in one request and one transaction.
+    Stops early (stopped_reason) when the wallet or a daily limit can't cover the next spin.
+    """
+    try:
+        player_id = player["user_id"]
+        bet_amount = play_req.bet_amount
+        client_ip = request.client.host
+
+        if bet_amount <= 0:
+            raise HTTPException(status_code=400, detail="Bet must be positive.")
+        if play_req.rounds < 1 or play_req.rounds > settings.MAX_BATCH_ROUNDS:
+            raise HTTPException(400, f"Rounds must be between 1 and {settings.MAX_BATCH_ROUNDS}.")
+
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cur:
+                # --- 1. LIMITS, GAME & WALLET (once for the whole batch) ---
+                limits = await _fetch_player_limits(cur, player_id)
+
+                limit_max_single = limits['max_single_bet']
+                if limit_max_single > 0 and bet_amount > limit_max_single:
+                    raise HTTPException(400, f"Bet rejected. Exceeds your max single bet limit of ${limit_max_single}")
+
+                game_data = await _fetch_game(cur, limits['tenant_id'], game_id, bet_amount)
+                real_tenant_game_id = game_data['tenant_game_id']
+
+                # Locked: the rounds are played against this balance, so a concurrent spin or
+                # withdrawal must not lower it before the batch settles
+                real_wallet, bonus_wallet = await _fetch_wallets(cur, player_id, lock=True)
+                active_wallet = _pick_wallet(play_req.use_wallet_type, real_wallet, bonus_wallet, bet_amount)
+
+                # --- 2. PLAY ROUNDS IN MEMORY, STOP AT THE FIRST ONE THAT CAN'T BE COVERED ---
+                limit_daily_bet = limits['daily_bet_limit']
+                limit_daily_loss = limits['daily_loss_limit']
+                wagered_today = limits['total_wagered']
+                won_today = limits['total_won']
+                balance = float(active_wallet['balance'])
+
+                payouts = []
+                round_results = []
+                stopped_reason = None
+
+                for _ in range(play_req.rounds):
+                    if limit_daily_bet > 0 and wagered_today + bet_amount > limit_daily_bet:
+                        stopped_reason = "DAILY_BET_LIMIT"
+                    elif limit_daily_loss > 0 and wagered_today - won_today >= limit_daily_loss:
+                        stopped_reason = "DAILY_LOSS_LIMIT"
+                    elif balance < bet_amount:
+                        stopped_reason = "INSUFFICIENT_FUNDS"
+                    if stopped_reason:
+                        break
+
+                    multiplier, result_data = _run_game_logic(game_data['game_type'], play_req.bet_data, game_data['tenant_id'])
+                    payout = bet_amount * multiplier
+
+                    wagered_today += bet_amount
+                    won_today += payout
+                    balance += payout - bet_amount
+                    payouts.append(payout)
+                    round_results.append({
+                        "win_amount": payout - bet_amount,
+                        "outcome": "WIN" if payout > 0 else "LOSS",
+                        "game_data": result_data
+                    })
+
+                if not payouts:
+                    # Nothing playable: same errors as a single spin
+                    if stopped_reason == "DAILY_BET_LIMIT":
+                        remaining = max(0, limit_daily_bet - limits['total_wagered'])
+                        raise HTTPException(400, f"Daily bet limit reached. Remaining allowance: ${remaining}")
+                    if stopped_reason == "DAILY_LOSS_LIMIT":
+                        raise HTTPException(400, f"Daily loss limit reached. Please come back tomorrow.")
+                    raise HTTPException(400, "Insufficient funds.")
+
+                # --- 3. SETTLE EVERY ROUND IN ONE TRANSACTION ---
+                try:
+                    settled = await settle_round_batch(
+                        cur,
+                        player_id=player_id,
+                        tenant_id=game_data['tenant_id'],
+                        tenant_game_id=real_tenant_game_id,
+                        active_wallet=active_wallet,
+                        bonus_wallet=bonus_wallet,
+                        currency_code=real_wallet['currency_code'],
+                        bet_amount=bet_amount,
+                        payouts=payouts,
+                        client_ip=client_ip
+                    )
+                    await conn.commit()
+                except Exception as e:
+                    await conn.rollback()
+                    raise e
+
+                for result, settled_round in zip(round_results, settled['rounds']):
+                    result['balance_after'] = settled_round['balance_after']
+
+                return {
+                    "game_id": str(real_tenant_game_id),
+                    "game_name": game_data['game_name'],
+                    "bet_amount": bet_amount,
+                    "rounds_requested": play_req.rounds,
+                    "rounds_played": len(payouts),
+                    "total_win_amount": sum(payouts) - bet_amount * len(payouts),
+                    "balance_after": settled['balance_after'],
+                    "session_id": str(settled['session_id']),
+                    "stopped_reason": stopped_reason,
+                    "results": round_results
+                }
+
+    except HTTPException as http_e:
+        raise http_e
+    except Exception as e:
+        print(f"SERVER CRASH IN /play batch: {str(e)}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Server Error: {str(e)}")
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends
+from app.core.config import settings
+from app.core import audit_logger, game_sessions
+from app.core.database import pool, replica_status
+from app.core.dependencies import require_super_admin
+
+# Operational views of this worker (each worker has its own pool and counters)
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+@router.get("/pool")
+async def pool_status(current_user: dict = Depends(require_super_admin)):
+    """
+    Connection pool config and psycopg_pool counters since startup: requests_waiting,
+    requests_wait_ms (time spent waiting for a checkout), requests_errors (checkout timeouts),
+    connections_errors / connections_lost, usage_ms...
+    `replica` is the read replica pool (None when not configured) with its last measured lag
+    and how many reads it served or handed back to the primary.
+    """
+    return {
+        "name": pool.name,
+        "min_size": pool.min_size,
+        "max_size": pool.max_size,
+        "timeout_seconds": pool.timeout,
+        "max_idle_seconds": pool.max_idle,
+        "max_lifetime_seconds": pool.max_lifetime,
+        "statement_timeout_ms": settings.DB_STATEMENT_TIMEOUT_MS,
+        "stats": pool.get_stats(),
+        "replica": replica_status()
+    }
+
+
+@router.get("/game-sessions")
+async def game_sessions_status(current_user: dict = Depends(require_super_admin)):
+    """
+    Session reaper counters since startup (runs, sessions_closed, batches, errors, last run)
+    and how many open sessions this worker's registry holds.
+    """
+    return game_sessions.get_metrics()
+
+
+@router.get("/audit")
+async def audit_status(current_user: dict = Depends(require_super_admin)):
+    """
+    Audit log writer counters since startup: enqueued, written, dropped (queue full),
+    batches, write_errors, queue_high_watermark, and the queue's current depth and capacity.
+    """
+    return audit_logger.get_metrics()
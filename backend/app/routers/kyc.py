@@ -1,10 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends
-from app.core.database import get_db_connection
+from app.core.database import get_db_connection, get_read_connection
 from app.core.dependencies import require_tenant_admin, require_super_admin
 from app.schemas.kyc_schema import KYCSubmission, KYCReview
 from app.core.dependencies import require_player, verify_tenant_is_approved
 from app.core.bonus_service import BonusService
 from app.core.audit_logger import log_activity
+from app.core.principal_cache import evict_user, evict_tenant
 router = APIRouter(prefix="/kyc", tags=["KYC Operations"])
 
 # tenant Submit Documents ---
@@ -43,6 +44,7 @@ async def submit_tenant_kyc(
                     profile_id = profile['tenant_kyc_profile_id']
 
                 await cur.execute("UPDATE Tenant SET kyc_status = 'PENDING' WHERE tenant_id = %s", (tenant_id,))
+                await evict_tenant(cur, tenant_id)
                 await cur.execute("UPDATE TenantKYCProfile SET kyc_status = 'PENDING', submitted_at = NOW() WHERE tenant_kyc_profile_id = %s", (profile_id,))
 
                 #  (Update if exists, Insert if new)
@@ -101,6 +103,7 @@ async def review_tenant_kyc(
                     """,
                     (review.status, review.tenant_id)
                 )
+                await evict_tenant(cur, review.tenant_id)
                 
                 if review.status in ['APPROVED', 'REJECTED']:
                      await cur.execute(
@@ -160,6 +163,7 @@ async def submit_player_kyc(
                     )
                     profile_id = (await cur.fetchone())['player_kyc_profile_id']
                 await cur.execute("UPDATE Player SET kyc_status = 'PENDING' WHERE player_id = %s", (player_id,))
+                await evict_user(cur, player_id)
                 await cur.execute(
                     """
                     UPDATE PlayerKYCDocument 
@@ -229,6 +233,7 @@ async def review_player_kyc(
                 
                 # Update Main Player Table
                 await cur.execute("UPDATE Player SET kyc_status = %s WHERE player_id = %s", (new_status, player_id))
+                await evict_user(cur, player_id)
                 if new_status == 'APPROVED':
                     try:
                         # WELCOME BONUS
@@ -299,7 +304,7 @@ async def list_pending_tenants(admin: dict = Depends(require_super_admin)):
     """
     Returns a list of unique Tenants with their grouped KYC documents.
     """
-    async with get_db_connection() as conn:
+    async with get_read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 """
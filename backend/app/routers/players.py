@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
-from app.core.database import get_db_connection
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Query, Response
+from psycopg import errors
+from app.core.database import get_db_connection, get_read_connection
+from app.core import wallet_ledger, idempotency, keyset, game_sessions
 from app.core.dependencies import require_player
-from app.core.security import hash_password,verify_password
+from app.core.security import hash_password_async, verify_password_async
+from app.core.game_catalog import game_catalog
 from app.schemas.player_schema import (
     PlayerRegisterRequest, 
    
@@ -65,7 +70,7 @@ async def register_player(data: PlayerRegisterRequest):
                         raise HTTPException(400, "Invalid Referral Code.")
                 #  New Player Data
                 my_code = generate_referral_code(data.username)
-                hashed_pwd = hash_password(data.password)
+                hashed_pwd = await hash_password_async(data.password)
                 await cur.execute(
                     """
                     INSERT INTO Player (
@@ -131,11 +136,11 @@ async def update_password(
                 raise HTTPException(404, "Player not found")
                 
             # 2. Verify Old Password
-            if not verify_password(data.old_password, row['password_hash']):
+            if not await verify_password_async(data.old_password, row['password_hash']):
                 raise HTTPException(400, "Incorrect old password")
             
             # 3. Hash New Password and Update
-            new_hash = hash_password(data.new_password)
+            new_hash = await hash_password_async(data.new_password)
             
             await cur.execute(
                 "UPDATE Player SET password_hash = %s WHERE player_id = %s",
@@ -156,28 +161,12 @@ async def start_game_session(data: GameSessionInit, request: Request, user: dict
             if not await cur.fetchone(): 
                 raise HTTPException(404, "Game not found")
 
-            # Close  Sessions (> 2 Hours)
-            await cur.execute(
-                """
-                UPDATE GameSession 
-                SET ended_at = NOW() 
-                WHERE player_id = %s AND ended_at IS NULL AND started_at < NOW() - INTERVAL '2 HOURS'
-                """,
-                (player_id,)
-            )
-
-            # Check for existing active session
-            await cur.execute(
-                """
-                SELECT session_id FROM GameSession 
-                WHERE player_id = %s AND game_id = %s AND ended_at IS NULL
-                """,
-                (player_id, data.game_id)
-            )
-            existing_session = await cur.fetchone()
+            # Check for existing active session (sessions over 2 hours are closed by the reaper)
+            existing_session_id = await game_sessions.open_session_id(cur, player_id, data.game_id)
             
-            if existing_session:
-                return {"status": "resumed", "session_id": str(existing_session['session_id'])}
+            if existing_session_id:
+                game_sessions.remember(player_id, data.game_id, existing_session_id)
+                return {"status": "resumed", "session_id": str(existing_session_id)}
 
             # Create New Session
             await cur.execute(
@@ -191,14 +180,18 @@ async def start_game_session(data: GameSessionInit, request: Request, user: dict
             session_id = (await cur.fetchone())['session_id']
             
             await conn.commit()
+            game_sessions.remember(player_id, data.game_id, session_id)
             return {"status": "created", "session_id": str(session_id)}
 
 @router.post("/session/end")
 async def end_game_session(data: SessionEndRequest, user: dict = Depends(require_player)):
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
-            await cur.execute("UPDATE GameSession SET ended_at = NOW() WHERE session_id = %s AND player_id = %s", (data.session_id, user['user_id']))
+            await cur.execute("UPDATE GameSession SET ended_at = NOW() WHERE session_id = %s AND player_id = %s RETURNING game_id", (data.session_id, user['user_id']))
+            ended = await cur.fetchone()
             await conn.commit()
+            if ended:
+                game_sessions.forget(user['user_id'], ended['game_id'])
             return {"status": "success"}
 
 # game
@@ -207,23 +200,18 @@ async def get_game_details(tenant_game_id: str, user: dict = Depends(require_pla
     player_id = user["user_id"]
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
-            await cur.execute("""
-                SELECT 
-                    tg.tenant_game_id as game_id, 
-                    pg.title as title,
-                    tg.min_bet, 
-                    tg.max_bet, 
-                    pg.game_type, 
-                    pg.default_thumbnail_url,
-                    pg.video_url   -- <--- FETCH THIS NEW COLUMN
-                FROM TenantGame tg
-                JOIN PlatformGame pg ON tg.platform_game_id = pg.platform_game_id
-                WHERE tg.tenant_game_id = %s
-            """, (tenant_game_id,))
-            
-            game = await cur.fetchone()
-            if not game: 
+            cached_game = await game_catalog.get_game(cur, user["tenant_id"], tenant_game_id)
+            if not cached_game or not cached_game['has_platform_game'] or str(cached_game['tenant_game_id']) != str(tenant_game_id):
                 raise HTTPException(404, "Game not found")
+            game = {
+                "game_id": cached_game['tenant_game_id'],
+                "title": cached_game['title'],
+                "min_bet": cached_game['min_bet'],
+                "max_bet": cached_game['max_bet'],
+                "game_type": cached_game['game_type'],
+                "default_thumbnail_url": cached_game['default_thumbnail_url'],
+                "video_url": cached_game['video_url']
+            }
             await cur.execute("SELECT wallet_type, balance FROM Wallet WHERE player_id = %s", (player_id,))
             wallets = await cur.fetchall()
             
@@ -241,60 +229,82 @@ async def get_game_details(tenant_game_id: str, user: dict = Depends(require_pla
 
 # deposit
 @router.post("/deposit/self")
-async def deposit_self(data: TransactionRequest, user: dict = Depends(require_player)):
+async def deposit_self(
+    data: TransactionRequest,
+    user: dict = Depends(require_player),
+    idempotency_key: Optional[str] = Depends(idempotency.key_header)
+):
     if data.amount <= 0: raise HTTPException(400, "Amount must be positive")
     
     player_id = user["user_id"]
+    claim = idempotency.claim(player_id, "SELF_DEPOSIT", idempotency_key)
+    if claim: claim.response = {"status": "success"}
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
-            await cur.execute("SELECT wallet_id, balance FROM Wallet WHERE player_id = %s AND wallet_type = 'REAL'", (player_id,))
-            wallet = await cur.fetchone()
-            if not wallet: raise HTTPException(404, "Real wallet not found")
-
-            new_balance = float(wallet['balance']) + data.amount
-            await cur.execute("UPDATE Wallet SET balance = %s WHERE wallet_id = %s", (new_balance, wallet['wallet_id']))
-
-            await cur.execute(
-                "INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, created_at) VALUES (%s, 'DEPOSIT', %s, %s, 'SELF_DEPOSIT', NOW())",
-                (wallet['wallet_id'], data.amount, new_balance)
-            )
+            try:
+                credited = await wallet_ledger.credit(
+                    cur, data.amount, 'DEPOSIT', 'SELF_DEPOSIT', player_id=player_id, wallet_type='REAL',
+                    idempotency=claim
+                )
+            except errors.UniqueViolation as e:
+                return await idempotency.replay_or_raise(conn, claim, e)
+            if not credited: raise HTTPException(404, "Real wallet not found")
             await conn.commit()
-            return {"status": "success", "new_balance": new_balance}
+            return {"status": "success", "new_balance": credited['balance_after']}
 
 # withdraw
 @router.post("/withdraw/self")
-async def withdraw_self(data: TransactionRequest, user: dict = Depends(require_player)):
+async def withdraw_self(
+    data: TransactionRequest,
+    user: dict = Depends(require_player),
+    idempotency_key: Optional[str] = Depends(idempotency.key_header)
+):
     if data.amount <= 0: raise HTTPException(400, "Amount must be positive")
     
     player_id = user["user_id"]
+    claim = idempotency.claim(player_id, "SELF_WITHDRAW", idempotency_key)
+    if claim: claim.response = {"status": "success"}
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute("SELECT kyc_status FROM Player WHERE player_id = %s", (player_id,))
             if (await cur.fetchone())['kyc_status'] != 'APPROVED': raise HTTPException(403, "KYC Required")
 
-            await cur.execute("SELECT wallet_id, balance FROM Wallet WHERE player_id = %s AND wallet_type = 'REAL'", (player_id,))
-            wallet = await cur.fetchone()
-
-            if float(wallet['balance']) < data.amount: raise HTTPException(400, "Insufficient funds")
-
-            new_balance = float(wallet['balance']) - data.amount
-            await cur.execute("UPDATE Wallet SET balance = %s WHERE wallet_id = %s", (new_balance, wallet['wallet_id']))
-
-            await cur.execute(
-                "INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, created_at) VALUES (%s, 'WITHDRAWAL', %s, %s, 'SELF_WITHDRAW', NOW())",
-                (wallet['wallet_id'], data.amount, new_balance)
-            )
+            # Balance check and debit are one guarded statement, parallel withdrawals can't overdraw
+            try:
+                debited = await wallet_ledger.debit(
+                    cur, data.amount, 'WITHDRAWAL', 'SELF_WITHDRAW', player_id=player_id, wallet_type='REAL',
+                    idempotency=claim
+                )
+                if not debited: raise HTTPException(400, "Insufficient funds")
+            except (HTTPException, errors.UniqueViolation) as e:
+                # A retry after the money already left answers with the first withdrawal
+                return await idempotency.replay_or_raise(conn, claim, e)
             await conn.commit()
-            return {"status": "success", "new_balance": new_balance}
+            return {"status": "success", "new_balance": debited['balance_after']}
 
 # transactions
 @router.get("/my-transactions")
-async def get_my_player_transactions(user: dict = Depends(require_player)):
+async def get_my_player_transactions(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    user: dict = Depends(require_player)
+):
+    """Newest first; when more exist, pass the X-Next-Cursor response header back as ?cursor=."""
     player_id = user["user_id"]
+    try:
+        filters, filter_params = keyset.filters_sql("wt", cursor, transaction_type, since, until)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
-            await cur.execute("""
+            await cur.execute(f"""
                 SELECT 
+                    wt.wallet_txn_id as transaction_id,
                     wt.transaction_type,
                     CASE 
                         -- 1. Normal Game Win: Subtract Bet to show Net Profit
@@ -308,16 +318,28 @@ async def get_my_player_transactions(user: dict = Depends(require_player)):
                     END as amount,
                     wt.created_at, 
                     wt.reference_type 
-                FROM WalletTransaction wt 
-                JOIN Wallet w ON wt.wallet_id = w.wallet_id 
-                -- Only join Bet for standard arcade games to get the bet amount
-                LEFT JOIN Bet b ON wt.reference_id = CAST(b.round_id AS VARCHAR) 
+                FROM Wallet w
+                -- One bounded index scan per wallet, merged below
+                CROSS JOIN LATERAL (
+                    SELECT wt.wallet_txn_id, wt.transaction_type, wt.amount, wt.created_at,
+                           wt.reference_type, wt.bet_id
+                    FROM WalletTransaction wt
+                    WHERE wt.wallet_id = w.wallet_id {filters}
+                    ORDER BY wt.created_at DESC, wt.wallet_txn_id DESC
+                    LIMIT %s
+                ) wt
+                -- Only join Bet for standard arcade games to get the bet amount (primary key lookup)
+                LEFT JOIN Bet b ON b.bet_id = wt.bet_id
                                AND wt.reference_type = 'GAME_PLAY'
                 WHERE w.player_id = %s 
-                ORDER BY wt.created_at DESC 
-                LIMIT 50
-            """, (player_id,))
-            return await cur.fetchall()
+                ORDER BY wt.created_at DESC, wt.wallet_txn_id DESC
+                LIMIT %s
+            """, (*filter_params, limit + 1, player_id, limit + 1))
+            rows, next_cursor = keyset.split_page(await cur.fetchall(), limit)
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
 
 
 # dashboard
@@ -364,18 +386,18 @@ async def get_dashboard_data(user: dict = Depends(require_player)):
                     print(f" Error fetching tenant email: {e}")
                     await conn.rollback() 
 
-            #  Get Games
-            
-            await cur.execute("""
-                SELECT tg.tenant_game_id as game_id, pg.title as game_name, 
-                       pg.default_thumbnail_url as thumbnail_url, pg.game_type, pg.provider
-                FROM TenantGame tg 
-                JOIN PlatformGame pg ON tg.platform_game_id = pg.platform_game_id
-                WHERE tg.is_active = TRUE 
-                  AND pg.is_active = TRUE 
-                  AND tg.tenant_id = %s  
-            """, (tenant_id,)) 
-            games = await cur.fetchall()
+            #  Get Games (cached catalog)
+            games = [
+                {
+                    "game_id": g['tenant_game_id'],
+                    "game_name": g['title'],
+                    "thumbnail_url": g['default_thumbnail_url'],
+                    "game_type": g['game_type'],
+                    "provider": g['provider']
+                }
+                for g in await game_catalog.get_tenant_games(cur, tenant_id)
+                if g['is_active'] and g['platform_is_active']
+            ]
 
             # Get Active OTP
             active_otp = None
@@ -404,7 +426,7 @@ async def get_dashboard_data(user: dict = Depends(require_player)):
 async def get_latest_jackpot_winner(user: dict = Depends(require_player)):
     player_id = user["user_id"]
     
-    async with get_db_connection() as conn:
+    async with get_read_connection() as conn:
         async with conn.cursor() as cur:
             # First, get the tenant_id of the current player
             await cur.execute("SELECT tenant_id FROM Player WHERE player_id = %s", (player_id,))
@@ -432,7 +454,7 @@ async def get_latest_jackpot_winner(user: dict = Depends(require_player)):
 async def list_open_jackpots(user: dict = Depends(require_player)):
     player_id = user["user_id"]
 
-    async with get_db_connection() as conn:
+    async with get_read_connection() as conn:
         async with conn.cursor() as cur:
             # First, get the tenant_id
             await cur.execute("SELECT tenant_id FROM Player WHERE player_id = %s", (player_id,))
@@ -466,21 +488,22 @@ async def enter_jackpot(data: JackpotEntryRequest, user: dict = Depends(require_
             await cur.execute("SELECT 1 FROM JackpotEntry WHERE jackpot_event_id = %s AND player_id = %s", (data.jackpot_event_id, player_id))
             if await cur.fetchone(): raise HTTPException(400, "Already entered")
 
-            await cur.execute("SELECT wallet_id, balance FROM Wallet WHERE player_id = %s AND wallet_type = %s", (player_id, data.wallet_type))
-            wallet = await cur.fetchone()
-            if not wallet or float(wallet['balance']) < entry_fee: raise HTTPException(400, "Insufficient funds")
-
             try:
                 await cur.execute("BEGIN;")
-                new_balance = float(wallet['balance']) - entry_fee
-                await cur.execute("UPDATE Wallet SET balance = %s WHERE wallet_id = %s", (new_balance, wallet['wallet_id']))
+                debited = await wallet_ledger.debit(
+                    cur, entry_fee, 'JACKPOT_ENTRY', 'JACKPOT_EVENT', data.jackpot_event_id,
+                    player_id=player_id, wallet_type=data.wallet_type
+                )
+                if not debited: raise HTTPException(400, "Insufficient funds")
                 
                 await cur.execute("INSERT INTO JackpotEntry (jackpot_event_id, player_id, wallet_type, entry_amount, entered_at) VALUES (%s, %s, %s, %s, NOW())", (data.jackpot_event_id, player_id, data.wallet_type, entry_fee))
                 await cur.execute("UPDATE JackpotEvent SET total_pool_amount = total_pool_amount + %s WHERE jackpot_event_id = %s", (entry_fee, data.jackpot_event_id))
-                await cur.execute("INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at) VALUES (%s, 'JACKPOT_ENTRY', %s, %s, 'JACKPOT_EVENT', %s, NOW())", (wallet['wallet_id'], entry_fee, new_balance, data.jackpot_event_id))
                 
                 await conn.commit()
                 return {"status": "success"}
+            except HTTPException:
+                await conn.rollback()
+                raise
             except Exception as e:
                 await conn.rollback()
                 raise HTTPException(500, str(e))
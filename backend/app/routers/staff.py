@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from psycopg import errors
 from app.core.database import get_db_connection
-from app.core.security import hash_password, verify_password
+from app.core import wallet_ledger, idempotency, keyset
+from app.core.security import hash_password_async, verify_password_async
 from app.core.dependencies import verify_staff_is_active
 from app.core.audit_logger import log_activity
+from app.core.principal_cache import evict_user
 import secrets
 from datetime import datetime, timedelta
 from app.schemas.staff_operations_schema import (
@@ -43,7 +47,7 @@ async def staff_create_player(data: StaffPlayerRegister, staff: dict = Depends(v
             await cur.execute("SELECT 1 FROM PlatformUser WHERE email = %s", (data.email,))
             if await cur.fetchone():
                 raise HTTPException(400, "This email is reserved for administrative use.")   
-            hashed_pwd = hash_password(data.password)  
+            hashed_pwd = await hash_password_async(data.password)  
             try:
                 await cur.execute(
                     """
@@ -146,8 +150,14 @@ async def initiate_deposit(data: WithdrawalInitRequest, staff: dict = Depends(ve
 
 # complte deposit
 @router.post("/deposit/verify")
-async def verify_deposit(data: WithdrawalVerifyRequest, staff: dict = Depends(verify_staff_is_active)):
+async def verify_deposit(
+    data: WithdrawalVerifyRequest,
+    staff: dict = Depends(verify_staff_is_active),
+    idempotency_key: Optional[str] = Depends(idempotency.key_header)
+):
     staff_id = staff["user_id"]
+    claim = idempotency.claim(staff_id, "STAFF_DEPOSIT_VERIFY", idempotency_key)
+    if claim: claim.response = {"status": "success"}
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute("SELECT player_id FROM Player WHERE email = %s", (data.player_email,))
@@ -158,25 +168,26 @@ async def verify_deposit(data: WithdrawalVerifyRequest, staff: dict = Depends(ve
             await cur.execute("SELECT * FROM PlayerOTP WHERE player_id = %s", (player_id,))
             otp_record = await cur.fetchone()
 
-            if not otp_record or otp_record['otp_type'] != 'DEPOSIT': raise HTTPException(400, "No deposit request found.")
+            if not otp_record or otp_record['otp_type'] != 'DEPOSIT':
+                # A retried verify finds the OTP already used; answer with the first result if it had a key
+                return await idempotency.replay_or_raise(conn, claim, HTTPException(400, "No deposit request found."))
             if otp_record['otp_code'] != data.otp_code: raise HTTPException(400, "Invalid OTP.")
             if datetime.now() > otp_record['expires_at']: raise HTTPException(400, "OTP Expired.")
 
             amount = float(otp_record['amount'])
             try:
-                await cur.execute("SELECT wallet_id, balance FROM Wallet WHERE player_id = %s AND wallet_type='REAL'", (player_id,))
-                wallet = await cur.fetchone()
-                
-                new_balance = float(wallet['balance']) + amount
-                await cur.execute("UPDATE Wallet SET balance = %s WHERE wallet_id = %s", (new_balance, wallet['wallet_id']))
+                # Consuming the OTP first makes a double-submitted verify credit only once
                 await cur.execute(
-                    """
-                    INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at)
-                    VALUES (%s, 'DEPOSIT', %s, %s, 'STAFF_OTP', %s, NOW())
-                    """,
-                    (wallet['wallet_id'], amount, new_balance, staff_id)
+                    "DELETE FROM PlayerOTP WHERE player_id = %s AND otp_type = 'DEPOSIT' AND otp_code = %s RETURNING 1",
+                    (player_id, data.otp_code)
+                )
+                if not await cur.fetchone(): raise HTTPException(400, "No deposit request found.")
+
+                credited = await wallet_ledger.credit(
+                    cur, amount, 'DEPOSIT', 'STAFF_OTP', staff_id, player_id=player_id, wallet_type='REAL',
+                    idempotency=claim
                 )
-                await cur.execute("DELETE FROM PlayerOTP WHERE player_id = %s", (player_id,))
+                if not credited: raise HTTPException(404, "Real wallet not found")
                 await conn.commit()
 
                 log_activity(
@@ -185,7 +196,9 @@ async def verify_deposit(data: WithdrawalVerifyRequest, staff: dict = Depends(ve
                     action="COMPLETE_DEPOSIT",
                     details=f"Verified deposit for {data.player_email}: {amount}"
                 )
-                return {"status": "success", "new_balance": new_balance}
+                return {"status": "success", "new_balance": credited['balance_after']}
+            except (HTTPException, errors.UniqueViolation) as e:
+                return await idempotency.replay_or_raise(conn, claim, e)
             except Exception as e:
                 await conn.rollback()
                 raise HTTPException(500, str(e))
@@ -283,8 +296,14 @@ async def initiate_withdrawal(data: WithdrawalInitRequest, staff: dict = Depends
 
 
 @router.post("/withdraw/verify")
-async def verify_withdrawal(data: WithdrawalVerifyRequest, staff: dict = Depends(verify_staff_is_active)):
+async def verify_withdrawal(
+    data: WithdrawalVerifyRequest,
+    staff: dict = Depends(verify_staff_is_active),
+    idempotency_key: Optional[str] = Depends(idempotency.key_header)
+):
     staff_id = staff["user_id"]
+    claim = idempotency.claim(staff_id, "STAFF_WITHDRAW_VERIFY", idempotency_key)
+    if claim: claim.response = {"status": "success"}
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute("SELECT player_id FROM Player WHERE email = %s", (data.player_email,))
@@ -296,7 +315,8 @@ async def verify_withdrawal(data: WithdrawalVerifyRequest, staff: dict = Depends
             otp_record = await cur.fetchone()
 
             if not otp_record or otp_record['otp_type'] != 'WITHDRAWAL': 
-                raise HTTPException(400, "No pending withdrawal.")
+                # A retried verify finds the OTP already used; answer with the first result if it had a key
+                return await idempotency.replay_or_raise(conn, claim, HTTPException(400, "No pending withdrawal."))
             if otp_record['otp_code'] != data.otp_code: 
                 raise HTTPException(400, "Invalid OTP Code.")
             
@@ -306,41 +326,35 @@ async def verify_withdrawal(data: WithdrawalVerifyRequest, staff: dict = Depends
 
             amount = float(otp_record['amount'])
             try:
-                # REMOVED currency_code from select as it is no longer needed for the deleted Withdrawal table
-                await cur.execute("SELECT wallet_id, balance FROM Wallet WHERE player_id = %s AND wallet_type='REAL'", (player_id,))
-                wallet = await cur.fetchone()
-                
-                if float(wallet['balance']) < amount: 
-                    raise HTTPException(400, "Insufficient funds.")
-
-                new_balance = float(wallet['balance']) - amount
-                
-                # 1. Deduct balance from Wallet
-                await cur.execute("UPDATE Wallet SET balance = %s WHERE wallet_id = %s", (new_balance, wallet['wallet_id']))              
-                
-                # 2. Insert into WalletTransaction (Withdrawal table insert completely removed)
+                # 1. Consume the OTP, a double-submitted verify finds nothing the second time
                 await cur.execute(
-                    """
-                    INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at)
-                    VALUES (%s, 'WITHDRAWAL', %s, %s, 'STAFF_OTP', %s, NOW())
-                    """,
-                    (wallet['wallet_id'], amount, new_balance, staff_id)
-                )  
-                
-                # 3. Clean up OTP
-                await cur.execute("DELETE FROM PlayerOTP WHERE player_id = %s", (player_id,))
+                    "DELETE FROM PlayerOTP WHERE player_id = %s AND otp_type = 'WITHDRAWAL' AND otp_code = %s RETURNING 1",
+                    (player_id, data.otp_code)
+                )
+                if not await cur.fetchone():
+                    raise HTTPException(400, "No pending withdrawal.")
+
+                # 2. Deduct balance and record the WalletTransaction in one guarded statement
+                debited = await wallet_ledger.debit(
+                    cur, amount, 'WITHDRAWAL', 'STAFF_OTP', staff_id, player_id=player_id, wallet_type='REAL',
+                    idempotency=claim
+                )
+                if not debited:
+                    raise HTTPException(400, "Insufficient funds.")
                 
                 await conn.commit()
                 
-                # 4. Log the activity
+                # 3. Log the activity
                 log_activity(
                     tenant_id=staff.get("tenant_id"),
                     user_email=staff.get("email", "unknown"),
                     action="COMPLETE_WITHDRAWAL",
                     details=f"Verified withdrawal for {data.player_email}: {amount}"
                 )
-                return {"status": "success", "new_balance": new_balance}
+                return {"status": "success", "new_balance": debited['balance_after']}
                 
+            except (HTTPException, errors.UniqueViolation) as e:
+                return await idempotency.replay_or_raise(conn, claim, e)
             except Exception as e:
                 await conn.rollback()
                 raise HTTPException(500, str(e))
@@ -354,10 +368,10 @@ async def update_staff_password(data: PasswordUpdate, staff: dict = Depends(veri
         async with conn.cursor() as cur:
             await cur.execute("SELECT password_hash FROM TenantUser WHERE tenant_user_id = %s", (staff_id,))
             row = await cur.fetchone()
-            if not row or not verify_password(data.old_password, row['password_hash']):
+            if not row or not await verify_password_async(data.old_password, row['password_hash']):
                 raise HTTPException(400, "Incorrect old password")
                 
-            new_hash = hash_password(data.new_password)
+            new_hash = await hash_password_async(data.new_password)
             await cur.execute("UPDATE TenantUser SET password_hash = %s WHERE tenant_user_id = %s", (new_hash, staff_id))
             await conn.commit()
             log_activity(
@@ -372,13 +386,27 @@ async def update_staff_password(data: PasswordUpdate, staff: dict = Depends(veri
 
 
 @router.get("/my-transactions")
-async def get_my_transactions(staff: dict = Depends(verify_staff_is_active)):
+async def get_my_transactions(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    staff: dict = Depends(verify_staff_is_active)
+):
+    """Transactions this staff member processed, newest first; more pages via the X-Next-Cursor header."""
     staff_id = str(staff["user_id"]) 
+    try:
+        filters, filter_params = keyset.filters_sql("wt", cursor, transaction_type, since, until)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
     
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
+            # Served by the partial idx_wallettransaction_staff_created index
             await cur.execute(
-                """
+                f"""
                 SELECT wt.wallet_txn_id as transaction_id, 
                        wt.transaction_type, 
                        wt.amount, 
@@ -390,12 +418,17 @@ async def get_my_transactions(staff: dict = Depends(verify_staff_is_active)):
                 JOIN Player p ON w.player_id = p.player_id
                 WHERE wt.reference_id = %s::text
                   AND wt.reference_type IN ('STAFF_OTP', 'CASHIER_DESK', 'DEPOSIT', 'WITHDRAWAL')
-                ORDER BY wt.created_at DESC 
-                LIMIT 50
+                  {filters}
+                ORDER BY wt.created_at DESC, wt.wallet_txn_id DESC
+                LIMIT %s
                 """,
-                (staff_id,)
+                (staff_id, *filter_params, limit + 1)
             )
-            return await cur.fetchall()
+            rows, next_cursor = keyset.split_page(await cur.fetchall(), limit)
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
 
 # player kyc upload
 @router.post("/player/upload-kyc-json")
@@ -425,6 +458,7 @@ async def staff_upload_player_kyc_json(
                     """,
                     (data.doc_url, player['player_id'])
                 )
+                await evict_user(cur, player['player_id'])
 
                 await cur.execute(
                     """
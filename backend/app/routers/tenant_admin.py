@@ -1,8 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends
-from app.core.database import get_db_connection
-from app.core.security import hash_password, verify_password
+from app.core.database import get_db_connection, get_read_connection
+from app.core import wallet_ledger
+from app.core.security import hash_password_async, verify_password_async
 from app.core.dependencies import verify_tenant_is_approved, require_tenant_admin
 from app.core.audit_logger import log_activity
+from app.core.game_catalog import invalidate_game_catalog
+from app.core.principal_cache import evict_email
 import random
 
 from app.schemas.tenant_admin_schema import (
@@ -101,6 +104,7 @@ async def add_game_to_site(data: AddGameRequest, current_user: dict = Depends(ve
                 """,
                 (tenant_id, data.platform_game_id, data.custom_name or None, data.min_bet, data.max_bet)
             )
+            await invalidate_game_catalog(cur, tenant_id)
             await conn.commit()
 
             log_activity(
@@ -128,6 +132,7 @@ async def update_tenant_game(data: UpdateGameRequest, current_user: dict = Depen
                 """,
                 (data.min_bet, data.max_bet, data.is_active, data.tenant_game_id, tenant_id)
             )
+            await invalidate_game_catalog(cur, tenant_id)
             await conn.commit()
 
             log_activity(
@@ -230,10 +235,10 @@ async def update_own_password(data: PasswordUpdateRequest, current_user: dict =
             await cur.execute("SELECT password_hash FROM TenantUser WHERE tenant_user_id = %s", (user_id,))
             row = await cur.fetchone()
             
-            if not row or not verify_password(data.old_password, row['password_hash']):
+            if not row or not await verify_password_async(data.old_password, row['password_hash']):
                 raise HTTPException(400, "Incorrect old password")
 
-            new_hash = hash_password(data.new_password)
+            new_hash = await hash_password_async(data.new_password)
             await cur.execute("UPDATE TenantUser SET password_hash = %s WHERE tenant_user_id = %s", (new_hash, user_id))
             await conn.commit()
 
@@ -279,7 +284,7 @@ async def create_jackpot(data: JackpotCreateRequest, admin: dict = Depends(verif
 @router.get("/jackpot/list", response_model=list[JackpotResponse])
 async def list_admin_jackpots(admin: dict = Depends(verify_tenant_is_approved)):
     admin_id = admin["user_id"]
-    async with get_db_connection() as conn:
+    async with get_read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute("SELECT tenant_id FROM TenantUser WHERE tenant_user_id = %s", (admin_id,))
             tenant_id = (await cur.fetchone())['tenant_id']
@@ -310,22 +315,27 @@ async def draw_jackpot_winner(event_id: str, admin: dict = Depends(verify_tenant
             if not entries: raise HTTPException(400, "No participants!")
 
             winner_id = random.choice(entries)['player_id']
-            pool_amount = float(event['total_pool_amount'])
-
 
             try:
                 await cur.execute("BEGIN;")
-                await cur.execute("UPDATE JackpotEvent SET status = 'CLOSED', winner_player_id = %s WHERE jackpot_event_id = %s", (winner_id, event_id))
-                await cur.execute("SELECT wallet_id, balance FROM Wallet WHERE player_id = %s AND wallet_type = 'REAL'", (winner_id,))
-                wallet = await cur.fetchone()
-                new_balance = float(wallet['balance']) + pool_amount
-                
-                await cur.execute("UPDATE Wallet SET balance = %s WHERE wallet_id = %s", (new_balance, wallet['wallet_id']))
+                # Closing only an OPEN event makes a concurrent second draw find nothing; the pool is read
+                # under the same row lock, so entries that landed after the SELECT above are paid out too
+                await cur.execute(
+                    """
+                    UPDATE JackpotEvent SET status = 'CLOSED', winner_player_id = %s
+                    WHERE jackpot_event_id = %s AND status = 'OPEN'
+                    RETURNING total_pool_amount
+                    """,
+                    (winner_id, event_id)
+                )
+                closed = await cur.fetchone()
+                if not closed: raise HTTPException(400, "Event closed")
+                pool_amount = float(closed['total_pool_amount'])
 
-                await cur.execute("""
-                    INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at)
-                    VALUES (%s, 'JACKPOT_WIN', %s, %s, 'JACKPOT_EVENT', %s, NOW())
-                """, (wallet['wallet_id'], pool_amount, new_balance, event_id))
+                credited = await wallet_ledger.credit(
+                    cur, pool_amount, 'JACKPOT_WIN', 'JACKPOT_EVENT', event_id, player_id=winner_id, wallet_type='REAL'
+                )
+                if not credited: raise HTTPException(404, "Winner has no real wallet")
 
                 await conn.commit()
 
@@ -336,6 +346,9 @@ async def draw_jackpot_winner(event_id: str, admin: dict = Depends(verify_tenant
                     details=f"Event: {event_id} | Winner: {winner_id} | Amount: {pool_amount}"
                 )
                 return {"status": "Winner Declared", "winner_id": winner_id, "amount": pool_amount}
+            except HTTPException:
+                await conn.rollback()
+                raise
             except Exception as e:
                 await conn.rollback()
                 raise HTTPException(500, str(e))
@@ -345,7 +358,7 @@ async def draw_jackpot_winner(event_id: str, admin: dict = Depends(verify_tenant
 @router.get("/players/all")
 async def get_all_tenant_players(user: dict = Depends(require_tenant_admin)):
     user_id = user["user_id"]
-    async with get_db_connection() as conn:
+    async with get_read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute("SELECT tenant_id FROM TenantUser WHERE tenant_user_id = %s", (user_id,))
             admin = await cur.fetchone()
@@ -371,6 +384,7 @@ async def update_player_status(data: dict, user: dict = Depends(require_tenant_a
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute("UPDATE Player SET status = %s WHERE email = %s", (data["status"], data["email"]))
+            await evict_email(cur, data["email"])
             await conn.commit()
 
             log_activity(
@@ -434,7 +448,7 @@ async def create_tenant_user(data: CreateUserRequest, user: dict = Depends(requi
             await cur.execute("SELECT tenant_id FROM TenantUser WHERE tenant_user_id = %s", (user_id,))
             tenant_id = (await cur.fetchone())['tenant_id']
 
-            hashed_pwd = hash_password(data.password)
+            hashed_pwd = await hash_password_async(data.password)
             try:
                 await cur.execute("""
                     INSERT INTO TenantUser (tenant_id, email, password_hash, role_id, status, created_by)
@@ -460,6 +474,7 @@ async def update_staff_status(data: dict, user: dict = Depends(require_tenant_ad
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute("UPDATE TenantUser SET status = %s WHERE email = %s", (data["status"], data["email"]))
+            await evict_email(cur, data["email"])
             await conn.commit()
 
             log_activity(
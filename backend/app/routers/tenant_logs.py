@@ -1,51 +1,36 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from app.core.dependencies import require_tenant_admin
-import os
+from app.core.audit_store import read_tenant_logs
 
 router = APIRouter(prefix="/tenant/logs", tags=["Audit Logs"])
 
-LOG_FILE = "logs/tenant_audit.log"
-
 @router.get("/")
-async def get_audit_logs(admin: dict = Depends(require_tenant_admin)):
+async def get_audit_logs(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    admin: dict = Depends(require_tenant_admin)
+):
+    """
+    Newest audit entries for the admin's tenant. The body stays a plain list;
+    when more entries exist, pass the X-Next-Cursor response header back as ?cursor=.
+    """
+    # SECURITY CHECK: the store only ever opens THIS tenant's files
     tenant_id = str(admin['tenant_id'])
-    logs = []
-
-    if not os.path.exists(LOG_FILE):
-        return []
 
-    # Read file in reverse (newest first)
     try:
-        with open(LOG_FILE, "r") as f:
-            lines = f.readlines()
-            
-        for line in reversed(lines):
-            try:
-                # Parse format: TIMESTAMP | TENANT_ID | EMAIL | ACTION | DETAILS
-                parts = line.strip().split(" | ")
-                if len(parts) < 5:
-                    continue
-
-                timestamp, log_tenant_id, email, action, details = parts[0], parts[1], parts[2], parts[3], parts[4]
-
-                # SECURITY CHECK: Only show logs for THIS tenant
-                if log_tenant_id == tenant_id:
-                    logs.append({
-                        "timestamp": timestamp,
-                        "staff_email": email,
-                        "action": action,
-                        "details": details
-                    })
-                
-                # Limit to last 100 logs to prevent payload explosion
-                if len(logs) >= 100:
-                    break
-
-            except Exception:
-                continue # Skip malformed lines
-
+        logs, next_cursor = read_tenant_logs(tenant_id, limit, cursor, action, since, until)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
     except Exception as e:
         print(f"Error reading logs: {e}")
         return []
 
-    return logs
\ No newline at end of file
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return logs
@@ -1,15 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from app.core.database import get_db_connection
+from app.core.database import get_read_connection
 from app.core.dependencies import require_tenant_admin
 from typing import Optional
+from datetime import date, datetime
 
+# Reports are read-only: served by the read replica when one is configured (get_read_connection)
 router = APIRouter(prefix="/tenant/stats", tags=["Tenant Analytics"])
 
+def _month_range(month: str):
+    """'YYYY-MM' -> [first day, first day of next month), so filters stay index-friendly."""
+    try:
+        start = datetime.strptime(month, "%Y-%m").date()
+    except ValueError:
+        raise HTTPException(400, "Invalid month, expected YYYY-MM")
+    end = date(start.year + 1, 1, 1) if start.month == 12 else date(start.year, start.month + 1, 1)
+    return start, end
+
 @router.get("/summary")
 async def get_stats_summary(admin: dict = Depends(require_tenant_admin)):
     tenant_id = admin['tenant_id']
     
-    async with get_db_connection() as conn:
+    async with get_read_connection() as conn:
         async with conn.cursor() as cur:
             # 1. Total Players
             await cur.execute("SELECT COUNT(*) as total FROM player WHERE tenant_id = %s", (tenant_id,))
@@ -24,10 +35,9 @@ async def get_stats_summary(admin: dict = Depends(require_tenant_admin)):
           
             await cur.execute("""
                 SELECT 
-                    COALESCE(SUM(b.bet_amount), 0) - COALESCE(SUM(bo.payout_amount), 0) as ggr
-                FROM bet b
-                LEFT JOIN betoutcome bo ON b.bet_id = bo.bet_id
-                WHERE b.tenant_id = %s AND b.created_at >= CURRENT_DATE
+                    COALESCE(SUM(r.total_wagered), 0) - COALESCE(SUM(r.total_paid_out), 0) as ggr
+                FROM ggrhourlyrollup r
+                WHERE r.tenant_id = %s AND r.bucket_hour >= CURRENT_DATE
             """, (tenant_id,))
             ggr_today = (await cur.fetchone())['ggr']
 
@@ -47,81 +57,80 @@ async def get_player_stats(
 ):
     tenant_id = admin['tenant_id']
     
-    date_filter_bet = "AND TO_CHAR(b.created_at, 'YYYY-MM') = %s" if month else "AND b.created_at >= CURRENT_DATE"
-    date_filter_session = "AND TO_CHAR(gs.started_at, 'YYYY-MM') = %s" if month else "AND gs.started_at >= CURRENT_DATE"
-    
+    # Bet aggregates come from the hourly rollup, sessions from GameSession; both as plain ranges
+    if month:
+        month_start, month_end = _month_range(month)
+        date_filter_rollup = "AND r.bucket_hour >= %s AND r.bucket_hour < %s"
+        date_filter_session = "AND gs.started_at >= %s AND gs.started_at < %s"
+        date_params = [month_start, month_end]
+    else:
+        date_filter_rollup = "AND r.bucket_hour >= CURRENT_DATE"
+        date_filter_session = "AND gs.started_at >= CURRENT_DATE"
+        date_params = []
+
     query = ""
     params = []
 
     if filter_type == "HIGH_ROLLERS":
         query = f"""
-            SELECT DISTINCT p.player_id, p.username, p.email, MAX(b.bet_amount) as max_val, MAX(b.created_at) as last_active
+            SELECT p.player_id, p.username, p.email, MAX(r.max_bet_amount) as max_val, MAX(r.last_bet_at) as last_active
             FROM player p
-            JOIN bet b ON p.player_id = b.player_id
-            WHERE p.tenant_id = %s AND b.bet_amount >= %s {date_filter_bet.replace('%s', '%s' if month else '')}
+            JOIN ggrhourlyrollup r ON r.tenant_id = p.tenant_id AND r.player_id = p.player_id
+            WHERE p.tenant_id = %s {date_filter_rollup}
             GROUP BY p.player_id
+            HAVING MAX(r.max_bet_amount) >= %s
             ORDER BY max_val DESC
         """
 
-        params = [tenant_id, threshold]
-        if month: params.append(month)
+        params = [tenant_id, *date_params, threshold]
 
     elif filter_type in ["ACTIVE", "ACTIVE_TODAY"]:
-        
-        sub_clause = date_filter_session.replace('%s', '%s' if month else '')
-        main_clause = date_filter_session.replace('%s', '%s' if month else '')
 
         query = f"""
-            SELECT DISTINCT p.player_id, p.username, p.email, 
-                   (SELECT COUNT(*) FROM gamesession gs WHERE gs.player_id = p.player_id {sub_clause}) as max_val,
+            SELECT p.player_id, p.username, p.email, 
+                   COUNT(*) as max_val,
                    NOW() as last_active
             FROM player p
             JOIN gamesession gs ON p.player_id = gs.player_id
-            WHERE p.tenant_id = %s {main_clause}
+            WHERE p.tenant_id = %s {date_filter_session}
+            GROUP BY p.player_id
         """
-        
-        
-        params = []
-        if month: params.append(month)  
-        params.append(tenant_id)       
-        if month: params.append(month) 
+
+        params = [tenant_id, *date_params]
 
 
     elif filter_type == "BIG_WINNERS":
-        winner_clause = f"AND TO_CHAR(b.created_at, 'YYYY-MM') = %s" if month else ""
+        # Without a month this leaderboard is all-time
+        winner_clause = date_filter_rollup if month else ""
         
         query = f"""
             SELECT p.player_id, p.username, p.email, 
-                   (SUM(bo.payout_amount) - SUM(b.bet_amount)) as max_val,
-                   MAX(b.created_at) as last_active
+                   (SUM(r.total_paid_out) - SUM(r.total_wagered)) as max_val,
+                   MAX(r.last_bet_at) as last_active
             FROM player p
-            JOIN bet b ON p.player_id = b.player_id
-            JOIN betoutcome bo ON b.bet_id = bo.bet_id
-            WHERE p.tenant_id = %s {winner_clause.replace('%s', '%s' if month else '')}
+            JOIN ggrhourlyrollup r ON r.tenant_id = p.tenant_id AND r.player_id = p.player_id
+            WHERE p.tenant_id = %s {winner_clause}
             GROUP BY p.player_id
-            HAVING (SUM(bo.payout_amount) - SUM(b.bet_amount)) > 0
+            HAVING (SUM(r.total_paid_out) - SUM(r.total_wagered)) > 0
             ORDER BY max_val DESC
         """
-        params = [tenant_id]
-        if month: params.append(month)
+        params = [tenant_id, *date_params]
 
     elif filter_type == "TOP_LOSERS":
-        loser_clause = f"AND TO_CHAR(b.created_at, 'YYYY-MM') = %s" if month else ""
+        loser_clause = date_filter_rollup if month else ""
         
         query = f"""
             SELECT p.player_id, p.username, p.email, 
-                   (SUM(b.bet_amount) - SUM(bo.payout_amount)) as max_val,
-                   MAX(b.created_at) as last_active
+                   (SUM(r.total_wagered) - SUM(r.total_paid_out)) as max_val,
+                   MAX(r.last_bet_at) as last_active
             FROM player p
-            JOIN bet b ON p.player_id = b.player_id
-            JOIN betoutcome bo ON b.bet_id = bo.bet_id
-            WHERE p.tenant_id = %s {loser_clause.replace('%s', '%s' if month else '')}
+            JOIN ggrhourlyrollup r ON r.tenant_id = p.tenant_id AND r.player_id = p.player_id
+            WHERE p.tenant_id = %s {loser_clause}
             GROUP BY p.player_id
-            HAVING (SUM(b.bet_amount) - SUM(bo.payout_amount)) > 0
+            HAVING (SUM(r.total_wagered) - SUM(r.total_paid_out)) > 0
             ORDER BY max_val DESC
         """
-        params = [tenant_id]
-        if month: params.append(month)
+        params = [tenant_id, *date_params]
 
     elif filter_type == "CHURN_RISK":
         query = """
@@ -139,7 +148,7 @@ async def get_player_stats(
     else:
         raise HTTPException(400, "Invalid filter type")
 
-    async with get_db_connection() as conn:
+    async with get_read_connection() as conn:
         async with conn.cursor() as cur:
             await cur.execute(query, tuple(params))
             rows = await cur.fetchall()
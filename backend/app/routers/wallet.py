@@ -1,5 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from psycopg import errors
 from app.core.database import get_db_connection
+from app.core import wallet_ledger, idempotency, keyset
 from app.core.dependencies import require_player, verify_player_is_approved
 from app.schemas.wallet_schema import DepositRequest, TransactionResponse
 
@@ -34,9 +38,11 @@ async def get_wallet_balance(user: dict = Depends(require_player)):
 @router.post("/deposit")
 async def deposit_money(
     data: DepositRequest, 
-    user: dict = Depends(require_player)
+    user: dict = Depends(require_player),
+    idempotency_key: Optional[str] = Depends(idempotency.key_header)
 ):
     player_id = user["user_id"]
+    claim = idempotency.claim(player_id, "WALLET_DEPOSIT", idempotency_key)
     
     if data.amount <= 0:
         raise HTTPException(status_code=400, detail="Deposit amount must be positive.")
@@ -54,7 +60,6 @@ async def deposit_money(
             
             wallet_id = wallet['wallet_id']
             currency_code = wallet['currency_code']
-            current_balance = float(wallet['balance'])
 
             try:
                 await cur.execute("BEGIN;")
@@ -69,46 +74,71 @@ async def deposit_money(
                 )
                 deposit_id = (await cur.fetchone())['deposit_id']
 
-                new_balance = current_balance + data.amount
-                await cur.execute("UPDATE Wallet SET balance = %s WHERE wallet_id = %s", (new_balance, wallet_id))
-                await cur.execute(
-                    """
-                    INSERT INTO WalletTransaction 
-                    (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at)
-                    VALUES (%s, 'DEPOSIT', %s, %s, 'DEPOSIT_RECORD', %s, NOW())
-                    """,
-                    (wallet_id, data.amount, new_balance, deposit_id)
+                if claim:
+                    claim.response = {"status": "success", "deposited": data.amount, "deposit_id": str(deposit_id)}
+                credited = await wallet_ledger.credit(
+                    cur, data.amount, 'DEPOSIT', 'DEPOSIT_RECORD', deposit_id, wallet_id=wallet_id, idempotency=claim
                 )
 
                 await conn.commit()
                 
                 return {
                     "status": "success", 
-                    "new_balance": new_balance, 
+                    "new_balance": credited['balance_after'], 
                     "deposited": data.amount,
                     "deposit_id": str(deposit_id)
                 }
 
+            except errors.UniqueViolation as e:
+                # Retried request: answer with the first deposit instead of depositing again
+                return await idempotency.replay_or_raise(conn, claim, e)
             except Exception as e:
                 await conn.rollback()
                 raise HTTPException(status_code=500, detail=str(e))
             
 @router.get("/history", response_model=list[TransactionResponse])
-async def get_transaction_history(user: dict = Depends(require_player)):
+async def get_transaction_history(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    user: dict = Depends(require_player)
+):
+    """
+    Newest transactions across the player's wallets. The body stays a plain list;
+    when more exist, pass the X-Next-Cursor response header back as ?cursor=.
+    """
     player_id = user["user_id"]
+    try:
+        filters, filter_params = keyset.filters_sql("t", cursor, transaction_type, since, until)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
     
     async with get_db_connection() as conn:
         async with conn.cursor() as cur:
+            # One bounded index scan per wallet (idx_wallettransaction_wallet_created), then merged
             await cur.execute(
-                """
-                SELECT t.wallet_txn_id as transaction_id, t.transaction_type as type, 
-                       t.amount, t.balance_after, t.created_at
-                FROM WalletTransaction t
-                JOIN Wallet w ON t.wallet_id = w.wallet_id
+                f"""
+                SELECT t.*
+                FROM Wallet w
+                CROSS JOIN LATERAL (
+                    SELECT t.wallet_txn_id as transaction_id, t.transaction_type as type, 
+                           t.amount, t.balance_after, t.created_at
+                    FROM WalletTransaction t
+                    WHERE t.wallet_id = w.wallet_id {filters}
+                    ORDER BY t.created_at DESC, t.wallet_txn_id DESC
+                    LIMIT %s
+                ) t
                 WHERE w.player_id = %s
-                ORDER BY t.created_at DESC
-                LIMIT 50
+                ORDER BY t.created_at DESC, t.transaction_id DESC
+                LIMIT %s
                 """,
-                (player_id,)
+                (*filter_params, limit + 1, player_id, limit + 1)
             )
-            return await cur.fetchall()
\ No newline at end of file
+            rows, next_cursor = keyset.split_page(await cur.fetchall(), limit)
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List
 
 class GameCreateRequest(BaseModel):
     game_name: str         
@@ -28,4 +28,31 @@ class GamePlayResponse(BaseModel):
     balance_after: float
     outcome: str       
     game_data: dict     
-    session_id: str
\ No newline at end of file
+    session_id: str
+
+class GameBatchPlayRequest(BaseModel):
+    bet_amount: float
+    # Number of spins to play with the same stake (capped by MAX_BATCH_ROUNDS)
+    rounds: int
+    bet_data: Optional[Dict[str, Any]] = {}
+    # "BONUS" or "REAL".
+    use_wallet_type: Optional[str] = None
+
+class GameRoundResult(BaseModel):
+    win_amount: float
+    balance_after: float
+    outcome: str
+    game_data: dict
+
+class GameBatchPlayResponse(BaseModel):
+    game_id: str
+    game_name: str
+    bet_amount: float
+    rounds_requested: int
+    rounds_played: int
+    total_win_amount: float
+    balance_after: float
+    session_id: str
+    # Why the batch ended early: INSUFFICIENT_FUNDS, DAILY_BET_LIMIT or DAILY_LOSS_LIMIT
+    stopped_reason: Optional[str] = None
+    results: List[GameRoundResult]
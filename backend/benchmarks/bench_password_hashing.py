@@ -0,0 +1,74 @@
+"""
+Event-loop latency during a login burst, before/after moving bcrypt off the loop.
+
+Usage (from backend/):  python -m benchmarks.bench_password_hashing [--logins 200]
+
+A heartbeat task sleeps 5ms in a loop and records how late it wakes up. That lateness
+is what every in-flight /engine/play request on the same worker would see.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from app.core.security import hash_password, verify_password, verify_password_async
+
+HEARTBEAT_INTERVAL = 0.005
+
+
+async def heartbeat(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append((time.perf_counter() - start - HEARTBEAT_INTERVAL) * 1000)
+
+
+async def login_sync(password: str, hashed: str):
+    # What auth.login did before: bcrypt straight on the event loop
+    return verify_password(password, hashed)
+
+
+async def login_async(password: str, hashed: str):
+    return await verify_password_async(password, hashed)
+
+
+async def run_burst(login, logins: int, password: str, hashed: str):
+    lags = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login(password, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await beat
+    assert all(results)
+    return elapsed, lags
+
+
+def report(name: str, elapsed: float, lags: list):
+    lags = sorted(lags) or [0.0]
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+    print(
+        f"{name:<22} burst={elapsed:7.2f}s  heartbeats={len(lags):5d}  "
+        f"loop lag mean={statistics.mean(lags):8.2f}ms  p99={p99:8.2f}ms  max={lags[-1]:8.2f}ms"
+    )
+
+
+async def main(logins: int):
+    password = "correct horse battery staple"
+    hashed = hash_password(password)
+
+    elapsed, lags = await run_burst(login_sync, logins, password, hashed)
+    report("before (sync bcrypt)", elapsed, lags)
+
+    elapsed, lags = await run_burst(login_async, logins, password, hashed)
+    report("after (worker pool)", elapsed, lags)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
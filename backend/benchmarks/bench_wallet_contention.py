@@ -0,0 +1,111 @@
+"""
+Concurrent debits on one hot wallet: read-modify-write (the old pattern) vs wallet_ledger.
+
+Usage (from backend/):  python -m benchmarks.bench_wallet_contention --wallet-id <uuid> [--workers 20] [--debits 50]
+
+Run against a test database. The wallet is topped up for the run, and afterwards its
+balance is restored and the BENCHMARK WalletTransaction rows are deleted.
+
+Each worker debits 1.00 `--debits` times on its own connection. The read-modify-write
+variant reads the balance, then writes balance - 1, so concurrent workers overwrite
+each other: the final balance is higher than it should be (lost updates). The ledger
+variant should land exactly on start - workers * debits.
+"""
+import argparse
+import asyncio
+import time
+from app.core import wallet_ledger
+from app.core.database import get_db_connection, pool
+
+AMOUNT = 1.0
+
+
+async def debit_read_modify_write(cur, wallet_id):
+    await cur.execute("SELECT balance FROM Wallet WHERE wallet_id = %s", (wallet_id,))
+    balance = float((await cur.fetchone())['balance'])
+    if balance < AMOUNT:
+        return False
+    new_balance = balance - AMOUNT
+    await cur.execute("UPDATE Wallet SET balance = %s WHERE wallet_id = %s", (new_balance, wallet_id))
+    await cur.execute(
+        """
+        INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, created_at)
+        VALUES (%s, 'WITHDRAWAL', %s, %s, 'BENCHMARK', NOW())
+        """,
+        (wallet_id, AMOUNT, new_balance)
+    )
+    return True
+
+
+async def debit_ledger(cur, wallet_id):
+    return await wallet_ledger.debit(cur, AMOUNT, 'WITHDRAWAL', 'BENCHMARK', wallet_id=wallet_id) is not None
+
+
+async def worker(debit, wallet_id, debits: int):
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            for _ in range(debits):
+                await debit(cur, wallet_id)
+                await conn.commit()
+
+
+async def set_balance(wallet_id, balance):
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("UPDATE Wallet SET balance = %s WHERE wallet_id = %s RETURNING balance", (balance, wallet_id))
+            row = await cur.fetchone()
+            await conn.commit()
+            return row
+
+
+async def get_balance(wallet_id) -> float:
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT balance FROM Wallet WHERE wallet_id = %s", (wallet_id,))
+            return float((await cur.fetchone())['balance'])
+
+
+async def run(name, debit, wallet_id, workers: int, debits: int, start_balance: float):
+    await set_balance(wallet_id, start_balance)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(debit, wallet_id, debits) for _ in range(workers)))
+    elapsed = time.perf_counter() - started
+
+    expected = start_balance - workers * debits * AMOUNT
+    final = await get_balance(wallet_id)
+    print(
+        f"{name:<18} {workers * debits / elapsed:8.0f} debits/s  "
+        f"final={final:.2f}  expected={expected:.2f}  lost updates={round((final - expected) / AMOUNT)}"
+    )
+
+
+async def _main(wallet_id, workers: int, debits: int):
+    await pool.open()
+    # Each worker holds its own connection for the whole run
+    await pool.resize(min_size=pool.min_size, max_size=max(pool.max_size, workers + 1))
+    try:
+        original = await get_balance(wallet_id)
+        start_balance = float(workers * debits) * AMOUNT * 2
+        print(f"Wallet {wallet_id}: {workers} workers x {debits} debits of {AMOUNT:.2f}")
+        try:
+            await run("read-modify-write", debit_read_modify_write, wallet_id, workers, debits, start_balance)
+            await run("wallet_ledger", debit_ledger, wallet_id, workers, debits, start_balance)
+        finally:
+            await set_balance(wallet_id, original)
+            async with get_db_connection() as conn:
+                await conn.execute(
+                    "DELETE FROM WalletTransaction WHERE wallet_id = %s AND reference_type = 'BENCHMARK'",
+                    (wallet_id,)
+                )
+                await conn.commit()
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hot-wallet debit contention benchmark (use a test database)")
+    parser.add_argument("--wallet-id", required=True, help="Wallet to hammer; its balance is restored afterwards")
+    parser.add_argument("--workers", type=int, default=20, help="Concurrent connections")
+    parser.add_argument("--debits", type=int, default=50, help="Debits per worker")
+    args = parser.parse_args()
+    asyncio.run(_main(args.wallet_id, args.workers, args.debits))
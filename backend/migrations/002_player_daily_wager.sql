@@ -0,0 +1,183 @@
+-- Per-player per-day wager/win counters used by the daily_bet_limit / daily_loss_limit checks.
+-- Maintained by settle_game_round() (and the multi-statement path) in the Bet transaction,
+-- rebuilt from Bet history with: python -m app.core.daily_counters [--since YYYY-MM-DD]
+
+CREATE TABLE IF NOT EXISTS PlayerDailyWager (
+    player_id      UUID NOT NULL REFERENCES Player(player_id) ON DELETE CASCADE,
+    wager_date     DATE NOT NULL,
+    total_wagered  NUMERIC NOT NULL DEFAULT 0,
+    total_won      NUMERIC NOT NULL DEFAULT 0,
+    updated_at     TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (player_id, wager_date)
+);
+
+-- Seed today's counters so limits keep working across the deploy
+INSERT INTO PlayerDailyWager (player_id, wager_date, total_wagered, total_won, updated_at)
+SELECT
+    b.player_id,
+    CURRENT_DATE,
+    COALESCE(SUM(b.bet_amount), 0),
+    COALESCE(SUM(bo.payout_amount), 0),
+    NOW()
+FROM Bet b
+LEFT JOIN BetOutcome bo ON b.bet_id = bo.bet_id
+WHERE b.created_at >= CURRENT_DATE
+GROUP BY b.player_id
+ON CONFLICT (player_id, wager_date) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION settle_game_round(
+    p_player_id       Player.player_id%TYPE,
+    p_tenant_id       Tenant.tenant_id%TYPE,
+    p_tenant_game_id  TenantGame.tenant_game_id%TYPE,
+    p_wallet_id       Wallet.wallet_id%TYPE,
+    p_currency_code   Wallet.currency_code%TYPE,
+    p_bet_amount      NUMERIC,
+    p_payout          NUMERIC,
+    p_platform_fee    NUMERIC,
+    p_client_ip       GameSession.ip_address%TYPE
+)
+RETURNS TABLE (
+    out_bet_id        Bet.bet_id%TYPE,
+    out_session_id    GameSession.session_id%TYPE,
+    out_round_id      GameRound.round_id%TYPE,
+    out_balance_after Wallet.balance%TYPE
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_wallet_type     Wallet.wallet_type%TYPE;
+    v_balance         Wallet.balance%TYPE;
+    v_session_id      GameSession.session_id%TYPE;
+    v_started_at      GameSession.started_at%TYPE;
+    v_round_number    INTEGER;
+    v_round_id        GameRound.round_id%TYPE;
+    v_bet_id          Bet.bet_id%TYPE;
+    v_net_change      NUMERIC;
+    v_bonus_wallet_id Wallet.wallet_id%TYPE;
+    v_bonus_balance   Wallet.balance%TYPE;
+    v_total_bets      NUMERIC;
+    camp              RECORD;
+BEGIN
+    -- 1. Debit stake and credit payout in one guarded update
+    UPDATE Wallet
+    SET balance = balance - p_bet_amount + p_payout
+    WHERE wallet_id = p_wallet_id
+      AND player_id = p_player_id
+      AND balance >= p_bet_amount
+    RETURNING balance, wallet_type INTO v_balance, v_wallet_type;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'INSUFFICIENT_FUNDS';
+    END IF;
+
+    -- 2. Session (sessions older than 2 hours are closed and replaced)
+    SELECT session_id, started_at INTO v_session_id, v_started_at
+    FROM GameSession
+    WHERE player_id = p_player_id AND game_id = p_tenant_game_id AND ended_at IS NULL
+    ORDER BY started_at DESC
+    LIMIT 1;
+
+    IF v_session_id IS NOT NULL AND v_started_at < NOW() - INTERVAL '2 hours' THEN
+        UPDATE GameSession SET ended_at = NOW() WHERE session_id = v_session_id;
+        v_session_id := NULL;
+    END IF;
+
+    IF v_session_id IS NULL THEN
+        INSERT INTO GameSession (player_id, game_id, ip_address, started_at)
+        VALUES (p_player_id, p_tenant_game_id, p_client_ip, NOW())
+        RETURNING session_id INTO v_session_id;
+    END IF;
+
+    -- 3. Round is written once, already ended
+    SELECT COALESCE(MAX(round_number), 0) + 1 INTO v_round_number
+    FROM GameRound
+    WHERE session_id = v_session_id;
+
+    INSERT INTO GameRound (session_id, round_number, started_at, ended_at)
+    VALUES (v_session_id, v_round_number, NOW(), NOW())
+    RETURNING round_id INTO v_round_id;
+
+    -- 4. Bet, outcome, daily responsible-gaming counters and ledger entry
+    INSERT INTO Bet (
+        tenant_id, player_id, round_id, wallet_type,
+        bet_amount, currency_code, tenant_game_id,
+        platform_fee_amount, created_at
+    )
+    VALUES (
+        p_tenant_id, p_player_id, v_round_id, v_wallet_type,
+        p_bet_amount, p_currency_code, p_tenant_game_id,
+        p_platform_fee, NOW()
+    )
+    RETURNING bet_id INTO v_bet_id;
+
+    INSERT INTO BetOutcome (bet_id, result, payout_amount, settled_at)
+    VALUES (v_bet_id, CASE WHEN p_payout > 0 THEN 'WIN' ELSE 'LOSS' END, p_payout, NOW());
+
+    INSERT INTO PlayerDailyWager (player_id, wager_date, total_wagered, total_won, updated_at)
+    VALUES (p_player_id, CURRENT_DATE, p_bet_amount, p_payout, NOW())
+    ON CONFLICT (player_id, wager_date) DO UPDATE
+    SET total_wagered = PlayerDailyWager.total_wagered + EXCLUDED.total_wagered,
+        total_won = PlayerDailyWager.total_won + EXCLUDED.total_won,
+        updated_at = NOW();
+
+    v_net_change := p_payout - p_bet_amount;
+    INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at)
+    VALUES (
+        p_wallet_id,
+        CASE WHEN v_net_change >= 0 THEN 'WIN' ELSE 'LOSS' END,
+        ABS(v_net_change),
+        v_balance,
+        'GAME_BET',
+        v_bet_id::text,
+        NOW()
+    );
+
+    -- 5. BET_THRESHOLD campaigns
+    FOR camp IN
+        SELECT campaign_id, bonus_amount, wagering_requirement, start_date, end_date
+        FROM BonusCampaign
+        WHERE tenant_id = p_tenant_id
+          AND bonus_type = 'BET_THRESHOLD'
+          AND is_active = TRUE
+          AND start_date <= NOW()
+          AND (end_date IS NULL OR end_date >= NOW())
+    LOOP
+        IF v_bonus_wallet_id IS NULL THEN
+            SELECT wallet_id INTO v_bonus_wallet_id
+            FROM Wallet
+            WHERE player_id = p_player_id AND wallet_type = 'BONUS';
+
+            IF v_bonus_wallet_id IS NULL THEN
+                INSERT INTO Wallet (player_id, wallet_type, currency_code, balance)
+                VALUES (p_player_id, 'BONUS', 'USD', 0)
+                RETURNING wallet_id INTO v_bonus_wallet_id;
+            END IF;
+        END IF;
+
+        CONTINUE WHEN EXISTS (
+            SELECT 1 FROM WalletTransaction
+            WHERE wallet_id = v_bonus_wallet_id
+              AND reference_type = 'CAMPAIGN'
+              AND reference_id = camp.campaign_id::text
+        );
+
+        SELECT COALESCE(SUM(bet_amount), 0) INTO v_total_bets
+        FROM Bet
+        WHERE player_id = p_player_id
+          AND created_at >= camp.start_date
+          AND created_at <= COALESCE(camp.end_date, NOW());
+
+        IF v_total_bets >= camp.wagering_requirement THEN
+            UPDATE Wallet
+            SET balance = balance + camp.bonus_amount
+            WHERE wallet_id = v_bonus_wallet_id
+            RETURNING balance INTO v_bonus_balance;
+
+            INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at)
+            VALUES (v_bonus_wallet_id, 'BONUS_CREDIT', camp.bonus_amount, v_bonus_balance, 'CAMPAIGN', camp.campaign_id::text, NOW());
+        END IF;
+    END LOOP;
+
+    RETURN QUERY SELECT v_bet_id, v_session_id, v_round_id, v_balance;
+END;
+$$;
@@ -0,0 +1,27 @@
+-- Daily platform earnings cube (day x tenant x game) behind /admin/earnings.
+-- Built from GgrHourlyRollup and refreshed incrementally by app.core.earnings_cube.
+
+CREATE TABLE IF NOT EXISTS PlatformEarningsDaily (
+    earnings_date   DATE NOT NULL,
+    tenant_id       UUID NOT NULL,
+    tenant_game_id  UUID NOT NULL,
+    fee_sum         NUMERIC NOT NULL DEFAULT 0,
+    bet_count       BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (earnings_date, tenant_id, tenant_game_id)
+);
+
+-- Single row: how far the cube is known to be complete
+CREATE TABLE IF NOT EXISTS PlatformEarningsRefresh (
+    id              BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    refreshed_at    TIMESTAMP NOT NULL
+);
+
+INSERT INTO PlatformEarningsDaily (earnings_date, tenant_id, tenant_game_id, fee_sum, bet_count)
+SELECT bucket_hour::date, tenant_id, tenant_game_id, SUM(platform_fee), SUM(bet_count)
+FROM GgrHourlyRollup
+GROUP BY bucket_hour::date, tenant_id, tenant_game_id
+ON CONFLICT (earnings_date, tenant_id, tenant_game_id) DO NOTHING;
+
+INSERT INTO PlatformEarningsRefresh (id, refreshed_at)
+VALUES (TRUE, NOW())
+ON CONFLICT (id) DO NOTHING;
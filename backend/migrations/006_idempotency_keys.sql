@@ -0,0 +1,15 @@
+-- Idempotency-Key header: one row per (caller, endpoint scope, key) holding the response the
+-- first request returned. The row is written by the same statement that moves the money, so a
+-- retried request fails on the primary key and is answered from here instead of settling twice.
+-- Rows older than IDEMPOTENCY_KEY_TTL_HOURS are deleted by app.core.idempotency.
+
+CREATE TABLE IF NOT EXISTS IdempotencyKey (
+    owner_id         UUID NOT NULL,
+    scope            VARCHAR(32) NOT NULL,
+    idempotency_key  VARCHAR(255) NOT NULL,
+    response         JSONB NOT NULL,
+    created_at       TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (owner_id, scope, idempotency_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotencykey_created ON IdempotencyKey (created_at);
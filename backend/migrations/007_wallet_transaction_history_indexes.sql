@@ -0,0 +1,16 @@
+-- Keyset pagination for the transaction history endpoints (app.core.keyset):
+-- newest first on (created_at, wallet_txn_id), so each page is one index range scan
+-- whatever page it is, with the listed columns read from the index.
+
+-- /wallet/history and /players/my-transactions: one scan per wallet of the player
+CREATE INDEX IF NOT EXISTS idx_wallettransaction_wallet_created
+    ON WalletTransaction (wallet_id, created_at DESC, wallet_txn_id DESC)
+    INCLUDE (transaction_type, amount, balance_after, reference_type, reference_id);
+
+-- /staff/my-transactions: transactions a staff member processed (reference_id = staff id)
+CREATE INDEX IF NOT EXISTS idx_wallettransaction_staff_created
+    ON WalletTransaction (reference_id, created_at DESC, wallet_txn_id DESC)
+    INCLUDE (transaction_type, amount, wallet_id)
+    WHERE reference_type IN ('STAFF_OTP', 'CASHIER_DESK', 'DEPOSIT', 'WITHDRAWAL');
+
+ANALYZE WalletTransaction;
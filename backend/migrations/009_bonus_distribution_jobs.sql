@@ -0,0 +1,26 @@
+-- FESTIVAL bonus distributions run as resumable jobs (app.core.bonus_distribution).
+-- Players are credited in player_id order, one committed chunk at a time; last_player_id is
+-- advanced in the same transaction as the chunk's credits, so after a crash the job picks up
+-- right after the last committed chunk and nobody is credited twice.
+
+CREATE TABLE IF NOT EXISTS BonusDistributionJob (
+    job_id             UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    campaign_id        UUID NOT NULL REFERENCES BonusCampaign(campaign_id) ON DELETE CASCADE,
+    tenant_id          UUID NOT NULL,
+    amount             NUMERIC NOT NULL,
+    status             VARCHAR(16) NOT NULL DEFAULT 'RUNNING',  -- RUNNING, COMPLETED or FAILED
+    last_player_id     UUID,
+    total_players      INTEGER NOT NULL DEFAULT 0,
+    processed_players  INTEGER NOT NULL DEFAULT 0,
+    error              TEXT,
+    created_by         VARCHAR(255),  -- admin email, for the audit log entry on completion
+    created_at         TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated_at         TIMESTAMP NOT NULL DEFAULT NOW(),
+    finished_at        TIMESTAMP
+);
+
+-- A campaign is distributed at most once
+CREATE UNIQUE INDEX IF NOT EXISTS uq_bonusdistributionjob_campaign ON BonusDistributionJob (campaign_id);
+
+-- Keyset walk over a tenant's active players
+CREATE INDEX IF NOT EXISTS idx_player_tenant_status_id ON Player (tenant_id, status, player_id);
@@ -0,0 +1,198 @@
+-- Campaign windows are enforced by app.core.campaign_scheduler instead of on every read and
+-- every spin: it activates campaigns when start_date comes (pending_start) and deactivates
+-- them after end_date, so is_active alone says whether a campaign is running.
+
+ALTER TABLE BonusCampaign ADD COLUMN IF NOT EXISTS pending_start BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Campaigns whose window has already closed
+UPDATE BonusCampaign
+SET is_active = FALSE
+WHERE is_active = TRUE AND end_date IS NOT NULL AND end_date < NOW();
+
+-- Enabled campaigns that haven't started yet wait for the scheduler
+UPDATE BonusCampaign
+SET is_active = FALSE, pending_start = TRUE
+WHERE is_active = TRUE AND start_date > NOW();
+
+-- The scheduler's next deadlines
+CREATE INDEX IF NOT EXISTS idx_bonuscampaign_pending_start ON BonusCampaign (start_date) WHERE pending_start;
+CREATE INDEX IF NOT EXISTS idx_bonuscampaign_active_end ON BonusCampaign (end_date) WHERE is_active AND end_date IS NOT NULL;
+
+-- Same as 008, without the start_date/end_date checks on BET_THRESHOLD campaigns
+CREATE OR REPLACE FUNCTION settle_game_round(
+    p_player_id       Player.player_id%TYPE,
+    p_tenant_id       Tenant.tenant_id%TYPE,
+    p_tenant_game_id  TenantGame.tenant_game_id%TYPE,
+    p_wallet_id       Wallet.wallet_id%TYPE,
+    p_currency_code   Wallet.currency_code%TYPE,
+    p_bet_amount      NUMERIC,
+    p_payout          NUMERIC,
+    p_platform_fee    NUMERIC,
+    p_client_ip       GameSession.ip_address%TYPE
+)
+RETURNS TABLE (
+    out_bet_id        Bet.bet_id%TYPE,
+    out_session_id    GameSession.session_id%TYPE,
+    out_round_id      GameRound.round_id%TYPE,
+    out_balance_after Wallet.balance%TYPE
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_wallet_type     Wallet.wallet_type%TYPE;
+    v_balance         Wallet.balance%TYPE;
+    v_session_id      GameSession.session_id%TYPE;
+    v_started_at      GameSession.started_at%TYPE;
+    v_round_number    INTEGER;
+    v_round_id        GameRound.round_id%TYPE;
+    v_bet_id          Bet.bet_id%TYPE;
+    v_net_change      NUMERIC;
+    v_bonus_wallet_id Wallet.wallet_id%TYPE;
+    v_bonus_balance   Wallet.balance%TYPE;
+    camp              RECORD;
+BEGIN
+    -- 1. Debit stake and credit payout in one guarded update
+    UPDATE Wallet
+    SET balance = balance - p_bet_amount + p_payout
+    WHERE wallet_id = p_wallet_id
+      AND player_id = p_player_id
+      AND balance >= p_bet_amount
+    RETURNING balance, wallet_type INTO v_balance, v_wallet_type;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'INSUFFICIENT_FUNDS';
+    END IF;
+
+    -- 2. Session (sessions older than 2 hours are closed and replaced)
+    SELECT session_id, started_at INTO v_session_id, v_started_at
+    FROM GameSession
+    WHERE player_id = p_player_id AND game_id = p_tenant_game_id AND ended_at IS NULL
+    ORDER BY started_at DESC
+    LIMIT 1;
+
+    IF v_session_id IS NOT NULL AND v_started_at < NOW() - INTERVAL '2 hours' THEN
+        UPDATE GameSession SET ended_at = NOW() WHERE session_id = v_session_id;
+        v_session_id := NULL;
+    END IF;
+
+    IF v_session_id IS NULL THEN
+        INSERT INTO GameSession (player_id, game_id, ip_address, started_at)
+        VALUES (p_player_id, p_tenant_game_id, p_client_ip, NOW())
+        RETURNING session_id INTO v_session_id;
+    END IF;
+
+    -- 3. Round is written once, already ended
+    SELECT COALESCE(MAX(round_number), 0) + 1 INTO v_round_number
+    FROM GameRound
+    WHERE session_id = v_session_id;
+
+    INSERT INTO GameRound (session_id, round_number, started_at, ended_at)
+    VALUES (v_session_id, v_round_number, NOW(), NOW())
+    RETURNING round_id INTO v_round_id;
+
+    -- 4. Bet, outcome, daily responsible-gaming counters, GGR rollup and ledger entry
+    INSERT INTO Bet (
+        tenant_id, player_id, round_id, wallet_type,
+        bet_amount, currency_code, tenant_game_id,
+        platform_fee_amount, created_at
+    )
+    VALUES (
+        p_tenant_id, p_player_id, v_round_id, v_wallet_type,
+        p_bet_amount, p_currency_code, p_tenant_game_id,
+        p_platform_fee, NOW()
+    )
+    RETURNING bet_id INTO v_bet_id;
+
+    INSERT INTO BetOutcome (bet_id, result, payout_amount, settled_at)
+    VALUES (v_bet_id, CASE WHEN p_payout > 0 THEN 'WIN' ELSE 'LOSS' END, p_payout, NOW());
+
+    INSERT INTO PlayerDailyWager (player_id, wager_date, total_wagered, total_won, updated_at)
+    VALUES (p_player_id, CURRENT_DATE, p_bet_amount, p_payout, NOW())
+    ON CONFLICT (player_id, wager_date) DO UPDATE
+    SET total_wagered = PlayerDailyWager.total_wagered + EXCLUDED.total_wagered,
+        total_won = PlayerDailyWager.total_won + EXCLUDED.total_won,
+        updated_at = NOW();
+
+    INSERT INTO GgrHourlyRollup AS r (
+        tenant_id, player_id, tenant_game_id, bucket_hour,
+        total_wagered, total_paid_out, bet_count, platform_fee, max_bet_amount, last_bet_at
+    )
+    VALUES (
+        p_tenant_id, p_player_id, p_tenant_game_id, date_trunc('hour', NOW()),
+        p_bet_amount, p_payout, 1, p_platform_fee, p_bet_amount, NOW()
+    )
+    ON CONFLICT (tenant_id, bucket_hour, player_id, tenant_game_id) DO UPDATE
+    SET total_wagered = r.total_wagered + EXCLUDED.total_wagered,
+        total_paid_out = r.total_paid_out + EXCLUDED.total_paid_out,
+        bet_count = r.bet_count + 1,
+        platform_fee = r.platform_fee + EXCLUDED.platform_fee,
+        max_bet_amount = GREATEST(r.max_bet_amount, EXCLUDED.max_bet_amount),
+        last_bet_at = GREATEST(r.last_bet_at, EXCLUDED.last_bet_at);
+
+    v_net_change := p_payout - p_bet_amount;
+    INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, bet_id, created_at)
+    VALUES (
+        p_wallet_id,
+        CASE WHEN v_net_change >= 0 THEN 'WIN' ELSE 'LOSS' END,
+        ABS(v_net_change),
+        v_balance,
+        'GAME_BET',
+        v_bet_id::text,
+        v_bet_id,
+        NOW()
+    );
+
+    -- 5. BET_THRESHOLD campaigns: bump progress, award the ones that crossed the threshold
+    FOR camp IN
+        WITH progressed AS (
+            INSERT INTO CampaignProgress AS cp (player_id, campaign_id, wagered_amount, awarded_at, updated_at)
+            SELECT
+                p_player_id,
+                c.campaign_id,
+                p_bet_amount,
+                CASE WHEN p_bet_amount >= c.wagering_requirement THEN NOW() END,
+                NOW()
+            FROM BonusCampaign c
+            WHERE c.tenant_id = p_tenant_id
+              AND c.bonus_type = 'BET_THRESHOLD'
+              AND c.is_active = TRUE
+            ON CONFLICT (player_id, campaign_id) DO UPDATE
+            SET wagered_amount = cp.wagered_amount + EXCLUDED.wagered_amount,
+                awarded_at = CASE
+                    WHEN cp.wagered_amount + EXCLUDED.wagered_amount >= (
+                        SELECT wagering_requirement FROM BonusCampaign WHERE campaign_id = EXCLUDED.campaign_id
+                    ) THEN NOW()
+                END,
+                updated_at = NOW()
+            WHERE cp.awarded_at IS NULL
+            RETURNING cp.campaign_id, cp.awarded_at
+        )
+        SELECT c.campaign_id, c.bonus_amount
+        FROM progressed pr
+        JOIN BonusCampaign c ON c.campaign_id = pr.campaign_id
+        WHERE pr.awarded_at IS NOT NULL
+    LOOP
+        IF v_bonus_wallet_id IS NULL THEN
+            SELECT wallet_id INTO v_bonus_wallet_id
+            FROM Wallet
+            WHERE player_id = p_player_id AND wallet_type = 'BONUS';
+
+            IF v_bonus_wallet_id IS NULL THEN
+                INSERT INTO Wallet (player_id, wallet_type, currency_code, balance)
+                VALUES (p_player_id, 'BONUS', 'USD', 0)
+                RETURNING wallet_id INTO v_bonus_wallet_id;
+            END IF;
+        END IF;
+
+        UPDATE Wallet
+        SET balance = balance + camp.bonus_amount
+        WHERE wallet_id = v_bonus_wallet_id
+        RETURNING balance INTO v_bonus_balance;
+
+        INSERT INTO WalletTransaction (wallet_id, transaction_type, amount, balance_after, reference_type, reference_id, created_at)
+        VALUES (v_bonus_wallet_id, 'BONUS_CREDIT', camp.bonus_amount, v_bonus_balance, 'CAMPAIGN', camp.campaign_id::text, NOW());
+    END LOOP;
+
+    RETURN QUERY SELECT v_bet_id, v_session_id, v_round_id, v_balance;
+END;
+$$;